@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Callable, AnyStr, Any
-import json_repair
+from config.tracing import span
 from generative_model.model import  Generative_Model
 from agents.Prompt_Base import PromptTemplate
 from py_model import  Message
@@ -52,12 +52,27 @@ class Agent:
 
         self.refresh_system(**kwargs)
 
-        messages= [Message(role="system", content=self.prompts_template.get_format_system_prompt(**kwargs)),
-                   Message(role="user", content=query)]
-        response = await self.model.generate(messages)
+        with span("agent.response", agent=self._agent_name):
+            messages= [Message(role="system", content=self.prompts_template.get_format_system_prompt(**kwargs)),
+                       Message(role="user", content=query)]
+            response = await self.model.generate(messages)
 
         return response
 
+    async def stream_without_memory(
+        self,
+        query,
+        **kwargs
+    ):
+        """无list_based记忆的流式回复，逐段产出文本"""
+
+        self.refresh_system(**kwargs)
+
+        messages= [Message(role="system", content=self.prompts_template.get_format_system_prompt(**kwargs)),
+                   Message(role="user", content=query)]
+        async for chunk in self.model.stream(messages):
+            yield chunk
+
 
 
 async def main():
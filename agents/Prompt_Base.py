@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from string import Template
 
 from pydantic import BaseModel, Field
@@ -28,26 +28,49 @@ class PromptTemplate:
         self.examples: List[Example] = []
         self.suffix = ""
         self.user=""#特别用于react
-        
+        self._compiled: Dict[str, Template] = {}#模板文本 -> 编译后的Template，文本改变时自动重新编译
+        self._examples_cache: Optional[Tuple[tuple, str]] = None
+        self._system_cache: Dict[tuple, str] = {}
+        self._bound_cache: Dict[tuple, Template] = {}
+
     def set_examples_str(self) -> str:
 
         if not self.examples:
             return ""
-            
+
+        key = tuple((example.input, example.output) for example in self.examples)
+        if self._examples_cache is not None and self._examples_cache[0] == key:
+            return self._examples_cache[1]
+
         examples_str = "\n\nExamples:\n"
         for i, example in enumerate(self.examples, 1):
             examples_str += f"Example {i}:\n"
             examples_str += f"Input:\n{example.input}\n"
             examples_str += f"Output:\n{example.output}\n\n"
+        self._examples_cache = (key, examples_str)
         return examples_str
 
+    def _compile(self, prompt: str) -> Template:
+        template = self._compiled.get(prompt)
+        if template is None:
+            template = self._compiled[prompt] = Template(prompt)
+        return template
+
     def _format_prompt(self, prompt: str, prompt_type: PromptType, **kwargs) -> Optional[str]:
 
-        return Template(prompt).substitute(**kwargs) #TODO:添加安全检测 若传参不完全
+        return self._compile(prompt).substitute(**kwargs) #TODO:添加安全检测 若传参不完全
 
 
     def get_format_system_prompt(self, **kwargs) -> str:
 
+        try:
+            key = (self.prefix, self.suffix, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:#参数不可哈希时不缓存
+            key = None
+        if key is not None and key in self._system_cache:
+            return self._system_cache[key]
+
         formatted_prefix = self._format_prompt(self.prefix, PromptType.PREFIX, **kwargs) or ""
         formatted_suffix = self._format_prompt(self.suffix, PromptType.SUFFIX, **kwargs) or ""
         examples_str = self.set_examples_str()
@@ -56,6 +79,10 @@ class PromptTemplate:
         if result is None:
             result=""
 
+        if key is not None and not self.examples:#examples可变，含examples时不缓存整体结果
+            if len(self._system_cache) >= 64:
+                self._system_cache.clear()
+            self._system_cache[key] = result
         return result
 
     def get_format_user_prompt(self, **kwargs) -> str:
@@ -64,6 +91,34 @@ class PromptTemplate:
 
         return formatted_user
 
+    def bind_static(self, prompt: str, **static: str) -> Template:
+        """
+        预先代入不随迭代变化的参数（如工具列表），返回只剩动态参数的已编译模板
+        静态参数中的$会被转义，不会在第二次代入时被当作占位符
+        """
+        key = (prompt, tuple(sorted(static.items())))
+        template = self._bound_cache.get(key)
+        if template is None:
+            def replace(match):
+                name = match.group("named") or match.group("braced")
+                if name in static:
+                    return static[name].replace("$", "$$")
+                return match.group(0)
+
+            template = Template(Template.pattern.sub(replace, prompt))
+            if len(self._bound_cache) >= 16:
+                self._bound_cache.clear()
+            self._bound_cache[key] = template
+        return template
+
+    def get_format_user_prompt_static(self, static: Dict[str, str], **kwargs) -> str:
+        """
+        同get_format_user_prompt，static中的参数只在首次或变化时代入
+        模板中静态部分放在前面时，多轮之间prompt前缀逐字节一致，便于服务端复用prompt缓存
+        """
+
+        return self.bind_static(self.user, **static).substitute(**kwargs)
+
 
 
 
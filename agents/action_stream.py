@@ -0,0 +1,80 @@
+from typing import List, Optional
+
+
+class ActionStreamParser:
+    """
+    增量JSON扫描器：模型边输出边喂入，"action"对象或"actions"列表中的某个对象一闭合就立即产出
+    只跟踪括号深度与字符串状态，不做完整解析；闭合的片段交给json_repair解析
+    """
+
+    ACTION_KEYS = ("action", "actions")
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []#"{" / "["
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None#当前顶层对象中正在取值的key
+        self._start: Optional[int] = None#正在收集的action对象起点
+        self._start_depth = 0
+
+    def feed(self, chunk: str) -> List[dict]:
+        """喂入新片段，返回本次新闭合的action"""
+        self._text += chunk
+        text = self._text
+        actions: List[dict] = []
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:pos]
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos + 1
+            elif char == ":" and len(self._stack) == 1:
+                self._key = self._last_string
+            elif char == "," and len(self._stack) == 1:
+                self._key = None
+            elif char in "{[":
+                if char == "{" and self._start is None and self._is_action_slot():
+                    self._start, self._start_depth = pos, len(self._stack)
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._key = None
+                if self._start is not None and len(self._stack) == self._start_depth:
+                    action = self._load(text[self._start:pos + 1])
+                    self._start = None
+                    if action is not None:
+                        actions.append(action)
+        self._pos = len(text)
+        return actions
+
+    def _is_action_slot(self) -> bool:
+        """当前位置是否为 {"action": {...}} 或 {"actions": [{...}]} 中的action对象"""
+        if self._key not in self.ACTION_KEYS:
+            return False
+        if len(self._stack) == 1:
+            return True
+        return len(self._stack) == 2 and self._stack[1] == "["
+
+    @staticmethod
+    def _load(fragment: str) -> Optional[dict]:
+        import json_repair#首次解析时才导入，加快启动
+
+        try:
+            value = json_repair.loads(fragment)
+        except Exception:
+            return None
+        return value if isinstance(value, dict) else None
@@ -1,10 +1,18 @@
+import asyncio
+import json
+from agents.action_stream import ActionStreamParser
+from agents.history import HistoryManager
 from agents.prompts.react import ReactPrompt
-from tools.local_seach_tools import count_files, find_files
+from tools.local_seach_tools import count_files, find_files, grep_files, search_content
 from tools.tools import NAME, tool,fire_skill,ice_skill
+from tools.tool_cache import ToolResultCache
 from config.config import RichLogger
+from config.tracing import annotate, span
 from agents.Agent import Agent
-from typing import List, Dict, Callable,  Any
-import json_repair
+from agents.run_state import RunState
+from agents.token_counter import estimate_tokens
+from concurrent.futures import Executor
+from typing import List, Dict, Callable,  Any, Optional, Tuple
 from py_model import  Message
 
 
@@ -16,9 +24,14 @@ class ReactAgent(Agent):
 
         super().__init__(agent_name="react",prompts_template=ReactPrompt(),model=model)
         self.max_iteration=5
-        self.current_iteration=0
+        self.max_seconds:Optional[float]=None
+        self.max_tokens:Optional[int]=None
+        self.streaming=True#流式生成，action在输出中闭合后立即开始执行工具
         self.tools:Dict[NAME,tool]={}
-        self.history:List[Message]=[]
+        self.history_manager=HistoryManager()#控制prompt中历史的token预算
+        self._tool_catalog:Optional[str]=None#工具说明只在set_tool后重新生成
+        self.tool_cache=ToolResultCache()#同一agent的多次运行共享，stats()查看命中率
+        self.last_state:Optional[RunState]=None#最近一次运行的状态，仅供查看
 
 
         """其他引入"""
@@ -29,104 +42,273 @@ class ReactAgent(Agent):
         ).get_logger()
 
 
-    async def think(self,query):
-        self.current_iteration+=1
-        self.custom_logger.info(f"\n****************\niteration{self.current_iteration}\n********************")
-        if self.current_iteration == self.max_iteration:
-            self.set_history(step="think中到达最大次数",role="system",content="到达最大次数停止运行")
-            return
-
-        query_template=self.prompts_template.get_format_user_prompt(**{"query":query,"history":self.get_history(),"tools":str([ tool.get_tool_info() for tool in self.tools.values()])})
-        self.custom_logger.info(f"\n\n******当前prompt模板*******\n\n{query_template}\n\n")
-        response=await self.response_without_memory(query_template)
-        self.set_history(step="think中根据用户响应生成的response",role="assistant",content=response)
-        await self.decide(response,query)
+    def _begin_think(self,state:RunState)->str:
+        state.iteration+=1
+        self.custom_logger.info("\n****************\niteration%s\n********************",state.iteration)
+
+        query_template=self.prompts_template.get_format_user_prompt_static({"tools":self.tool_catalog()},query=state.query,history=self.get_history(state))
+        state.step_starts.append(len(state.history))
+        self.custom_logger.info("\n\n******当前prompt模板*******\n\n%s\n\n",query_template)
+        return query_template
+
+    def tool_catalog(self)->str:
+        if self._tool_catalog is None:
+            self._tool_catalog="["+",".join(tool.get_tool_info() for tool in self.tools.values())+"]"#JSON schema列表
+        return self._tool_catalog
+
+    def _end_think(self,state:RunState,query_template:str,response:str):
+        prompt_tokens=estimate_tokens(query_template)+estimate_tokens(self.prompts_template.get_format_system_prompt())
+        completion_tokens=estimate_tokens(response)
+        state.prompt_tokens+=prompt_tokens
+        state.step_prompt_tokens.append(prompt_tokens)
+        self.custom_logger.debug("iteration%s prompt tokens:%s",state.iteration,prompt_tokens,extra={"fields":{"iteration":state.iteration,"prompt_tokens":prompt_tokens}})
+        state.completion_tokens+=completion_tokens
+        annotate(prompt_tokens=prompt_tokens,completion_tokens=completion_tokens)#记在当前的react.think span上
+        self.set_history(state,step="think中根据用户响应生成的response",role="assistant",content=response)
+
+    async def think(self,state:RunState)->str:
+        """调用一次模型，返回原始response"""
+        with span("react.think",iteration=state.iteration+1,streaming=False):
+            query_template=self._begin_think(state)
+            response=await self.response_without_memory(query_template)
+            self._end_think(state,query_template,response)
         return response
 
-    async def decide(self,response:str,query:str):
+    async def think_stream(self,state:RunState,on_action:Callable[[dict],None])->str:
+        """
+        流式调用一次模型，每当输出中的action对象闭合就回调on_action，返回完整response
+        @param on_action: 接收提前解析出的action（与decide同样小写处理）
         """
+        with span("react.think",iteration=state.iteration+1,streaming=True):
+            query_template=self._begin_think(state)
+            parser=ActionStreamParser()
+            chunks=[]
+            async for chunk in self.stream_without_memory(query_template):
+                chunks.append(chunk)
+                for action in parser.feed(chunk.lower()):
+                    on_action(action)#提前启动的工具span以react.think为父span
+            response="".join(chunks)
+            self._end_think(state,query_template,response)
+        return response
 
-        @param response: 用于下一步解析
-        @param query: 传入query后续用于重新思考
-        @return:
+    def decide(self,state:RunState,response:str)->List[dict]:
         """
+        解析response
+        @param state: 本次运行状态，得到最终答案时写入state.answer
+        @param response: 模型输出
+        @return: 需要执行的action列表，为空表示已回答或需要重新思考
+        """
+        with span("react.decide",iteration=state.iteration) as current:
+            actions=self._decide(state,response)
+            current.set(actions=len(actions),answered=state.answer is not None)
+        return actions
+
+    def _decide(self,state:RunState,response:str)->List[dict]:
+        import json_repair#首次解析时才导入，加快启动
+
         try:
             parsed_response = json_repair.loads(response.lower())#输出函数名全小写
-            if type(parsed_response) is list:
-                parsed_response=parsed_response[1]
-
-            if parsed_response.get("action"):
-                action=parsed_response["action"]
-                try:
-                    tool_name = action["name"].upper()
-                    if NAME[tool_name]:  # 不存在会报错
-                        self.set_history(step="decide中从enum调用可用工具",role="assistant", content=f"使用tool为:{NAME[tool_name]}")
-                        await self.act(NAME[tool_name],query,action["input"])
-                    else:
-                        self.set_history(step="decide中发现功能不存在",role="assistant", content="功能不存在")
-                        await self.think(query)
-                except KeyError:
-                    self.set_history(step="decide中发现功能不存在",role="assistant", content=f"⚠️ 警告：'{tool_name}' tool不存在，存入记忆重新思考")
-                    await self.think(query)
-            elif parsed_response.get("answer"):
-                self.set_history(step="decide回答最后问题",role="assistant", content=parsed_response.get("answer"))
+            actions=self.parse_actions(parsed_response)
+            if actions:
+                self.set_history(state,step="decide中从enum调用可用工具",role="assistant",
+                                 content="使用tool为:"+", ".join(str(action.get("name")) for action in actions))
+                return actions
+
+            answer=self.parse_answer(parsed_response)
+            if answer:
+                state.answer=answer
+                self.set_history(state,step="decide回答最后问题",role="assistant", content=answer)
+            else:
+                self.set_history(state,step="decide中格式错误",role="assistant", content="未找到action或answer,请按JSON格式重新回答")
 
         except Exception as e:#额外报错，随着优化更新
-            self.set_history(step="decide中额外报错",role="assistant", content="报错了,请重新尝试:"+str(e))
-            await self.think(query)
+            self.set_history(state,step="decide中额外报错",role="assistant", content="报错了,请重新尝试:"+str(e))
+        return []
 
-    async def act(self,name:NAME,query:str,input:dict):
+    async def act_batch(self,state:RunState,actions:List[dict],started:Optional[Dict[str,List["asyncio.Future"]]]=None):
+        """
+        同一步的多个action并发执行，按action顺序记录observation
+        @param started: 流式阶段已提前启动的action（key见action_key），匹配上的直接等待其结果
+        """
+        with span("react.act_batch",iteration=state.iteration,actions=len(actions)):
+            pending=[]
+            for action in actions:
+                early=started.get(self.action_key(action)) if started else None
+                pending.append(early.pop(0) if early else self.act_action(action,state.query))
+            observations=await asyncio.gather(*pending)
+        state.tool_calls+=len(actions)
+        for step,role,content in observations:#按action顺序记录，保证历史顺序稳定
+            self.set_history(state,step=step,role=role,content=content)
+
+    @staticmethod
+    def action_key(action:dict)->str:
+        return json.dumps(action,ensure_ascii=False,sort_keys=True,default=str)
+
+    @staticmethod
+    def parse_actions(parsed_response)->List[dict]:
+        """
+        取出本步全部action，兼容：
+        - {"action": {...}}
+        - {"action": [{...}, ...]} 或 {"actions": [{...}, ...]}
+        - 模型输出了多个JSON对象（json_repair解析为list）
+        """
+        blocks=parsed_response if isinstance(parsed_response,list) else [parsed_response]
+        actions=[]
+        for block in blocks:
+            if not isinstance(block,dict):
+                continue
+            for key in ("action","actions"):
+                value=block.get(key)
+                if isinstance(value,dict):
+                    actions.append(value)
+                elif isinstance(value,list):
+                    actions.extend(action for action in value if isinstance(action,dict))
+        return actions
+
+    @staticmethod
+    def parse_answer(parsed_response)->Optional[str]:
+        blocks=parsed_response if isinstance(parsed_response,list) else [parsed_response]
+        for block in blocks:
+            if isinstance(block,dict) and block.get("answer"):
+                return block["answer"]
+        return None
+
+    async def act_action(self,action:dict,query:str)->Tuple[str,str,str]:
+        """
+        解析单个action并执行
+        @return: (step, role, content) 供act_batch按顺序写入历史
+        """
+        tool_name=str(action.get("name","")).upper()
+        if tool_name not in NAME.__members__:
+            return "decide中发现功能不存在","assistant",f"⚠️ 警告：'{tool_name}' tool不存在，存入记忆重新思考"
+        tool_input=action.get("input") or {}
+        if not isinstance(tool_input,dict):
+            return "decide中参数格式错误","assistant",f"⚠️ 警告：'{tool_name}' 的input必须是参数字典，实际为:{tool_input}"
+        return await self.act(NAME[tool_name],query,tool_input)
+
+    async def act(self,name:NAME,query:str,input:dict)->Tuple[str,str,str]:
         """
 
         @param name: 工具名
         @param query: 用户query
         @param input: 函数调用参数
-        @return:
+        @return: (step, role, content)，由act_batch统一写入历史
         """
         exist_tool=self.tools.get(name)
         if exist_tool:
-            observation=exist_tool.tool_use(**input)
-            self.set_history(step="act中工具结果",role="tool_result", content=f" from:{exist_tool.name} result:{observation}")
-            await self.think(query)
+            with span("react.act",tool=str(name)) as current:
+                input,errors=exist_tool.validate(input)
+                if errors:#不执行，直接把错误反馈给模型
+                    current.set(invalid_args=len(errors))
+                    return "act中参数校验失败","assistant",f"⚠️ 警告：'{exist_tool.name}' 的参数有误：{'；'.join(errors)}，请按工具schema重新调用"
+                observation=await exist_tool.atool_use(**input)#工具在执行器中运行，不阻塞事件循环
+                return "act中工具结果","tool_result",f" from:{exist_tool.name} input:{input} result:{observation}"
         else:
-            self.set_history(step="act中工具不存在",role="assistant", content=f"{name.name.lower()}不存在！")
-            await self.think(query)
+            return "act中工具不存在","assistant",f"{name.name.lower()}不存在！"
 
-    async def execute(self,query:str):
+    async def execute(self,query:str,max_steps:Optional[int]=None,max_seconds:Optional[float]=None,
+                      max_tokens:Optional[int]=None,state:Optional[RunState]=None):
         """
-        执行工作流
+        执行工作流：think -> decide -> act 的循环，直到得到答案或预算耗尽
+        每次调用都有独立的RunState，同一agent上可以并发execute
         @param query:
+        @param max_steps: 最多调用模型次数，默认self.max_iteration
+        @param max_seconds: 时间预算，默认self.max_seconds
+        @param max_tokens: token预算（估算），默认self.max_tokens
+        @param state: 外部传入的运行状态（用于读取统计），默认新建
         @return:
         """
+        if state is None:
+            state=RunState(query,
+                           max_steps=self.max_iteration if max_steps is None else max_steps,
+                           max_seconds=self.max_seconds if max_seconds is None else max_seconds,
+                           max_tokens=self.max_tokens if max_tokens is None else max_tokens)
+        self.last_state=state
+        with span("react.execute",agent=self._agent_name) as current:
+            final_answer=await self._execute(state)
+            current.set(**state.summary())
+        return final_answer
 
-        await self.think(query)
-        final_answer="\n\n*********final answer*********:"+self.history[-1].content
-        self.custom_logger.info(final_answer)
+    async def _execute(self,state:RunState)->str:
+        try:
+            while state.answer is None:
+                stop_reason=state.exhausted()
+                if stop_reason:
+                    state.stop_reason=stop_reason
+                    self.set_history(state,step=f"到达{stop_reason}",role="system",content=f"到达{stop_reason}停止运行")
+                    break
+                if self.streaming:
+                    await self.step_stream(state)
+                    continue
+                response=await asyncio.wait_for(self.think(state),state.remaining_seconds())
+                actions=self.decide(state,response)
+                if actions:
+                    await asyncio.wait_for(self.act_batch(state,actions),state.remaining_seconds())
+        except asyncio.TimeoutError:
+            state.stop_reason="最大时间"
+            self.set_history(state,step="到达最大时间",role="system",content="到达最大时间停止运行")
+
+        if state.answer is not None:
+            state.stop_reason="answer"
+        final_answer="\n\n*********final answer*********:"+state.history[-1].content
+        self.custom_logger.info("%s",final_answer,extra={"fields":state.summary()})
         return final_answer
 
+    async def step_stream(self,state:RunState):
+        """
+        流式的一步：action在输出中闭合即开始执行，与模型剩余输出重叠
+        输出结束后仍由decide解析完整response决定最终执行哪些action，未被采用的提前任务会被取消
+        """
+        started:Dict[str,List[asyncio.Future]]={}
+
+        def start(action:dict):
+            future=asyncio.ensure_future(self.act_action(action,state.query))
+            started.setdefault(self.action_key(action),[]).append(future)
+
+        try:
+            response=await asyncio.wait_for(self.think_stream(state,start),state.remaining_seconds())
+            actions=self.decide(state,response)
+            if actions:
+                await asyncio.wait_for(self.act_batch(state,actions,started),state.remaining_seconds())
+        finally:
+            for futures in started.values():
+                for future in futures:
+                    future.cancel()
+
 
 #本质是有记忆的 但不是list based的 用的是quey的
 
 
-    def set_history(self, role: str, content: str,step=""):
+    def set_history(self, state:RunState, role: str, content: str,step=""):
         """
 
         保存重要历史
+        @param state: 本次运行状态
         @param step: 用于日志判断而已
         @param role:
         @param content:
         @return:
         """
-        self.custom_logger.info(f"\n\n---------------------------{step}---------------------\n\n{role}:::\n{content}\n\n------------------------------------------------")
-        self.history.append(Message(role=role, content=content))
+        self.custom_logger.info("\n\n---------------------------%s---------------------\n\n%s:::\n%s\n\n------------------------------------------------",
+                                step,role,content,extra={"fields":{"step":step,"role":role}})#参数在后台线程才格式化
+        state.history.append(Message(role=role, content=content))
 
-    def get_history(self):
-       """加载重要历史"""
-       return "\n".join([f"{message.role}: {message.content}" for message in self.history])
+    def get_history(self,state:RunState):
+       """加载重要历史，按history_manager的预算压缩较早步骤与大observation"""
+       return self.history_manager.render(state.history,state.step_starts)
 
 
-    def set_tool(self,name:NAME,func:Callable[...,Any]):
-        self.tools[name]=tool(name,func)
+    def set_tool(self,name:NAME,func:Callable[...,Any],timeout:Optional[float]=None,executor:Optional[Executor]=None,
+                 cacheable:bool=True):
+        """
+        @param name: 工具名
+        @param func: 同步函数或 async def 函数
+        @param timeout: 单次调用超时秒数
+        @param executor: 同步工具使用的执行器，None使用全局默认（见 tools.tools.set_tool_executor）
+        @param cacheable: 是否使用self.tool_cache缓存结果，有副作用或读取文件内容的工具应设为False
+        """
+        self.tools[name]=tool(name,func,timeout=timeout,executor=executor,cache=self.tool_cache if cacheable else None)
+        self._tool_catalog=None
 
     def use_tool(self):
         pass
@@ -134,10 +316,18 @@ class ReactAgent(Agent):
 
 
 
-async def main_react():
-    new_agent=ReactAgent()
+def default_react_agent(model="deepseek/deepseek-chat")->ReactAgent:
+    """注册了全部文件工具的ReactAgent"""
+    new_agent=ReactAgent(model=model)
     new_agent.set_tool(NAME.COUNT_FILES, count_files)
     new_agent.set_tool(NAME.FIND_FILES, find_files)
+    new_agent.set_tool(NAME.SEARCH_CONTENT, search_content, cacheable=False)#结果取决于文件内容，目录mtime无法发现改动
+    new_agent.set_tool(NAME.GREP_FILES, grep_files, cacheable=False)
+    return new_agent
+
+
+async def main_react():
+    new_agent=default_react_agent()
     run=await new_agent.execute("上一级文件夹下py")
     print(run)
 
@@ -145,6 +335,5 @@ async def main_react():
 
 if __name__=="__main__":
 
-    import asyncio
     asyncio.run(main_react())
 
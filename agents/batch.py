@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from agents.agents.react import ReactAgent, default_react_agent
+from agents.run_state import RunState
+
+
+def read_queries(input_path: str, query_field: str = "query",
+                 id_field: str = "id") -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    逐行读取JSONL，产出 (id, query, error)
+    每行可以是对象（query_field取问题，id_field取编号，缺省时用行号）或直接是JSON字符串
+    无法解析或缺少query的行不抛异常，产出 query=None 与错误说明，由调用方写成出错记录
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            line_id = f"line:{line_no}"
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_id, None, f"JSONDecodeError: {e}"
+                continue
+            if isinstance(record, str):
+                yield line_id, record, None
+                continue
+            if not isinstance(record, dict):
+                yield line_id, None, f"ValueError: 第{line_no}行应为对象或字符串，实际为{type(record).__name__}"
+                continue
+            record_id = record.get(id_field)
+            record_id = str(record_id) if record_id is not None else line_id
+            query = record.get(query_field)
+            if not isinstance(query, str) or not query.strip():
+                yield record_id, None, f"ValueError: 第{line_no}行缺少字段 {query_field}"
+                continue
+            yield record_id, query, None
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """已成功完成的id（出错的记录会在续跑时重试），末尾写了一半的行直接忽略"""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and record.get("error") is None and "id" in record:
+                done.add(str(record["id"]))
+    return done
+
+
+class BatchRunner:
+    """
+    批量运行JSONL中的query
+    - 有界并发：固定数量的worker从输入流中取题，不一次性创建全部任务
+    - 每完成一条立即追加写入输出JSONL，崩溃后重新运行会跳过已成功的id
+    - 每条记录包含延迟、迭代次数、工具调用次数与token估算
+    """
+
+    def __init__(self, agent: Optional[ReactAgent] = None, concurrency: int = 8,
+                 max_steps: Optional[int] = None, max_seconds: Optional[float] = None,
+                 max_tokens: Optional[int] = None):
+        """
+        Args:
+            agent: 共享的agent，默认注册全部文件工具
+            concurrency: 同时运行的query数
+            max_steps/max_seconds/max_tokens: 每条query的预算，None使用agent默认值
+        """
+        self.agent = agent or default_react_agent()
+        self.concurrency = concurrency
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+
+    async def run_one(self, query_id: str, query: str) -> Dict[str, Any]:
+        state = RunState(query,
+                         max_steps=self.max_steps if self.max_steps is not None else self.agent.max_iteration,
+                         max_seconds=self.max_seconds if self.max_seconds is not None else self.agent.max_seconds,
+                         max_tokens=self.max_tokens if self.max_tokens is not None else self.agent.max_tokens)
+        started = time.monotonic()
+        error = None
+        try:
+            await self.agent.execute(query, state=state)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {
+            "id": query_id,
+            "query": query,
+            "answer": state.answer,
+            "stop_reason": state.stop_reason,
+            "error": error,
+            "latency": round(time.monotonic() - started, 3),
+            "iterations": state.iteration,
+            "tool_calls": state.tool_calls,
+            "prompt_tokens": state.prompt_tokens,
+            "completion_tokens": state.completion_tokens,
+        }
+
+    async def run(self, input_path: str, output_path: str, query_field: str = "query", id_field: str = "id",
+                  resume: bool = True) -> Dict[str, Any]:
+        """
+        @param resume: True时跳过输出文件中已成功的id并追加写入；False时覆盖输出文件
+        @return: 汇总统计
+        """
+        done = completed_ids(output_path) if resume else set()
+        latencies = []
+        counts = {"completed": 0, "errors": 0, "answered": 0, "skipped": 0}
+
+        def pending():
+            for query_id, query, error in read_queries(input_path, query_field, id_field):
+                if query_id in done:
+                    counts["skipped"] += 1#只统计本次输入中实际跳过的id
+                    continue
+                yield query_id, query, error
+
+        queue = pending()
+        started = time.monotonic()
+
+        mode = "a" if resume else "w"
+        with open(output_path, mode, encoding="utf-8") as out:
+            if resume and out.tell() > 0:
+                with open(output_path, "rb") as check:#崩溃时最后一行可能没写完，先补换行
+                    check.seek(-1, os.SEEK_END)
+                    if check.read(1) != b"\n":
+                        out.write("\n")
+
+            async def worker():
+                for query_id, query, error in queue:#生成器在单线程事件循环中共享，每个worker依次取下一条
+                    if error is not None:
+                        record = {"id": query_id, "query": query, "answer": None, "stop_reason": None,
+                                  "error": error, "latency": 0.0, "iterations": 0, "tool_calls": 0,
+                                  "prompt_tokens": 0, "completion_tokens": 0}
+                    else:
+                        record = await self.run_one(query_id, query)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    counts["completed"] += 1
+                    counts["errors"] += record["error"] is not None
+                    counts["answered"] += record["stop_reason"] == "answer"
+                    latencies.append(record["latency"])
+
+            workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:#某个worker失败或run被取消时，先取消并等待其余worker，再关闭输出文件
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        latencies.sort()
+        elapsed = time.monotonic() - started
+        return {
+            **counts,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(counts["completed"] / elapsed, 3) if elapsed else 0.0,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="批量运行JSONL中的query")
+    parser.add_argument("input", help="输入JSONL，每行一个query")
+    parser.add_argument("output", help="输出JSONL，每完成一条追加一行")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--query-field", default="query")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--no-resume", action="store_true", help="覆盖输出文件，从头运行")
+    args = parser.parse_args()
+
+    runner = BatchRunner(concurrency=args.concurrency, max_steps=args.max_steps, max_seconds=args.max_seconds)
+    summary = await runner.run(args.input, args.output, args.query_field, args.id_field, resume=not args.no_resume)
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+import ast
+from typing import Any, List, Optional, Sequence
+
+from agents.token_counter import estimate_tokens, truncate_to_tokens
+from py_model import Message
+
+
+OBSERVATION_ROLE = "tool_result"
+
+
+def summarize_value(value: Any, top_n: int = 10, depth: int = 0) -> Any:
+    """
+    保留结构化要点：数值/布尔/短字符串原样保留，列表只留前top_n项并标注总数，嵌套三层以内
+    """
+    if isinstance(value, dict):
+        if depth >= 3:
+            return f"{{...{len(value)}个字段}}"
+        return {key: summarize_value(item, top_n, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if depth >= 3:
+            return f"[...{len(value)}项]"
+        items = [summarize_value(item, top_n, depth + 1) for item in value[:top_n]]
+        if len(value) > top_n:
+            items.append(f"...共{len(value)}项")
+        return items
+    if isinstance(value, str) and len(value) > 200:
+        return value[:200] + "…"
+    return value
+
+
+def compact_observation(content: str, max_tokens: int, top_n: int = 10) -> str:
+    """
+    压缩工具observation（格式为 " from:{tool} input:{input} result:{result}"）
+    result能解析为dict/list时只保留要点，否则直接截断
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return content
+    head, sep, result = content.partition(" result:")
+    if sep:
+        try:
+            parsed = ast.literal_eval(result.strip())
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            parsed = None
+        if isinstance(parsed, (dict, list, tuple)):
+            content = f"{head}{sep}{summarize_value(parsed, top_n)}"
+    return truncate_to_tokens(content, max_tokens)
+
+
+class HistoryManager:
+    """
+    把RunState.history渲染成prompt中的历史，控制每轮prompt的增长
+    - 最近keep_recent步原样保留，单条observation超过observation_tokens时压缩
+    - 更早的步骤：observation只保留计数与前top_n项等要点，模型原始输出截断
+    - 仍超过max_tokens时从最早的记录开始省略
+    """
+
+    def __init__(
+            self,
+            max_tokens: Optional[int] = 3000,
+            observation_tokens: int = 800,
+            old_observation_tokens: int = 200,
+            old_message_tokens: int = 80,
+            keep_recent: int = 1,
+            top_n: int = 10,
+    ):
+        """
+        Args:
+            max_tokens: 渲染后历史的token预算，None不限制
+            observation_tokens: 最近步骤中单条observation的上限
+            old_observation_tokens: 更早步骤中单条observation的上限
+            old_message_tokens: 更早步骤中其他消息（模型输出等）的上限
+            keep_recent: 视为"最近"的步骤数
+            top_n: 压缩列表时保留的项数
+        """
+        self.max_tokens = max_tokens
+        self.observation_tokens = observation_tokens
+        self.old_observation_tokens = old_observation_tokens
+        self.old_message_tokens = old_message_tokens
+        self.keep_recent = keep_recent
+        self.top_n = top_n
+
+    def compact(self, history: Sequence[Message], step_starts: Sequence[int] = ()) -> List[str]:
+        """
+        @param history: 完整历史
+        @param step_starts: 每一步开始时history的长度，用于区分最近步骤与更早步骤
+        @return: 渲染后的逐行历史
+        """
+        recent_from = step_starts[-self.keep_recent] if self.keep_recent and len(step_starts) >= self.keep_recent else 0
+        lines = []
+        for index, message in enumerate(history):
+            recent = index >= recent_from
+            if message.role == OBSERVATION_ROLE:
+                limit = self.observation_tokens if recent else self.old_observation_tokens
+                content = compact_observation(message.content, limit, self.top_n)
+            elif recent:
+                content = message.content
+            else:
+                content = truncate_to_tokens(message.content, self.old_message_tokens)
+            lines.append(f"{message.role}: {content}")
+        return lines
+
+    def render(self, history: Sequence[Message], step_starts: Sequence[int] = ()) -> str:
+        lines = self.compact(history, step_starts)
+        if self.max_tokens is not None:
+            costs = [estimate_tokens(line) + 1 for line in lines]
+            total = sum(costs)
+            dropped = 0
+            while total > self.max_tokens and dropped < len(lines) - 1:#至少保留最新一条
+                total -= costs[dropped]
+                dropped += 1
+            if dropped:
+                lines = [f"system: (省略了{dropped}条较早的记录)"] + lines[dropped:]
+        return "\n".join(lines)
@@ -0,0 +1,74 @@
+import time
+from typing import List, Optional
+
+from py_model import Message
+
+
+class RunState:
+    """
+    单次execute的运行状态
+    每次execute创建一个，history与迭代计数都挂在这里，同一个agent上的并发execute互不影响
+    """
+
+    def __init__(
+            self,
+            query: str,
+            max_steps: int = 5,
+            max_seconds: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+    ):
+        """
+        Args:
+            query: 用户query
+            max_steps: 最多调用模型的次数
+            max_seconds: 整个运行的时间上限
+            max_tokens: prompt+completion的token上限（估算值）
+        """
+        self.query = query
+        self.history: List[Message] = []
+        self.step_starts: List[int] = []#每一步开始时history的长度
+        self.step_prompt_tokens: List[int] = []#每一步prompt的token数（估算）
+        self.iteration = 0
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.started = time.monotonic()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tool_calls = 0
+        self.answer: Optional[str] = None
+        self.stop_reason: Optional[str] = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.max_seconds is None:
+            return None
+        return max(0.0, self.max_seconds - self.elapsed)
+
+    def exhausted(self) -> Optional[str]:
+        """返回已耗尽的预算名，未耗尽返回None"""
+        if self.iteration >= self.max_steps:
+            return "最大次数"
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return "最大时间"
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens:
+            return "最大token数"
+        return None
+
+    def summary(self) -> dict:
+        return {
+            "iterations": self.iteration,
+            "tool_calls": self.tool_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "step_prompt_tokens": list(self.step_prompt_tokens),
+            "elapsed": round(self.elapsed, 3),
+            "stop_reason": self.stop_reason,
+        }
@@ -0,0 +1,431 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from agents.agents.react import ReactAgent, default_react_agent
+from agents.run_state import RunState
+from tools.file_index import FileIndex, set_file_index
+from tools.tools import set_tool_executor
+
+
+class ServerBusy(Exception):
+    """准入控制拒绝请求（队列已满或会话并发超限）"""
+
+
+class InvalidBudget(ValueError):
+    """请求的预算不合法（与agent运行中抛出的ValueError区分，HTTP前端据此返回400）"""
+
+
+def _check_budget(budget: Dict[str, Any]):
+    """max_steps/max_tokens须为正整数，max_seconds须为正数；显式传入0也视为不合法而不是“不限制”"""
+    for key, value in budget.items():
+        if value is None:
+            continue
+        integral = key in ("max_steps", "max_tokens")
+        valid_type = isinstance(value, int) if integral else isinstance(value, (int, float))
+        if isinstance(value, bool) or not valid_type or value <= 0:
+            raise InvalidBudget(f"{key} 应为正{'整' if integral else ''}数，实际为 {value!r}")
+
+
+class Session:
+    """会话：排队中的请求与已完成的问答记录，会话之间互不可见"""
+
+    def __init__(self, session_id: str, max_records: int = 20):
+        self.session_id = session_id
+        self.created = time.time()
+        self.last_active = time.monotonic()
+        self.pending: Deque[Tuple[dict, asyncio.Future]] = deque()
+        self.running = 0
+        self.completed = 0
+        self.records: Deque[dict] = deque(maxlen=max_records)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.pending) + self.running
+
+
+class AgentServer:
+    """
+    多会话ReAct服务
+    - 所有会话共享同一个ReactAgent（模型客户端、工具执行器、工具缓存、文件索引），每个请求有独立的RunState
+    - 准入控制：全局排队上限与单会话并发上限，超出时直接拒绝而不是无限排队
+    - 公平调度：按会话轮转取请求，单个会话提交再多请求也不会饿死其他会话
+    """
+
+    def __init__(
+            self,
+            agent: Optional[ReactAgent] = None,
+            workers: int = 8,
+            max_queue: int = 64,
+            per_session_limit: int = 4,
+            session_ttl: float = 3600.0,
+            default_max_seconds: Optional[float] = 120.0,
+            tool_executor: Optional[Executor] = None,
+            file_index: Optional[FileIndex] = None,
+    ):
+        """
+        Args:
+            agent: 共享的agent，默认注册全部文件工具
+            workers: 同时运行的ReAct会话数
+            max_queue: 等待中的请求总数上限
+            per_session_limit: 单个会话排队+运行中的请求上限
+            session_ttl: 会话空闲多少秒后回收
+            default_max_seconds: 请求未指定时间预算时使用的上限
+            tool_executor: 同步工具使用的执行器，默认按workers大小新建线程池
+            file_index: 共享的文件元数据索引
+        """
+        self.agent = agent or default_react_agent()
+        self.workers = workers
+        self.max_queue = max_queue
+        self.per_session_limit = per_session_limit
+        self.session_ttl = session_ttl
+        self.default_max_seconds = default_max_seconds
+        self.tool_executor = tool_executor or ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="tool")
+        self.file_index = file_index
+        self.sessions: Dict[str, Session] = {}
+        self._ready: Deque[str] = deque()#有待处理请求的会话，按轮转顺序
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies: Deque[float] = deque(maxlen=1000)
+        self.started: Optional[float] = None
+
+    async def start(self) -> "AgentServer":
+        set_tool_executor(self.tool_executor)
+        if self.file_index is not None:
+            set_file_index(self.file_index)
+        self._wakeup = asyncio.Condition()
+        self.started = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for session in self.sessions.values():
+            for _, future in session.pending:
+                if not future.done():
+                    future.cancel()
+            session.pending.clear()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def submit(self, query: str, session_id: Optional[str] = None, **budget) -> dict:
+        """
+        提交一个请求并等待结果
+        @param budget: max_steps / max_seconds / max_tokens，须为正数
+        @raise ServerBusy: 准入控制拒绝
+        @raise InvalidBudget: 预算不合法
+        """
+        _check_budget(budget)
+        session_id = session_id or uuid.uuid4().hex
+        session = self.sessions.get(session_id)
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ServerBusy(f"队列已满（{self.max_queue}）")
+        if session is not None and session.in_flight >= self.per_session_limit:
+            self.rejected += 1
+            raise ServerBusy(f"会话 {session_id} 并发请求超过上限（{self.per_session_limit}）")
+        if session is None:#通过准入后才建会话，被拒绝的请求不留下空会话
+            session = self.sessions[session_id] = Session(session_id)
+
+        future = asyncio.get_running_loop().create_future()
+        session.pending.append(({"query": query, "submitted": time.monotonic(), **budget}, future))
+        session.last_active = time.monotonic()
+        self.queued += 1
+        async with self._wakeup:
+            if session_id not in self._ready:#有待处理请求的会话才在轮转队列中
+                self._ready.append(session_id)
+            self._wakeup.notify()
+        result = await future
+        result["session"] = session_id
+        return result
+
+    async def _next_job(self) -> Tuple[Session, dict, asyncio.Future]:
+        async with self._wakeup:
+            while not self._ready:
+                await self._wakeup.wait()
+            session = self.sessions[self._ready.popleft()]
+            job, future = session.pending.popleft()
+            if session.pending:#还有请求的会话排到队尾，轮转公平
+                self._ready.append(session.session_id)
+            return session, job, future
+
+    async def _worker(self):
+        while True:
+            session, job, future = await self._next_job()
+            self.queued -= 1
+            if future.done():#调用方已放弃
+                continue
+            session.running += 1
+            self.running += 1
+            try:
+                result = await self._run(session, job)
+                if not future.done():
+                    future.set_result(result)
+                self.completed += 1
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                session.running -= 1
+                self.running -= 1
+                session.last_active = time.monotonic()
+
+    async def _run(self, session: Session, job: dict) -> dict:
+        max_seconds = job.get("max_seconds", self.default_max_seconds)
+        state = RunState(job["query"],
+                         max_steps=self.agent.max_iteration if job.get("max_steps") is None else job["max_steps"],
+                         max_seconds=max_seconds,
+                         max_tokens=job.get("max_tokens"))
+        await self.agent.execute(job["query"], state=state)
+        latency = time.monotonic() - job["submitted"]
+        self.latencies.append(latency)
+        session.completed += 1
+        record = {
+            "query": job["query"],
+            "answer": state.answer if state.answer is not None else state.history[-1].content if state.history else None,
+            "stop_reason": state.stop_reason,
+            "summary": state.summary(),
+            "queue_seconds": round(latency - state.elapsed, 3),
+        }
+        session.records.append(record)
+        return dict(record)
+
+    async def _reaper(self):
+        """定期回收空闲会话"""
+        while True:
+            await asyncio.sleep(min(60.0, self.session_ttl))
+            now = time.monotonic()
+            for session_id in [sid for sid, s in self.sessions.items()
+                               if s.in_flight == 0 and now - s.last_active > self.session_ttl]:
+                del self.sessions[session_id]
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        uptime = time.monotonic() - self.started if self.started else 0.0
+        return {
+            "sessions": len(self.sessions),
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "throughput": round(self.completed / uptime, 3) if uptime else 0.0,
+            "tool_cache": self.agent.tool_cache.stats(),
+        }
+
+    # ---------------- HTTP / 本地socket 前端 ----------------
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None):
+        """
+        启动HTTP服务（unix_path不为空时监听本地socket）
+        POST /query      {"query": ..., "session": 可选, "max_steps"/"max_seconds"/"max_tokens": 可选}
+        GET  /sessions/{id}   会话的问答记录
+        GET  /stats      运行统计
+        GET  /health
+        """
+        if self._wakeup is None:
+            await self.start()
+        if unix_path:
+            self._server = await asyncio.start_unix_server(self._handle, unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:#请求体边界未知，无法继续读同一连接
+                    await self._respond(writer, "400 Bad Request", {"error": "Content-Length不合法"}, keep_alive=False)
+                    break
+                raw = await reader.readexactly(length) if length else b""
+                parts = request_line.decode("latin-1").split()
+                method, target = (parts[0], parts[1]) if len(parts) >= 2 else ("", "")
+                status, payload = await self._route(method, target, raw)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: str, payload: Any, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _route(self, method: str, target: str, raw: bytes) -> Tuple[str, Any]:
+        if method == "GET" and target == "/health":
+            return "200 OK", {"status": "ok"}
+        if method == "GET" and target == "/stats":
+            return "200 OK", self.stats()
+        if method == "GET" and target.startswith("/sessions/"):
+            session = self.sessions.get(target[len("/sessions/"):])
+            if session is None:
+                return "404 Not Found", {"error": "会话不存在"}
+            return "200 OK", {"session": session.session_id, "completed": session.completed,
+                              "in_flight": session.in_flight, "records": list(session.records)}
+        if method == "POST" and target == "/query":
+            try:
+                body = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                return "400 Bad Request", {"error": "请求体不是合法JSON"}
+            if not isinstance(body, dict) or not isinstance(body.get("query"), str) or not body["query"].strip():
+                return "400 Bad Request", {"error": "缺少query"}
+            budget = {key: body[key] for key in ("max_steps", "max_seconds", "max_tokens") if body.get(key) is not None}
+            try:
+                return "200 OK", await self.submit(body["query"], body.get("session"), **budget)
+            except InvalidBudget as e:
+                return "400 Bad Request", {"error": str(e)}
+            except ServerBusy as e:
+                return "429 Too Many Requests", {"error": str(e)}
+            except Exception as e:
+                return "500 Internal Server Error", {"error": str(e)}
+        return "404 Not Found", {"error": "not found"}
+
+
+async def benchmark(sessions: int = 20, queries_per_session: int = 5, workers: int = 8,
+                    llm_latency: float = 0.05, path: str = "."):
+    """
+    用本地假模型服务测吞吐：每个请求一次工具调用 + 一次回答
+    理想吞吐为 workers / (2 * llm_latency)；会话数多于workers时请求要排队，端到端延迟包含排队时间，
+    因此分别输出排队与运行耗时。openai在计时前导入（首次导入约1秒，不属于稳态吞吐）
+    """
+    from generative_model.fake_server import FakeChatServer
+    from generative_model.model import Generative_Model
+    from generative_model.client_pool import close_clients
+
+    def reply(body: dict) -> str:
+        prompt = body["messages"][-1]["content"]
+        if "from:count_files" in prompt:
+            return '{"thought": "have the count", "answer": "done"}'
+        return json.dumps({"thought": "count first", "action": {"name": "count_files", "input": {"path": path}}})
+
+    async with FakeChatServer(latency=llm_latency, reply=reply) as llm:
+        agent = default_react_agent()
+        agent.custom_logger.setLevel("WARNING")
+        agent.model = Generative_Model(agent.model.model, cache=None, api_key="fake", base_url=llm.base_url)
+        agent.model.client#预先导入openai并创建共享客户端
+        async with AgentServer(agent=agent, workers=workers, max_queue=sessions * queries_per_session,
+                               per_session_limit=queries_per_session) as server:
+            started = time.perf_counter()
+            results: List[dict] = []
+
+            async def one_session(index: int):
+                for _ in range(queries_per_session):
+                    results.append(await server.submit(f"count files #{index}", session_id=f"s{index}"))
+
+            await asyncio.gather(*(one_session(i) for i in range(sessions)))
+            elapsed = time.perf_counter() - started
+            stats = server.stats()
+            total = sessions * queries_per_session
+
+            def p50_p95(values: List[float]) -> str:
+                values = sorted(values)
+                return f"p50={values[len(values) // 2]:.3f}s p95={values[min(len(values) - 1, int(len(values) * 0.95))]:.3f}s"
+
+            ideal = f" (ideal {workers / (2 * llm_latency):.0f})" if llm_latency > 0 else ""
+            print(f"{total} requests / {sessions} sessions / {workers} workers: "
+                  f"{total / elapsed:.1f} req/s{ideal}, "
+                  f"latency p50={stats['latency_p50']}s p95={stats['latency_p95']}s, "
+                  f"queue {p50_p95([r['queue_seconds'] for r in results])}, "
+                  f"run {p50_p95([r['summary']['elapsed'] for r in results])}, "
+                  f"llm requests={llm.requests} connections={llm.connections}")
+        await close_clients()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="多会话本地文件搜索Agent服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="监听本地unix socket而不是TCP")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--index", default=None, help="文件元数据索引的数据库路径（':memory:' 仅在内存中），不指定则实时遍历")
+    parser.add_argument("--index-root", action="append", default=[],
+                        help="启动时建立（已索引则增量刷新）索引的目录，可重复指定")
+    parser.add_argument("--benchmark", action="store_true", help="使用本地假模型服务测吞吐")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        await benchmark(workers=args.workers)
+        return
+    file_index = None
+    if args.index is not None:
+        file_index = FileIndex(args.index)
+        for root in args.index_root:
+            if file_index.covers(root):
+                file_index.refresh(root)
+            else:
+                file_index.build(root)
+    elif args.index_root:
+        parser.error("--index-root 需要同时指定 --index")
+    server = AgentServer(workers=args.workers, max_queue=args.max_queue, file_index=file_index)
+    await server.serve(args.host, args.port, args.unix)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        if file_index is not None:
+            file_index.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+import re
+
+
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯＀-￯　-〿]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算token数，不依赖具体模型的分词器
+    中日韩字符及全角标点约1字1个token，其余字符约4个1个token
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "…(已截断)") -> str:
+    """截断到约max_tokens个token以内，末尾加上截断标记"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens - estimate_tokens(marker))
+    low, high = 0, len(text)
+    while low < high:#二分找最长的满足预算的前缀
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + marker
@@ -0,0 +1,139 @@
+"""
+ReactAgent.execute 端到端基准测试（本地假模型服务，无需网络）
+
+假模型按脚本确定性地回复：第1步 count_files，第2步 find_files，第3步给出答案
+模型延迟固定，因此 每步开销 = (墙钟时间 - 模型调用次数 × 延迟) / 步数，即agent自身（prompt渲染、解析、工具、日志）的耗时
+
+用法（在仓库根目录）:
+    python -m benchmarks.bench_agent /tmp/bench/balanced-10k --queries 50 --concurrency 8
+    python -m benchmarks.bench_agent /tmp/bench/balanced-10k --trace agent_trace.json  # 各阶段耗时，chrome://tracing 打开
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import compare, print_table, write_results
+from config.tracing import enable_tracing
+from benchmarks.tree_gen import generate_tree
+
+
+def scripted_reply(root: str):
+    """根据prompt中已有的observation数量决定下一步，保证每次运行的轨迹一致"""
+
+    def reply(body: Dict[str, Any]) -> str:
+        prompt = body["messages"][-1]["content"]
+        observations = prompt.count(" from:")
+        if observations == 0:
+            return json.dumps({"thought": "count first", "action": {
+                "name": "count_files", "input": {"path": root, "file_pattern": "*.py", "recursive": True}}})
+        if observations == 1:
+            return json.dumps({"thought": "list the largest", "action": {
+                "name": "find_files", "input": {"path": root, "file_pattern": "*.py", "recursive": True,
+                                                "limit": 10, "order_by": "largest"}}})
+        return json.dumps({"thought": "enough information", "answer": "done"})
+
+    return reply
+
+
+async def run_benchmark(root: str, queries: int = 20, concurrency: int = 4, llm_latency: float = 0.02,
+                        streaming: bool = True, tool_cache: bool = True, logging: bool = False) -> Dict[str, Any]:
+    from agents.agents.react import default_react_agent
+    from agents.run_state import RunState
+    from generative_model.client_pool import close_clients
+    from generative_model.fake_server import FakeChatServer
+    from generative_model.model import Generative_Model
+
+    async with FakeChatServer(latency=llm_latency, reply=scripted_reply(root)) as llm:
+        agent = default_react_agent()
+        if not logging:
+            agent.custom_logger.setLevel("WARNING")
+        agent.streaming = streaming
+        agent.model = Generative_Model(agent.model.model, cache=None, api_key="bench", base_url=llm.base_url)
+        if not tool_cache:
+            for registered in agent.tools.values():
+                registered.cache = None
+
+        gate = asyncio.Semaphore(concurrency)
+        states: List[RunState] = []
+        walls: List[float] = []
+
+        async def one(index: int):
+            async with gate:
+                state = RunState(f"benchmark query {index}", max_steps=agent.max_iteration)
+                started = time.perf_counter()
+                await agent.execute(state.query, state=state)
+                walls.append(time.perf_counter() - started)
+                states.append(state)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(queries)))
+        elapsed = time.perf_counter() - started
+        await close_clients()
+
+    steps = [state.iteration for state in states]
+    overheads = [(wall - state.iteration * llm_latency) / state.iteration
+                 for wall, state in zip(walls, states) if state.iteration]
+    answered = sum(state.stop_reason == "answer" for state in states)
+    return {
+        "case": f"agent_{'stream' if streaming else 'block'}_c{concurrency}{'' if tool_cache else '_nocache'}",
+        "queries": queries,
+        "answered": answered,
+        "wall_median": round(statistics.median(walls), 4),
+        "throughput": round(queries / elapsed, 2),
+        "steps_mean": round(statistics.mean(steps), 2),
+        "step_overhead_ms": round(statistics.median(overheads) * 1000, 2) if overheads else None,
+        "prompt_tokens_per_step": round(sum(s.prompt_tokens for s in states) / max(1, sum(steps)), 1),
+        "llm_requests": llm.requests,
+        "llm_connections": llm.connections,
+        "tool_cache": agent.tool_cache.stats()["hit_rate"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ReactAgent端到端基准测试")
+    parser.add_argument("root", help="合成目录树位置（不存在时生成）")
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--shape", choices=("wide", "deep", "balanced"), default="balanced")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,8", help="逗号分隔，逐个测试")
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    parser.add_argument("--logging", action="store_true", help="保留agent日志输出（默认关闭以免干扰计时）")
+    parser.add_argument("--trace", default=None, help="记录span并导出（.jsonl为JSONL，否则为Chrome trace格式）")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    generate_tree(args.root, args.files, args.shape)
+    tracer = enable_tracing() if args.trace else None
+    results = []
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        for streaming in (False, True):
+            results.append(asyncio.run(run_benchmark(args.root, args.queries, concurrency, args.llm_latency,
+                                                     streaming=streaming, logging=args.logging)))
+        results.append(asyncio.run(run_benchmark(args.root, args.queries, concurrency, args.llm_latency,
+                                                 tool_cache=False, logging=args.logging)))
+    print_table(results, ["case", "answered", "wall_median", "throughput", "steps_mean", "step_overhead_ms",
+                          "prompt_tokens_per_step", "llm_connections", "tool_cache"])
+    write_results(args.output, results)
+    if tracer is not None:
+        print_table([{"span": name, **values} for name, values in tracer.summary().items()],
+                    ["span", "count", "total_ms", "mean_ms", "max_ms"])
+        if args.trace.endswith(".jsonl"):
+            tracer.export_jsonl(args.trace)
+        else:
+            tracer.export_chrome(args.trace)
+    if args.baseline:
+        regressions = compare(args.baseline, results, threshold=args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+冷启动基准：每个入口在全新解释器中导入（或执行 --help），测量墙钟时间与 -X importtime 的导入明细
+
+- import_ms = 用例墙钟中位数 - 空解释器（python -c pass）墙钟中位数
+- import_ms 超过预算、或导入了应延迟导入的重型模块（DEFERRED）时返回非零，可直接用于CI
+
+用法（在仓库根目录）:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 10 --output import.json
+    python -m benchmarks.bench_import --baseline import.json
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.common import REPO_ROOT, compare, print_table, write_results
+
+#只应在第一次使用时导入的模块（模型请求、JSON修复、彩色日志输出）
+DEFERRED: Tuple[str, ...] = ("openai", "httpx2", "rich", "json_repair", "tkinter")
+
+CASES: Dict[str, Tuple[List[str], float]] = {
+    #用例名: (python参数, import_ms预算)；预算约为实测的1.5倍，延迟导入前agent入口约1000ms
+    "import_tools": (["-c", "import tools.local_seach_tools, tools.tools"], 200),
+    "import_react": (["-c", "import agents.agents.react"], 550),
+    "import_server": (["-c", "import agents.server"], 550),
+    "import_batch": (["-c", "import agents.batch"], 550),
+    "cli_batch_help": (["-m", "agents.batch", "--help"], 550),
+    "cli_server_help": (["-m", "agents.server", "--help"], 550),
+}
+
+
+def _run(args: List[str]) -> Tuple[float, str]:
+    """返回 (墙钟秒数, importtime输出)"""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=REPO_ROOT,
+                               capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return elapsed, completed.stderr
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """-X importtime 输出 -> [(模块名, 自身微秒, 累计微秒)]"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_case(args: List[str], repeat: int) -> Dict[str, Any]:
+    _run(args)#预热：生成pyc，之后的运行只测导入本身
+    walls = []
+    output = ""
+    for _ in range(repeat):
+        wall, output = _run(args)
+        walls.append(wall)
+    modules = parse_importtime(output)
+    loaded = {name.split(".", 1)[0] for name, _, _ in modules}
+    heaviest = max(modules, key=lambda item: item[1]) if modules else ("", 0, 0)
+    return {
+        "wall_median": round(statistics.median(walls), 4),
+        "wall_min": round(min(walls), 4),
+        "modules": len(modules),
+        "heaviest": f"{heaviest[0]} ({heaviest[1] / 1000:.0f}ms)",
+        "deferred_loaded": ",".join(sorted(loaded.intersection(DEFERRED))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口模块冷启动基准")
+    parser.add_argument("--cases", default=",".join(CASES), help="逗号分隔的用例名")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-enforce", action="store_true", help="只报告，不因超出预算返回非零")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    interpreter = measure_case(["-c", "pass"], args.repeat)["wall_median"]
+    results: List[Dict[str, Any]] = []
+    failures: List[str] = []
+    for case in (name.strip() for name in args.cases.split(",")):
+        case_args, budget_ms = CASES[case]
+        result = {"case": case, **measure_case(case_args, args.repeat)}
+        result["import_ms"] = round((result["wall_median"] - interpreter) * 1000, 1)
+        result["budget_ms"] = budget_ms
+        results.append(result)
+        if result["import_ms"] > budget_ms:
+            failures.append(f"{case}: import_ms {result['import_ms']} > budget {budget_ms}")
+        if result["deferred_loaded"]:
+            failures.append(f"{case}: 启动时导入了应延迟的模块 {result['deferred_loaded']}")
+
+    print(f"interpreter startup: {interpreter * 1000:.1f}ms")
+    print_table(results, ["case", "import_ms", "budget_ms", "wall_median", "modules", "heaviest", "deferred_loaded"])
+    write_results(args.output, results)
+    if args.baseline:
+        failures.extend("REGRESSION " + line for line in
+                        compare(args.baseline, results, metric="import_ms", threshold=args.threshold))
+    for line in failures:
+        print("FAIL", line)
+    if failures and not args.no_enforce:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
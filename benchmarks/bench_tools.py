@@ -0,0 +1,137 @@
+"""
+find_files / count_files 基准测试
+
+每个用例在独立子进程中运行，测量墙钟时间、读写类系统调用数（/proc/self/io）、
+文件系统调用数（审计钩子）与峰值内存；--strace 时额外用 strace -c 统计全部系统调用
+
+用法（在仓库根目录）:
+    python -m benchmarks.bench_tools /tmp/bench/balanced-100k --files 100000 --shape balanced
+    python -m benchmarks.bench_tools /tmp/bench/wide-1m --files 1000000 --shape wide --output wide.json
+    python -m benchmarks.bench_tools /tmp/bench/wide-1m --files 1000000 --shape wide --baseline wide.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import REPO_ROOT, compare, install_fs_counter, measure, print_table, write_results
+from benchmarks.tree_gen import generate_tree
+
+
+def _cases() -> Dict[str, Tuple[Optional[Callable[[str], Any]], Callable[[str, Any], Any]]]:
+    """用例名 -> (准备函数(不计时), 被测函数)"""
+    from tools.file_index import FileIndex, set_file_index
+    from tools.local_seach_tools import count_files, find_files
+
+    def build_index(root: str):
+        db = os.path.join(tempfile.mkdtemp(prefix="bench_index_"), "file_index.db")
+        index = FileIndex(db)
+        index.build(root)
+        set_file_index(index)
+        return index
+
+    def fresh_db(root: str):
+        return os.path.join(tempfile.mkdtemp(prefix="bench_index_"), "file_index.db")
+
+    return {
+        "find_py_recursive": (None, lambda root, _: find_files(root, "*.py", recursive=True)),
+        "find_top100_largest": (None, lambda root, _: find_files(root, "*", True, limit=100, order_by="largest")),
+        "find_first_page_unordered": (None, lambda root, _: find_files(root, "*", True, limit=100, order_by="none")),
+        "count_all": (None, lambda root, _: count_files(root, "*", True, sample_size=0)),
+        "count_group_extension": (None, lambda root, _: count_files(root, "*", True, group_by="extension")),
+        "count_group_directory": (None, lambda root, _: count_files(root, "*", True, group_by="directory")),
+        "index_build": (fresh_db, lambda root, db: FileIndex(db).build(root)),
+        "index_count_group_extension": (build_index, lambda root, _: count_files(root, "*", True, group_by="extension")),
+        "index_find_top100_largest": (build_index, lambda root, _: find_files(root, "*", True, limit=100, order_by="largest")),
+    }
+
+
+CASES = ["find_py_recursive", "find_top100_largest", "find_first_page_unordered", "count_all",
+         "count_group_extension", "count_group_directory", "index_build", "index_count_group_extension",
+         "index_find_top100_largest"]
+
+
+def run_child(case: str, root: str, repeat: int) -> Dict[str, Any]:
+    """子进程入口：准备 -> 测量"""
+    install_fs_counter()
+    setup, func = _cases()[case]
+    context = setup(root) if setup else None
+    if case == "index_build":#每次重建都需要新的数据库
+        return measure(lambda: func(root, _fresh(context)), repeat)
+    return measure(lambda: func(root, context), repeat)
+
+
+def _fresh(db_path: str) -> str:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    return db_path
+
+
+_STRACE_TOTAL_RE = re.compile(r"^\s*100\.00\s+\S+\s+\S+\s+\S+\s+(\d+)\s+(?:\d+\s+)?total", re.M)
+
+
+def run_case(case: str, root: str, repeat: int, strace: bool = False) -> Dict[str, Any]:
+    command = [sys.executable, "-m", "benchmarks.bench_tools", root, "--child", case, "--repeat", str(repeat)]
+    strace_out = None
+    if strace:
+        strace_out = tempfile.NamedTemporaryFile(prefix="strace_", suffix=".txt", delete=False).name
+        command = ["strace", "-f", "-c", "-o", strace_out] + command
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"case": case, "error": completed.stderr.strip().splitlines()[-1:]}
+    result = {"case": case, **json.loads(completed.stdout.strip().splitlines()[-1])}
+    if strace_out:
+        with open(strace_out, "r") as f:
+            match = _STRACE_TOTAL_RE.search(f.read())
+        os.remove(strace_out)
+        result["syscalls_total"] = int(match.group(1)) if match else None#包含子进程启动与全部重复运行
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="find_files / count_files 基准测试")
+    parser.add_argument("root", help="合成目录树位置（不存在时按参数生成）")
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--shape", choices=("wide", "deep", "balanced"), default="balanced")
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", default=",".join(CASES), help="逗号分隔的用例名")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--strace", action="store_true", help="用strace -c统计全部系统调用（需要安装strace）")
+    parser.add_argument("--output", default=None, help="结果写入JSON文件")
+    parser.add_argument("--baseline", default=None, help="与基线JSON比较，变慢超过--threshold时返回非零")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.root, args.repeat)))
+        return
+
+    tree = generate_tree(args.root, args.files, args.shape, args.files_per_dir, seed=args.seed)
+    print(f"tree: {args.root} {json.dumps(tree['params'])} dirs={tree['dirs']} max_depth={tree['max_depth']}")
+    results: List[Dict[str, Any]] = []
+    for case in args.cases.split(","):
+        result = run_case(case.strip(), args.root, args.repeat, args.strace)
+        result["tree"] = f"{args.shape}-{args.files}"
+        results.append(result)
+    columns = ["case", "wall_median", "wall_min", "syscr", "fs_calls", "peak_rss_mb", "rss_delta_mb", "result_size"]
+    if args.strace:
+        columns.append("syscalls_total")
+    print_table(results, columns)
+    write_results(args.output, results)
+    if args.baseline:
+        regressions = compare(args.baseline, results, threshold=args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config.tracing import read_io_counters
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+_FS_EVENTS = ("os.scandir", "os.listdir", "open", "os.walk")
+_fs_calls = {"enabled": False, "count": 0}
+
+
+def _audit(event: str, args):
+    if _fs_calls["enabled"] and event in _FS_EVENTS:
+        _fs_calls["count"] += 1
+
+
+def install_fs_counter():
+    """审计钩子统计文件系统调用（scandir/listdir/open，os.stat不触发审计事件）。钩子装上后无法移除，只在子进程中使用"""
+    sys.addaudithook(_audit)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, Any]:
+    """
+    多次运行func：墙钟时间取中位数与最小值；系统调用与文件系统调用取第一次运行
+    峰值内存为进程生命周期的ru_maxrss，因此每个用例应在独立子进程中测量
+    """
+    rss_before = current_rss_mb()
+    timings: List[float] = []
+    first: Dict[str, Any] = {}
+    for run in range(repeat):
+        io_before = read_io_counters()
+        _fs_calls["count"], _fs_calls["enabled"] = 0, True
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        _fs_calls["enabled"] = False
+        if run == 0:
+            io_after = read_io_counters()
+            first = {
+                "syscr": io_after.get("syscr", 0) - io_before.get("syscr", 0),
+                "syscw": io_after.get("syscw", 0) - io_before.get("syscw", 0),
+                "fs_calls": _fs_calls["count"],
+                "result_size": _result_size(result),
+            }
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "wall_median": round(statistics.median(timings), 4),
+        "wall_min": round(min(timings), 4),
+        "runs": repeat,
+        **first,
+        "peak_rss_mb": round(peak_mb, 1),
+        "rss_delta_mb": round(max(0.0, peak_mb - rss_before), 1),
+    }
+
+
+def _result_size(result: Any) -> Optional[int]:
+    if isinstance(result, dict):
+        for key in ("total", "files", "matches"):
+            value = result.get(key)
+            if isinstance(value, int):
+                return value
+            if isinstance(value, list):
+                return len(value)
+    if hasattr(result, "__len__") and not isinstance(result, (str, dict)):#list、FileListing等
+        return len(result)
+    return None
+
+
+def write_results(path: Optional[str], results: List[Dict[str, Any]]):
+    if not path:
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                   "cpus": os.cpu_count(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def compare(baseline_path: str, results: List[Dict[str, Any]], metric: str = "wall_median",
+            threshold: float = 0.2) -> List[str]:
+    """与基线结果比较，返回变慢超过threshold比例的用例"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {item["case"]: item for item in json.load(f)["results"]}
+    regressions = []
+    for item in results:
+        base = baseline.get(item["case"])
+        if not base or not base.get(metric) or item.get(metric) is None:
+            continue
+        change = item[metric] / base[metric] - 1
+        if change > threshold:
+            regressions.append(f"{item['case']}: {metric} {base[metric]} -> {item[metric]} (+{change:.0%})")
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]], columns: List[str]):
+    widths = {column: max(len(column), *(len(str(item.get(column, ""))) for item in results)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for item in results:
+        print("  ".join(str(item.get(column, "")).ljust(widths[column]) for column in columns))
@@ -0,0 +1,126 @@
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST = ".benchtree.json"
+MTIME_EPOCH = 1_700_000_000 #mtime的固定基准（2023-11-14），不用当前时间，保证不同时间生成的树可比
+
+EXTENSIONS: List[Tuple[str, int]] = [
+    #(扩展名, 权重)
+    (".py", 20), (".txt", 15), (".md", 8), (".json", 10), (".log", 10),
+    (".pdf", 5), (".jpg", 10), (".csv", 7), (".html", 5), ("", 3), (".tar.gz", 2), (".PNG", 5),
+]
+_WORDS = ["invoice", "report", "config", "main", "data", "notes", "draft", "final", "backup", "test"]
+
+
+def _parents(dirs: int, shape: str, fanout: int, depth: int) -> List[int]:
+    """
+    返回每个目录的父目录编号（-1表示根目录）
+    - wide: 所有目录都在根目录下
+    - deep: 若干条长度为depth的目录链
+    - balanced: 每个目录fanout个子目录的完全树
+    """
+    if shape == "wide":
+        return [-1] * dirs
+    if shape == "deep":
+        return [-1 if i % depth == 0 else i - 1 for i in range(dirs)]
+    if shape == "balanced":
+        return [-1 if i < fanout else i // fanout - 1 for i in range(dirs)]
+    raise ValueError(f"不支持的shape: {shape}，可选 'wide'、'deep'、'balanced'")
+
+
+def generate_tree(root: str, files: int = 10_000, shape: str = "balanced", files_per_dir: int = 50,
+                  fanout: int = 8, depth: int = 20, seed: int = 0, max_size: int = 0,
+                  vary_mtime: bool = True, force: bool = False) -> Dict[str, object]:
+    """
+    生成可复现的合成目录树（相同参数与seed得到相同的结构、文件名、大小与mtime）
+    根目录下的清单文件记录参数，参数一致时直接复用已有的树
+
+    Args:
+        root: 生成位置
+        files: 文件总数（1万到数百万）
+        shape: 'wide'、'deep' 或 'balanced'
+        files_per_dir: 平均每个目录的文件数
+        fanout: balanced时每个目录的子目录数
+        depth: deep时每条目录链的深度
+        seed: 随机种子
+        max_size: 文件内容最大字节数，0表示全部为空文件（只测元数据路径）
+        vary_mtime: 是否把mtime分散到过去一年内
+        force: 参数不一致时删除旧树重建（只删除带清单、即由本工具生成的目录）
+    """
+    params = {"files": files, "shape": shape, "files_per_dir": files_per_dir, "fanout": fanout,
+              "depth": depth, "seed": seed, "max_size": max_size, "vary_mtime": vary_mtime}
+    root_path = Path(root)
+    manifest = root_path / MANIFEST
+    if manifest.exists():
+        existing = json.loads(manifest.read_text(encoding="utf-8"))
+        if existing.get("params") == params:
+            return existing
+        if not force:
+            raise FileExistsError(f"{root} 已存在参数不同的目录树，使用 force=True 或换一个目录")
+        shutil.rmtree(root_path)
+    elif root_path.exists() and any(root_path.iterdir()):
+        raise FileExistsError(f"{root} 不是空目录，也不是本工具生成的目录树")
+
+    rng = random.Random(seed)
+    dirs = max(1, math.ceil(files / files_per_dir))
+    parents = _parents(dirs, shape, fanout, depth)
+    paths: List[str] = []
+    for index, parent in enumerate(parents):
+        name = f"d{index:06d}"
+        paths.append(name if parent < 0 else os.path.join(paths[parent], name))
+
+    started = time.perf_counter()
+    root_path.mkdir(parents=True, exist_ok=True)
+    for path in paths:
+        os.makedirs(root_path / path, exist_ok=True)
+
+    extensions = [ext for ext, _ in EXTENSIONS]
+    weights = [weight for _, weight in EXTENSIONS]
+    payload = b"lorem ipsum invoice 2024 report TODO config\n" * 64
+    for index in range(files):
+        directory = root_path / paths[rng.randrange(dirs)]
+        ext = rng.choices(extensions, weights)[0]
+        name = f"{rng.choice(_WORDS)}_{index:07d}{ext}"
+        if index % 97 == 0:
+            name = "." + name#少量隐藏文件
+        file_path = directory / name
+        size = rng.randrange(max_size + 1) if max_size else 0
+        with open(file_path, "wb") as f:
+            if size:
+                f.write((payload * (size // len(payload) + 1))[:size])
+        if vary_mtime:
+            mtime = MTIME_EPOCH - rng.randrange(365 * 86400)
+            os.utime(file_path, (mtime, mtime))
+
+    info = {"params": params, "dirs": dirs, "max_depth": max(path.count(os.sep) + 1 for path in paths),
+            "generated_seconds": round(time.perf_counter() - started, 2)}
+    manifest.write_text(json.dumps(info, ensure_ascii=False, indent=2), encoding="utf-8")
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成目录树")
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--shape", choices=("wide", "deep", "balanced"), default="balanced")
+    parser.add_argument("--files-per-dir", type=int, default=50)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-size", type=int, default=0)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    info = generate_tree(args.root, args.files, args.shape, args.files_per_dir, args.fanout, args.depth,
+                         args.seed, args.max_size, force=args.force)
+    print(json.dumps(info, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,85 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 from datetime import datetime
-from rich.logging import RichHandler
-from rich.console import Console
-from rich.theme import Theme
+from typing import Dict, List, Optional
+
+
+class TruncatingFormatter(logging.Formatter):
+    """格式化后超过max_chars的消息截断，避免超大observation拖慢输出"""
+
+    def __init__(self, fmt: Optional[str] = None, max_chars: Optional[int] = None):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = record.message
+        if self.max_chars is not None and len(message) > self.max_chars:
+            record.message = message[:self.max_chars] + f"…(已截断，共{len(message)}字符)"
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.message = message
+
+
+class JsonlFormatter(logging.Formatter):
+    """结构化日志：每条记录一行JSON，extra={"fields": {...}} 中的字段原样写入"""
+
+    def __init__(self, max_chars: Optional[int] = None):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if self.max_chars is not None and len(message) > self.max_chars:
+            message = message[:self.max_chars]
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": message,
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    只把LogRecord放进队列，不在调用线程上格式化
+    （标准QueueHandler.prepare会先format整条消息，正好是要从事件循环线程挪走的开销）
+    消息参数在后台线程才被格式化，调用方不应在记录日志后修改传入的可变参数
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:#traceback对象不能跨线程长期持有，先转成文本
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LazyFileHandler(TimedRotatingFileHandler):
+    """按天轮转的文件日志，第一次写入时才创建日志目录和文件"""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+_configured: Dict[str, "RichLogger"] = {}
+_configured_lock = threading.Lock()
 
 
 class RichLogger:
@@ -15,18 +90,35 @@ class RichLogger:
     - 按日期时间命名的日志文件
     - 自动按天轮转日志
     - 同时输出到文件和终端
+    - 队列模式：调用线程只入队，格式化与写入在后台线程完成
+    - 超长消息截断、可选的结构化JSONL输出
+    - 同名logger只配置一次，重复创建不会重复添加handler
+    - 日志目录与文件在第一次写入时才创建，rich在创建控制台输出时才导入
     """
 
+    def __new__(cls, name: str = "APP", *args, **kwargs):
+        with _configured_lock:
+            existing = _configured.get(name)
+            if existing is not None:
+                return existing
+            instance = super().__new__(cls)
+            instance._initialized = False
+            _configured[name] = instance
+            return instance
+
     def __init__(
             self,
             name: str = "APP",
             log_dir: str = "logs",
             console_level: str = "INFO",
             file_level: str = "DEBUG",
-            time_format: str = "%Y-%m-%d_%H-%M-%S"
+            time_format: str = "%Y-%m-%d_%H-%M-%S",
+            queued: bool = True,
+            max_message_chars: Optional[int] = 4000,
+            jsonl: bool = False,
     ):
         """
-        初始化日志系统
+        初始化日志系统，同名logger已初始化过时直接复用（以第一次的参数为准）
 
         Args:
             name: 日志名称（会体现在日志中）
@@ -34,22 +126,44 @@ class RichLogger:
             console_level: 控制台日志级别
             file_level: 文件日志级别
             time_format: 日志文件名时间格式
+            queued: 是否使用队列+后台线程输出
+            max_message_chars: 单条消息最大字符数，None不截断
+            jsonl: 是否额外写一份结构化的JSONL日志
         """
+        if self._initialized:
+            return
+        self._initialized = True
         self.name = name
         self.log_dir = Path(log_dir)
         self.time_format = time_format
+        self.max_message_chars = max_message_chars
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.DEBUG)
+        self._listener: Optional[QueueListener] = None
 
-        # 确保日志目录存在
-        self.log_dir.mkdir(parents=True, exist_ok=True)
+        # 初始化控制台和文件处理器（日志目录在第一次写入时创建）
+        handlers = [self._setup_console_handler(console_level), self._setup_file_handler(file_level)]
+        if jsonl:
+            handlers.append(self._setup_jsonl_handler(file_level))
+        self._attach(handlers, queued)
 
-        # 初始化控制台和文件处理器
-        self._setup_console_handler(console_level)
-        self._setup_file_handler(file_level)
+    def _attach(self, handlers: List[logging.Handler], queued: bool):
+        if not queued:
+            for handler in handlers:
+                self.logger.addHandler(handler)
+            return
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.logger.addHandler(LazyQueueHandler(log_queue))
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.close)#退出时把队列中剩余的日志写完
 
-    def _setup_console_handler(self, level: str):
+    def _setup_console_handler(self, level: str) -> logging.Handler:
         """配置 Rich 控制台输出"""
+        from rich.console import Console
+        from rich.logging import RichHandler
+        from rich.theme import Theme
+
         console = Console(theme=Theme({
             "logging.level.debug": "dim blue",
             "logging.level.info": "bold green",
@@ -64,30 +178,45 @@ class RichLogger:
             markup=True,
             show_time=False
         )
-        rich_handler.setFormatter(logging.Formatter("%(message)s"))
-        self.logger.addHandler(rich_handler)
+        rich_handler.setFormatter(TruncatingFormatter("%(message)s", self.max_message_chars))
+        return rich_handler
 
-    def _setup_file_handler(self, level: str):
+    def _setup_file_handler(self, level: str) -> logging.Handler:
         """配置按时间命名的文件日志"""
         timestamp = datetime.now().strftime(self.time_format)
         log_file = self.log_dir / f"{self.name}_{timestamp}.log"
 
-        file_handler = TimedRotatingFileHandler(
+        file_handler = LazyFileHandler(
             log_file,
             when="midnight",
             backupCount=7,
             encoding="utf-8"
         )
         file_handler.setLevel(getattr(logging, level))
-        file_handler.setFormatter(logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        file_handler.setFormatter(TruncatingFormatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s", self.max_message_chars
         ))
-        self.logger.addHandler(file_handler)
+        return file_handler
+
+    def _setup_jsonl_handler(self, level: str) -> logging.Handler:
+        """配置结构化JSONL日志，与文本日志同目录同时间戳"""
+        timestamp = datetime.now().strftime(self.time_format)
+        jsonl_handler = LazyFileHandler(
+            self.log_dir / f"{self.name}_{timestamp}.jsonl",
+            when="midnight",
+            backupCount=7,
+            encoding="utf-8"
+        )
+        jsonl_handler.setLevel(getattr(logging, level))
+        jsonl_handler.setFormatter(JsonlFormatter(self.max_message_chars))
+        return jsonl_handler
+
+    def close(self):
+        """停止后台线程并写完队列中剩余的日志"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
 
     def get_logger(self) -> logging.Logger:
         """获取配置好的日志器"""
         return self.logger
-
-
-
-
@@ -0,0 +1,220 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+def read_io_counters() -> Dict[str, int]:
+    """/proc/self/io 的读写计数（进程级，并发时包含其他任务的I/O）"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            return {key: int(value) for key, _, value in (line.partition(":") for line in f)}
+    except OSError:
+        return {}
+
+
+class Span:
+    """一次计时区间，with/async with 均可使用；嵌套关系通过contextvars跟踪，跨asyncio任务也成立"""
+
+    recording = True
+    __slots__ = ("tracer", "name", "attrs", "span_id", "parent_id", "trace_id", "start_ns", "end_ns",
+                 "lane", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(tracer._ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.start_ns = 0
+        self.end_ns = 0
+        self.lane = 0
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.lane = _lane()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "start_ms": round((self.start_ns - self.tracer.origin_ns) / 1e6, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "lane": self.lane,
+            **self.attrs,
+        }
+
+
+class _NoopSpan:
+    """关闭追踪时共享的空span，所有操作都是空操作"""
+
+    recording = False
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+def _lane() -> int:
+    """Chrome trace中的泳道：同一asyncio任务内的span严格嵌套，并发任务各占一条"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+class Tracer:
+    """
+    span收集器
+    - enabled为False时span()直接返回共享的空span，几乎没有开销
+    - 最多保留max_spans条，超出后丢弃最早的
+    - 可导出为JSONL或Chrome trace（chrome://tracing、Perfetto可直接打开）
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = 100_000):
+        self.enabled = enabled
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.origin_ns = time.perf_counter_ns()
+        self.origin_wall = time.time()
+        self._ids = itertools.count(1)
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _finish(self, span: Span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """按span名汇总：次数、总耗时、平均与最大耗时（毫秒）"""
+        groups: Dict[str, List[float]] = {}
+        for span in list(self.spans):
+            groups.setdefault(span.name, []).append(span.duration_ms)
+        return {name: {"count": len(values), "total_ms": round(sum(values), 3),
+                       "mean_ms": round(sum(values) / len(values), 3), "max_ms": round(max(values), 3)}
+                for name, values in sorted(groups.items(), key=lambda item: -sum(item[1]))}
+
+    def export_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for span in list(self.spans):
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+    def export_chrome(self, path: str):
+        """Chrome trace event格式（完整事件ph=X），泳道按asyncio任务/线程划分"""
+        pid = os.getpid()
+        lanes: Dict[int, int] = {}
+        events: List[Dict[str, Any]] = []
+        for span in sorted(self.spans, key=lambda item: item.start_ns):
+            if span.lane not in lanes:
+                lanes[span.lane] = len(lanes) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lanes[span.lane],
+                               "args": {"name": f"{span.name} #{lanes[span.lane]}"}})
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (span.start_ns - self.origin_ns) / 1e3,
+                "dur": (span.end_ns - span.start_ns) / 1e3,
+                "pid": pid,
+                "tid": lanes[span.lane],
+                "args": {"span_id": span.span_id, "parent_id": span.parent_id, "trace_id": span.trace_id,
+                         **span.attrs},
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+
+
+_tracer = Tracer(enabled=os.environ.get("LFS_TRACE", "") not in ("", "0"))
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def enable_tracing(enabled: bool = True) -> Tracer:
+    """打开/关闭全局追踪（也可用环境变量 LFS_TRACE=1 在启动时打开）"""
+    _tracer.enabled = enabled
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """在全局tracer上开始一个span；关闭追踪时返回空span"""
+    if not _tracer.enabled:
+        return NOOP_SPAN
+    return Span(_tracer, name, attrs)
+
+
+def annotate(**attrs):
+    """给当前span补充属性（如在深层函数里记录缓存是否命中），没有当前span时忽略"""
+    if not _tracer.enabled:
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def record(name: str, start_ns: int, **attrs):
+    """
+    补记一个已经结束的span（父span为当前span），用于async生成器等无法用with跨越yield的场景
+    @param start_ns: time.perf_counter_ns() 记录的开始时间，结束时间为调用时刻
+    """
+    if not _tracer.enabled:
+        return
+    finished = Span(_tracer, name, attrs)
+    finished.lane = _lane()
+    finished.start_ns = start_ns
+    finished.end_ns = time.perf_counter_ns()
+    _tracer._finish(finished)
@@ -0,0 +1,126 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:#openai与httpx2导入很慢，第一次创建客户端时才导入
+    from openai import AsyncOpenAI
+
+
+DEFAULT_API_KEY = "YOUR API KEY"
+DEFAULT_BASE_URL = "ENDPOINT"
+
+
+class PoolConfig:
+    """HTTP连接池配置，所有共享客户端使用同一份配置"""
+
+    def __init__(
+            self,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            http2: bool = True,
+            max_concurrency: Optional[int] = 32,
+            timeout: float = 60.0,
+            max_retries: int = 2,
+    ):
+        """
+        Args:
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 最多保持的空闲长连接数
+            keepalive_expiry: 空闲长连接保留秒数
+            http2: 是否启用HTTP/2（未安装h2时自动退回HTTP/1.1）
+            max_concurrency: 同一事件循环内同时进行的请求数上限，None不限制
+            timeout: 单次请求超时秒数
+            max_retries: openai客户端自身的重试次数
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+
+class _LoopClients:
+    """某个事件循环上的客户端与信号量（httpx连接不能跨事件循环复用）"""
+
+    def __init__(self):
+        self.clients: Dict[Tuple[str, str], "AsyncOpenAI"] = {}
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+
+_config = PoolConfig()
+_registry: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def configure_pool(config: PoolConfig):
+    """替换连接池配置，只影响之后新建的客户端"""
+    global _config
+    _config = config
+
+
+def get_pool_config() -> PoolConfig:
+    return _config
+
+
+def _loop_clients() -> _LoopClients:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        entry = _registry.get(loop)
+        if entry is None:
+            entry = _LoopClients()
+            if _config.max_concurrency:
+                entry.semaphore = asyncio.Semaphore(_config.max_concurrency)
+            _registry[loop] = entry
+        return entry
+
+
+def get_client(api_key: str = DEFAULT_API_KEY, base_url: str = DEFAULT_BASE_URL) -> "AsyncOpenAI":
+    """
+    返回当前事件循环上 (api_key, base_url) 对应的共享客户端，不存在时创建
+    所有Agent共用同一个连接池，避免重复握手与建池
+    """
+    entry = _loop_clients()
+    key = (api_key, base_url)
+    client = entry.clients.get(key)
+    if client is None:
+        import httpx2
+        from openai import AsyncOpenAI, DefaultAsyncHttpx2Client
+
+        http_client = DefaultAsyncHttpx2Client(
+            http2=_config.http2,
+            limits=httpx2.Limits(
+                max_connections=_config.max_connections,
+                max_keepalive_connections=_config.max_keepalive_connections,
+                keepalive_expiry=_config.keepalive_expiry,
+            ),
+            timeout=_config.timeout,
+        )
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=_config.max_retries,
+        )
+        entry.clients[key] = client
+    return client
+
+
+def request_slot() -> Optional[asyncio.Semaphore]:
+    """当前事件循环的并发信号量，未限制并发时返回None"""
+    return _loop_clients().semaphore
+
+
+async def close_clients():
+    """关闭当前事件循环上的所有共享客户端"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        entry = _registry.pop(loop, None)
+    if entry is None:
+        return
+    for client in entry.clients.values():
+        await client.close()
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+from typing import Callable, Optional
+
+
+def echo_reply(body: dict) -> str:
+    """默认回复：原样返回最后一条消息"""
+    messages = body.get("messages") or [{}]
+    return messages[-1].get("content", "")
+
+
+class FakeChatServer:
+    """
+    本地OpenAI兼容的chat.completions替身服务（HTTP/1.1，支持keep-alive）
+    用于在没有真实端点时测试与压测连接池；统计建立的连接数与请求数
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 reply: Callable[[dict], str] = echo_reply):
+        """
+        Args:
+            host/port: 监听地址，port为0时随机分配
+            latency: 每个请求的模拟延迟秒数
+            reply: 根据请求体生成回复内容
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.reply = reply
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> "FakeChatServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                raw = await reader.readexactly(length) if length else b""
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, content_type, payload = self._respond(request_line.decode("latin-1"), raw)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, request_line: str, raw: bytes):
+        parts = request_line.split()
+        if len(parts) < 2 or parts[0] != "POST" or not parts[1].endswith("/chat/completions"):
+            return "404 Not Found", "application/json", b'{"error":{"message":"not found"}}'
+        try:
+            body = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            return "400 Bad Request", "application/json", b'{"error":{"message":"invalid json"}}'
+        content = self.reply(body)
+        if body.get("stream"):
+            return "200 OK", "text/event-stream", self._sse(body, content)
+        payload = {
+            "id": f"chatcmpl-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+        return "200 OK", "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    def _sse(self, body: dict, content: str, chunk_chars: int = 8) -> bytes:
+        """stream=True时按chat.completion.chunk格式分段返回"""
+        events = []
+        for start in range(0, len(content), chunk_chars):
+            events.append({
+                "id": f"chatcmpl-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": None,
+                             "delta": {"content": content[start:start + chunk_chars]}}],
+            })
+        lines = [f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events]
+        lines.append("data: [DONE]\n\n")
+        return "".join(lines).encode("utf-8")
+
+
+async def benchmark(requests: int = 500, concurrency: int = 50, latency: float = 0.005):
+    """对比：共享连接池 vs 每个请求新建客户端"""
+    from openai import AsyncOpenAI
+
+    from generative_model.client_pool import close_clients, get_client, request_slot
+
+    async with FakeChatServer(latency=latency) as server:
+        messages = [{"role": "user", "content": "ping"}]
+
+        async def run(label, make_client, close_each):
+            server.connections = server.requests = 0
+            gate = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with gate:
+                    client = make_client()
+                    slot = request_slot()
+                    if slot is None:
+                        await client.chat.completions.create(model="fake", messages=messages)
+                    else:
+                        async with slot:
+                            await client.chat.completions.create(model="fake", messages=messages)
+                    if close_each:
+                        await client.close()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(requests)))
+            elapsed = time.perf_counter() - started
+            print(f"{label:<10} {requests / elapsed:8.1f} req/s  connections={server.connections}")
+
+        await run("per-call", lambda: AsyncOpenAI(api_key="fake", base_url=server.base_url), True)
+        await run("pooled", lambda: get_client("fake", server.base_url), False)
+        await close_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -1,32 +1,167 @@
-from typing import List
-
-from openai import AsyncOpenAI
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 
+from config.tracing import record, span
+from generative_model.client_pool import DEFAULT_API_KEY, DEFAULT_BASE_URL, get_client, request_slot
+from generative_model.response_cache import ResponseCache, cache_key, endpoint_id, get_response_cache
 from py_model import Message
 
+if TYPE_CHECKING:#openai只在发请求时才需要（见 client_pool.get_client）
+    from openai import AsyncOpenAI
+
+
+_UNSET = object()
 
 
 class Generative_Model:
 
-    def __init__(self,model:str):
+    _inflight: Dict[Tuple[int, str], "asyncio.Task[str]"] = {}#所有实例共享：同一端点的相同请求正在进行时只发一次
 
-        self._client = AsyncOpenAI(
-            api_key="YOUR API KEY",
-            base_url="ENDPOINT",
-        )
+    def __init__(self,model:str,cache=_UNSET,coalesce:bool=True,
+                 api_key:str=DEFAULT_API_KEY,base_url:str=DEFAULT_BASE_URL,client:Optional["AsyncOpenAI"]=None):
+        """
+        @param model: 模型名
+        @param cache: 回复缓存，默认使用全局缓存（见 generative_model.response_cache.set_response_cache），None关闭
+        @param coalesce: 是否合并正在进行中的相同请求
+        @param api_key/base_url: 用于从共享连接池取客户端（见 generative_model.client_pool）
+        @param client: 显式指定客户端，不走共享连接池
+        """
+
+        self._api_key = api_key
+        self._base_url = base_url
+        self._client = client
+        if client is not None:
+            self._endpoint = endpoint_id(str(client.base_url), getattr(client, "api_key", None))
+        else:
+            self._endpoint = endpoint_id(base_url, api_key)#缓存与请求合并都按端点+凭证区分
         self.model = model
+        self._cache:Optional[ResponseCache] = get_response_cache() if cache is _UNSET else cache
+        self.coalesce = coalesce
 
     async def generate(
         self,
         messages:List[Message],
         model=None
     ):
+        model = self.model if model is None else model  # 使用指定的模型
+        with span("llm.generate", model=model) as current:
+            response = await self._generate(messages, model, current)
+            if current.recording:
+                current.set(prompt_chars=sum(len(message.content) for message in messages),
+                            completion_chars=len(response or ""))
+            return response
+
+    async def _generate(self, messages: List[Message], model: str, current):
+        """generate的主体，current为追踪span，记录回复来源（cache/joined/request）"""
+        if self._cache is None and not self.coalesce:
+            current.set(source="request")
+            return await self._request(messages, model)
 
-        response = await self._client.chat.completions.create(
-            model=self.model if model is None else model,  # 使用指定的模型
+        key = cache_key(model, messages, self._endpoint)
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                current.set(source="cache")
+                return cached
+
+        if not self.coalesce:
+            current.set(source="request")
+            response = await self._request(messages, model)
+            self._store(key, response)
+            return response
+
+        inflight_key = (id(asyncio.get_running_loop()), key)
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            current.set(source="request")
+            task = asyncio.ensure_future(self._request(messages, model))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda t: self._finish(inflight_key, key, t))
+        else:
+            current.set(source="joined")
+        return await asyncio.shield(task)#某个调用方被取消不影响其他等待同一请求的调用方
+
+    async def stream(
+        self,
+        messages:List[Message],
+        model=None
+    ) -> AsyncIterator[str]:
+        """
+        流式生成，逐段产出文本；命中缓存时一次产出全部内容
+        完整输出结束后写入缓存，流式请求不参与合并
+        """
+        model = self.model if model is None else model
+        started_ns = time.perf_counter_ns()#生成器跨越yield，结束时用record补记span
+        prompt_chars = sum(len(message.content) for message in messages)
+        key = cache_key(model, messages, self._endpoint) if self._cache is not None else None
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                yield cached
+                record("llm.stream", started_ns, model=model, source="cache", prompt_chars=prompt_chars,
+                       completion_chars=len(cached))
+                return
+
+        chunks: List[str] = []
+        first_chunk_ns = None
+        slot = request_slot()
+        if slot is not None:
+            await slot.acquire()
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=[ message.model_dump() for message in messages],
+                stream=True,
+            )
+            async for event in response:
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    if first_chunk_ns is None:
+                        first_chunk_ns = time.perf_counter_ns()
+                    chunks.append(delta)
+                    yield delta
+        finally:
+            if slot is not None:
+                slot.release()
+            record("llm.stream", started_ns, model=model, source="request", prompt_chars=prompt_chars,
+                   completion_chars=sum(map(len, chunks)), chunks=len(chunks),
+                   first_chunk_ms=None if first_chunk_ns is None else round((first_chunk_ns - started_ns) / 1e6, 3))
+        if key is not None:
+            self._store(key, "".join(chunks))
+
+    def _finish(self, inflight_key, key: str, task: "asyncio.Task[str]"):
+        self._inflight.pop(inflight_key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    def _store(self, key: str, response: Optional[str]):
+        if self._cache is not None and response is not None:
+            self._cache.set(key, response)
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """未显式指定时，每次按当前事件循环取共享客户端"""
+        if self._client is not None:
+            return self._client
+        return get_client(self._api_key, self._base_url)
+
+    async def _request(self, messages: List[Message], model: str):
+
+        slot = request_slot()
+        if slot is None:
+            return await self._create(messages, model)
+        async with slot:
+            return await self._create(messages, model)
+
+    async def _create(self, messages: List[Message], model: str):
+
+        response = await self.client.chat.completions.create(
+            model=model,
             messages=[ message.model_dump() for message in messages],
         )
 
         return response.choices[0].message.content
 
-
@@ -0,0 +1,133 @@
+import abc
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from py_model import Message
+
+
+def endpoint_id(base_url: str, api_key: Optional[str]) -> str:
+    """端点标识：base_url + 凭证指纹（api_key的sha256前16位，不保存明文）"""
+    fingerprint = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    return f"{base_url.rstrip('/')}#{fingerprint}"
+
+
+def cache_key(model: str, messages: List[Message], endpoint: str = "") -> str:
+    """端点 + 模型名 + 消息列表的sha256，同一端点、同一凭证且消息内容完全一致才会命中"""
+    payload = json.dumps(
+        {"endpoint": endpoint, "model": model, "messages": [message.model_dump() for message in messages]},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(abc.ABC):
+    """模型回复缓存基类"""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, response: str):
+        ...
+
+    @abc.abstractmethod
+    def clear(self):
+        ...
+
+
+class MemoryResponseCache(ResponseCache):
+    """进程内LRU缓存"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_entries: 最多缓存条数
+            ttl: 条目存活秒数，None表示不过期
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskResponseCache(ResponseCache):
+    """基于SQLite的磁盘缓存，跨进程、跨运行复用（适合评测与回归）"""
+
+    def __init__(self, db_path: str = "response_cache.db", ttl: Optional[float] = None):
+        """
+        Args:
+            db_path: 缓存文件路径
+            ttl: 条目存活秒数，None表示不过期
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def set(self, key: str, response: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?,?,?)", (key, response, time.time()))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def set_response_cache(cache: Optional[ResponseCache]):
+    """设置Generative_Model默认使用的回复缓存，None表示关闭"""
+    global _default_cache
+    _default_cache = cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _default_cache
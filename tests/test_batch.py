@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.batch import BatchRunner, completed_ids, read_queries
+
+
+class FakeAgent:
+    max_iteration = 5
+    max_seconds = None
+    max_tokens = None
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.seen = []
+        self.max_steps = []
+
+    async def execute(self, query, state):
+        self.seen.append(query)
+        self.max_steps.append(state.max_steps)
+        await asyncio.sleep(0)
+        if query in self.fail_on:
+            raise RuntimeError("boom")
+        state.answer = query.upper()
+        state.stop_reason = "answer"
+
+
+def _write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_bad_lines_become_error_records(tmp_path):
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, ['{"id": 1, "query": "a"}', '{"id": 2}', "[1, 2]", "{oops", '"b"'])
+    assert [(query_id, query) for query_id, query, _ in read_queries(str(source))] == [
+        ("1", "a"), ("2", None), ("line:3", None), ("line:4", None), ("line:5", "b")]
+
+    output = tmp_path / "out.jsonl"
+    agent = FakeAgent()
+    summary = asyncio.run(BatchRunner(agent, concurrency=2).run(str(source), str(output)))
+    records = {record["id"]: record for record in _records(output)}
+    assert sorted(agent.seen) == ["a", "b"]
+    assert records["1"]["answer"] == "A" and records["line:5"]["answer"] == "B"
+    assert records["2"]["error"].startswith("ValueError")
+    assert records["line:4"]["error"].startswith("JSONDecodeError")
+    assert summary["completed"] == 5 and summary["errors"] == 3 and summary["answered"] == 2
+
+
+def test_resume_skips_only_successful_ids(tmp_path):
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, ['{"id": "a", "query": "a"}', '{"id": "b", "query": "b"}', '{"id": "c", "query": "c"}'])
+    output = tmp_path / "out.jsonl"
+    first = asyncio.run(BatchRunner(FakeAgent(fail_on={"b"}), concurrency=2).run(str(source), str(output)))
+    assert first["errors"] == 1 and first["skipped"] == 0
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "stale", "error": null}\n{"id": "half')#其它输入留下的id与写了一半的行
+    assert completed_ids(str(output)) == {"a", "c", "stale"}
+
+    agent = FakeAgent()
+    second = asyncio.run(BatchRunner(agent, concurrency=2).run(str(source), str(output)))
+    assert agent.seen == ["b"]#出错的记录重试
+    assert second["skipped"] == 2 and second["completed"] == 1
+    assert completed_ids(str(output)) == {"a", "b", "c", "stale"}
+
+
+def test_explicit_zero_max_steps_is_honoured(tmp_path):
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, ['"q"'])
+    agent = FakeAgent()
+    asyncio.run(BatchRunner(agent, max_steps=0).run(str(source), str(tmp_path / "out.jsonl")))
+    assert agent.max_steps == [0]
+
+
+def test_failing_worker_cancels_siblings(tmp_path):
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, ['"fast"', '"slow"'])
+    cancelled = []
+
+    class Runner(BatchRunner):
+        async def run_one(self, query_id, query):
+            if query == "fast":
+                raise OSError("disk full")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(query)
+                raise
+
+    runner = Runner(FakeAgent(), concurrency=2)
+    with pytest.raises(OSError):
+        asyncio.run(runner.run(str(source), str(tmp_path / "out.jsonl")))
+    assert cancelled == ["slow"]
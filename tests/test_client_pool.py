@@ -0,0 +1,66 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+from generative_model import client_pool
+from generative_model.client_pool import PoolConfig, close_clients, configure_pool, get_client, request_slot
+
+pytest.importorskip("openai")
+
+
+@pytest.fixture(autouse=True)
+def restore_config():
+    config = client_pool.get_pool_config()
+    yield
+    configure_pool(config)
+
+
+def test_clients_are_shared_per_endpoint_and_loop():
+    async def clients():
+        a1 = get_client("key", "http://a.invalid/v1")
+        a2 = get_client("key", "http://a.invalid/v1")
+        b = get_client("key", "http://b.invalid/v1")
+        other_key = get_client("other", "http://a.invalid/v1")
+        await close_clients()
+        return a1, a2, b, other_key
+
+    first = asyncio.run(clients())
+    assert first[0] is first[1]
+    assert len({id(client) for client in first[1:]}) == 3
+    second = asyncio.run(clients())
+    assert second[0] is not first[0]#httpx连接不能跨事件循环，每个循环各有一份
+
+
+def test_close_clients_closes_and_forgets():
+    async def main():
+        client = get_client("key", "http://a.invalid/v1")
+        await close_clients()
+        assert client.is_closed()
+        fresh = get_client("key", "http://a.invalid/v1")
+        assert fresh is not client and not fresh.is_closed()
+        await close_clients()
+        await close_clients()#没有客户端时也可以调用
+
+    asyncio.run(main())
+
+
+def test_http2_falls_back_when_h2_is_missing(monkeypatch):
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None if name == "h2" else real_find_spec(name, *args))
+    assert PoolConfig(http2=True).http2 is False
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: object() if name == "h2" else real_find_spec(name, *args))
+    assert PoolConfig(http2=True).http2 is True
+    assert PoolConfig(http2=False).http2 is False
+
+
+def test_request_slot_follows_config():
+    async def slot():
+        return request_slot()
+
+    configure_pool(PoolConfig(max_concurrency=3))
+    semaphore = asyncio.run(slot())
+    assert isinstance(semaphore, asyncio.Semaphore) and semaphore._value == 3
+    configure_pool(PoolConfig(max_concurrency=None))
+    assert asyncio.run(slot()) is None
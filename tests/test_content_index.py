@@ -0,0 +1,106 @@
+import os
+import sqlite3
+
+import pytest
+
+from tools.content_index import ContentIndex, tokenize
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def docs(tmp_path):
+    _write(str(tmp_path / "alpha.md"), "apple banana apple cherry apple")
+    _write(str(tmp_path / "beta.md"), "apple banana " + "filler " * 30)
+    _write(str(tmp_path / "gamma.txt"), "cherry banana apple")
+    _write(str(tmp_path / "zh" / "invoice.md"), "这是一张发票，请查收")
+    _write(str(tmp_path / "zh" / "scattered.md"), "发货后开票")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def index(docs):
+    content_index = ContentIndex(":memory:", max_staleness=0)
+    content_index.update(docs)
+    yield content_index
+    content_index.close()
+
+
+def _paths(results):
+    return [os.path.basename(result["path"]) for result in results]
+
+
+def test_tokenize_keeps_non_ascii_letters():
+    assert tokenize("Café naïve Привет find_files x2") == ["café", "naïve", "привет", "find", "files", "x2"]
+    assert tokenize("發票abc") == ["發", "票", "abc"]
+
+
+def test_update_indexes_and_search_ranks_by_bm25(docs, index):
+    results = index.search("apple")
+    assert _paths(results)[0] == "alpha.md"#词频最高
+    assert _paths(results)[-1] == "beta.md"#长文档被归一化压低
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert _paths(index.search("cherry apple"))[:2] == ["alpha.md", "gamma.txt"]
+    assert _paths(index.search("apple", file_pattern="*.txt")) == ["gamma.txt"]
+    assert _paths(index.search("apple", path=os.path.join(docs, "zh"))) == []
+
+
+def test_phrase_matching_requires_adjacent_tokens(index):
+    assert _paths(index.search('"cherry banana"')) == ["gamma.txt"]
+    assert _paths(index.search('"cherry apple"')) == ["alpha.md"]
+    assert _paths(index.search("发票")) == ["invoice.md"]#连续中文作为短语，“发…票”分散出现不算
+
+
+def test_incremental_update_only_rereads_changed_files(docs, index):
+    stats = index.update(docs)
+    assert stats["indexed"] == 0 and stats["unchanged"] == 5
+    _write(os.path.join(docs, "gamma.txt"), "durian")
+    os.utime(os.path.join(docs, "gamma.txt"), (1, 1))
+    os.remove(os.path.join(docs, "beta.md"))
+    stats = index.update(docs)
+    assert (stats["indexed"], stats["removed"], stats["unchanged"]) == (1, 1, 3)
+    assert _paths(index.search("durian")) == ["gamma.txt"]
+    assert "beta.md" not in _paths(index.search("apple"))
+
+
+def test_binary_and_oversized_files_are_not_reread(docs, tmp_path, monkeypatch):
+    with open(os.path.join(docs, "blob.bin"), "wb") as f:
+        f.write(b"apple\0" * 10)
+    _write(os.path.join(docs, "huge.md"), "apple " * 100)
+    content_index = ContentIndex(":memory:", max_file_size=300, max_staleness=0)
+    assert content_index.update(docs)["skipped"] == 2
+
+    import tools.content_index as module
+    read = []
+    original = module.read_text
+    monkeypatch.setattr(module, "read_text", lambda path, max_bytes: read.append(path) or original(path, max_bytes))
+    stats = content_index.update(docs)
+    assert read == [] and stats["skipped"] == 0 and stats["unchanged"] == 7
+    assert "blob.bin" not in _paths(content_index.search("apple"))
+
+
+def test_skipped_files_do_not_count_towards_bm25_stats(docs):
+    with open(os.path.join(docs, "blob.bin"), "wb") as f:
+        f.write(b"\0")
+    with_blob = ContentIndex(":memory:", max_staleness=0)
+    with_blob.update(docs)
+    os.remove(os.path.join(docs, "blob.bin"))
+    without_blob = ContentIndex(":memory:", max_staleness=0)
+    without_blob.update(docs)
+    assert with_blob.search("apple") == without_blob.search("apple")
+
+
+def test_old_schema_is_rebuilt(tmp_path):
+    db_path = str(tmp_path / "content_index.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE docs (id INTEGER PRIMARY KEY, path TEXT, mtime REAL, size INTEGER, length INTEGER)")
+    conn.execute("INSERT INTO docs VALUES (1, '/old', 0, 0, 0)")
+    conn.commit()
+    conn.close()
+    content_index = ContentIndex(db_path)
+    assert content_index._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 0
+    content_index.close()
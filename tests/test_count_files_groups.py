@@ -0,0 +1,75 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from tools.file_index import FileIndex, set_file_index
+from tools.local_seach_tools import count_files
+
+DAY = 24 * 3600
+#本地时间中午，避免时区导致跨日
+BASE = time.mktime(datetime(2024, 3, 15, 12, 0, 0).timetuple())
+
+
+def _write(path, size, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture(params=["walk", "index"])
+def tree(tmp_path, request):
+    _write(str(tmp_path / "a.py"), 10, BASE)
+    _write(str(tmp_path / "B.PY"), 20, BASE)
+    _write(str(tmp_path / "README"), 5, BASE - 40 * DAY)
+    _write(str(tmp_path / ".bashrc"), 1, BASE - 40 * DAY)
+    _write(str(tmp_path / "docs" / "x.md"), 100, BASE - 1 * DAY)
+    _write(str(tmp_path / "docs" / "deep" / "y.md"), 200, BASE - 400 * DAY)
+    _write(str(tmp_path / "src" / "z.py"), 30, BASE)
+    if request.param == "index":
+        file_index = FileIndex(":memory:")
+        file_index.build(str(tmp_path))
+        set_file_index(file_index)
+        yield str(tmp_path)
+        set_file_index(None)
+        file_index.close()
+    else:
+        yield str(tmp_path)
+
+
+def _groups(result):
+    return {key: (value["count"], value["bytes"]) for key, value in result["groups"].items()}
+
+
+def test_group_by_extension(tree):
+    result = count_files(tree, recursive=True, group_by="extension")
+    assert _groups(result) == {".py": (3, 60), ".md": (2, 300), "(none)": (2, 6)}
+    assert result["total"] == 7 and result["total_bytes"] == 366
+    assert list(result["groups"])[0] == ".py"#按数量降序
+
+
+def test_group_by_directory_uses_first_level(tree):
+    result = count_files(tree, "*.*", recursive=True, group_by="directory")
+    assert _groups(result) == {".": (3, 31), "docs": (2, 300), "src": (1, 30)}
+
+
+def test_group_by_mtime_buckets(tree):
+    assert _groups(count_files(tree, recursive=True, group_by="mtime", mtime_bucket="year")) == {
+        "2024": (6, 166), "2023": (1, 200)}
+    assert _groups(count_files(tree, recursive=True, group_by="mtime")) == {
+        "2024-03": (4, 160), "2024-02": (2, 6), "2023-02": (1, 200)}
+    assert _groups(count_files(tree, recursive=True, group_by="mtime", mtime_bucket="day"))["2024-03-14"] == (1, 100)
+
+
+def test_group_by_respects_pattern_and_recursion(tree):
+    assert _groups(count_files(tree, "*.md", recursive=False, group_by="extension")) == {}
+    assert _groups(count_files(tree, "*.md", recursive=True, group_by="extension")) == {".md": (2, 300)}
+
+
+def test_invalid_group_by(tree):
+    with pytest.raises(Exception, match="不支持的group_by"):
+        count_files(tree, group_by="size")
+    with pytest.raises(Exception, match="不支持的mtime_bucket"):
+        count_files(tree, group_by="mtime", mtime_bucket="hour")
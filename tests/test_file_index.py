@@ -0,0 +1,100 @@
+import os
+import shutil
+
+import pytest
+
+from tools.file_index import FileIndex, lookup_index, set_file_index
+from tools.local_seach_tools import count_files, find_files
+
+
+def _touch(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    _touch(str(tmp_path / "a.py"))
+    _touch(str(tmp_path / "b.txt"))
+    _touch(str(tmp_path / "sub" / "c.py"))
+    _touch(str(tmp_path / "sub" / "deep" / "d.py"))
+    _touch(str(tmp_path / "node_modules" / "e.py"))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def index(tree):
+    file_index = FileIndex(":memory:")
+    file_index.build(tree)
+    set_file_index(file_index)
+    yield file_index
+    set_file_index(None)
+    file_index.close()
+
+
+def test_build_and_query(tree, index):
+    assert index.count(tree, "*", recursive=True) == 4#node_modules被排除
+    assert index.count(tree, "*.py", recursive=False) == 1
+    names = sorted(row[0] for row in index.query(tree, "*.py", recursive=True, columns="name"))
+    assert names == ["a.py", "c.py", "d.py"]
+
+
+def test_lookup_index_only_for_supported_queries(tree, index):
+    assert lookup_index(tree, "*.py") is index
+    assert lookup_index(tree, "sub/*.py") is None#带路径分隔符的模式回退到遍历
+    assert lookup_index(os.path.dirname(tree), "*") is None#未被索引的路径
+
+
+def test_new_file_makes_index_stale_and_refresh_picks_it_up(tree, index):
+    assert not index.is_stale(tree)
+    _touch(os.path.join(tree, "sub", "new.py"))
+    assert index.is_stale(tree)
+    assert index.stale_dirs(tree) == [os.path.join(tree, "sub")]
+    stats = index.refresh(tree)
+    assert stats["rescanned_dirs"] == 1
+    assert not index.is_stale(tree)
+    assert index.count(tree, "*.py", recursive=True) == 4
+
+
+def test_non_recursive_staleness_only_reads_the_queried_dir(tree, index):
+    _touch(os.path.join(tree, "sub", "deep", "new.py"))
+    assert not index.is_stale(tree, recursive=False)
+    assert index.is_stale(tree, recursive=True)
+
+
+def test_directory_created_after_build_is_found(tree, index):
+    _touch(os.path.join(tree, "new", "y.py"))
+    listing = find_files(os.path.join(tree, "new"))
+    assert [record.name for record in listing] == ["y.py"]
+    assert count_files(os.path.join(tree, "new"))["total"] == 1
+    assert index.has_dir(os.path.join(tree, "new"))#从父目录增量刷新后已入索引
+
+
+def test_excluded_directory_falls_back_to_walker(tree, index):
+    assert lookup_index(os.path.join(tree, "node_modules"), "*") is None
+    assert count_files(os.path.join(tree, "node_modules"))["total"] == 1
+
+
+def test_refresh_removes_deleted_directories(tree, index):
+    shutil.rmtree(os.path.join(tree, "sub"))
+    stats = index.refresh(tree)
+    assert stats["removed_dirs"] >= 1
+    assert index.count(tree, "*", recursive=True) == 2
+    assert not index.has_dir(os.path.join(tree, "sub", "deep"))
+
+
+def test_lookup_without_auto_refresh_returns_none_when_stale(tree, index):
+    index.auto_refresh = False
+    _touch(os.path.join(tree, "c.txt"))
+    assert lookup_index(tree, "*") is None
+
+
+def test_refresh_of_new_directory_goes_through_its_ancestor(tree, index):
+    new_dir = os.path.join(tree, "sub", "new", "leaf")
+    _touch(os.path.join(new_dir, "z.py"))
+    assert index.stale_dirs(new_dir) == []
+    stats = index.refresh(new_dir)
+    assert stats["rescanned_dirs"] == 1
+    assert index.has_dir(new_dir)
+    assert index.count(new_dir, "*.py", recursive=True) == 1
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from tools.file_index import FileIndex, set_file_index
+from tools.local_seach_tools import find_files
+
+ORDERS = ["name", "newest", "oldest", "largest", "smallest"]
+
+
+def _write(path, size, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture(params=["walk", "index"])
+def tree(tmp_path, request):
+    #大小、时间与文件名都有并列，检验并列时按路径排序
+    _write(str(tmp_path / "a.py"), 10, 1_000_000)
+    _write(str(tmp_path / "b.py"), 30, 3_000_000)
+    _write(str(tmp_path / "same.py"), 20, 2_000_000)
+    _write(str(tmp_path / "x" / "same.py"), 20, 2_000_000)
+    _write(str(tmp_path / "y" / "same.py"), 20, 2_000_000)
+    _write(str(tmp_path / "y" / "c.py"), 40, 4_000_000)
+    _write(str(tmp_path / "z" / "d.py"), 5, 500_000)
+    if request.param == "index":
+        file_index = FileIndex(":memory:")
+        file_index.build(str(tmp_path))
+        set_file_index(file_index)
+        yield str(tmp_path)
+        set_file_index(None)
+        file_index.close()
+    else:
+        yield str(tmp_path)
+
+
+def _all_pages(tree, order_by, limit):
+    paths, cursor = [], None
+    while True:
+        page = find_files(tree, "*.py", recursive=True, limit=limit, cursor=cursor, order_by=order_by)
+        assert len(page["files"]) <= limit
+        paths.extend(item["path"] for item in page["files"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return paths
+        cursor = page["next_cursor"]
+
+
+@pytest.mark.parametrize("order_by", ORDERS)
+@pytest.mark.parametrize("limit", [1, 2, 3, 100])
+def test_pages_concatenate_to_the_full_sort(tree, order_by, limit):
+    full = [item["path"] for item in find_files(tree, "*.py", recursive=True, order_by=order_by)]
+    assert len(full) == 7
+    assert _all_pages(tree, order_by, limit) == full
+
+
+def test_ties_are_ordered_by_path(tree):
+    same = os.path.join("x", "same.py"), os.path.join("y", "same.py")
+    for order_by in ORDERS:
+        paths = [item["path"] for item in find_files(tree, "*.py", recursive=True, order_by=order_by)]
+        tied = [p for p in paths if os.path.basename(p) == "same.py"]
+        assert tied == ["same.py", *same]
+
+
+def test_top_k(tree):
+    page = find_files(tree, "*.py", recursive=True, limit=2, order_by="largest")
+    assert [item["path"] for item in page["files"]] == [os.path.join("y", "c.py"), "b.py"]
+    assert [item["size"] for item in page["files"]] == [40, 30]
+    page = find_files(tree, "*.py", recursive=True, limit=1, order_by="newest")
+    assert page["files"][0]["name"] == "c.py" and "modified" in page["files"][0]
+
+
+def test_cursor_is_stable_when_earlier_files_appear(tree):
+    first = find_files(tree, "*.py", recursive=True, limit=3, order_by="name")
+    _write(os.path.join(tree, "0_first.py"), 1, 1)#排在游标之前的新文件不会让下一页重复或漏掉
+    rest = find_files(tree, "*.py", recursive=True, limit=100, cursor=first["next_cursor"], order_by="name")
+    seen = [item["path"] for item in first["files"] + rest["files"]]
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_invalid_cursor(tree):
+    with pytest.raises(Exception, match="无效的cursor"):
+        find_files(tree, "*.py", recursive=True, limit=2, cursor="not-a-cursor")
+    cursor = find_files(tree, "*.py", recursive=True, limit=2, order_by="largest")["next_cursor"]
+    with pytest.raises(Exception, match="order_by='largest'"):
+        find_files(tree, "*.py", recursive=True, limit=2, cursor=cursor, order_by="name")
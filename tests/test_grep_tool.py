@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from tools import grep_tool
+from tools.grep_tool import grep_file, grep_iter
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(grep_tool, "POOL_WORKERS", 4)#单核机器上也走进程池
+    grep_tool.shutdown_pool()
+    yield
+    grep_tool.shutdown_pool()
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    for i in range(grep_tool.CHUNK_FILES * 3):#多于一批，走进程池
+        (tmp_path / f"m{i:03d}.py").write_text(f"import os\ndef func_{i}():\n    return 'def inner'\n")
+    (tmp_path / "blob.py").write_bytes(b"def \x00binary")
+    return tmp_path
+
+
+def test_anchors_match_per_line(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("import os\ndef f():\n    x = 'def g'\nDEF h\n")
+    assert [line for _, line, _ in grep_file(str(path), r"^def", regex=True)] == [2]
+    assert [line for _, line, _ in grep_file(str(path), r"^def", regex=True, ignore_case=True)] == [2, 4]
+    assert [line for _, line, _ in grep_file(str(path), r"\)\:$", regex=True)] == [2]
+    assert [line for _, line, _ in grep_file(str(path), "def", max_matches=5)] == [2, 3]
+
+
+def test_in_process_and_pool_results_agree(pool, source_tree):
+    serial = sorted(grep_iter(r"^def ", str(source_tree), "*.py", regex=True, workers=1))
+    parallel = sorted(grep_iter(r"^def ", str(source_tree), "*.py", regex=True, workers=4))
+    assert len(serial) == grep_tool.CHUNK_FILES * 3
+    assert serial == parallel
+    assert grep_tool._pool is not None
+
+
+def test_concurrent_calls_with_different_workers_share_the_pool(pool, source_tree):
+    expected = grep_tool.CHUNK_FILES * 3
+    results, errors = {}, []
+
+    def run(workers):
+        try:
+            results[workers] = len(list(grep_iter(r"^def ", str(source_tree), "*.py", regex=True, workers=workers)))
+        except Exception as e:#之前换workers会重建进程池并取消其他线程的批次
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(workers,)) for workers in (2, 3, 4, 8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert results == {2: expected, 3: expected, 4: expected, 8: expected}
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from tools.file_index import FileIndex
+from tools.index_watcher import IN_Q_OVERFLOW, IndexWatcher, _EVENT_HEADER, inotify_available
+
+pytestmark = pytest.mark.skipif(not inotify_available(), reason="需要inotify")
+
+
+def _touch(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def watched(tmp_path):
+    _touch(str(tmp_path / "a.py"))
+    _touch(str(tmp_path / "sub" / "b.py"))
+    index = FileIndex(":memory:")
+    watcher = IndexWatcher(index, str(tmp_path)).start()
+    yield str(tmp_path), index, watcher
+    watcher.stop()
+    index.close()
+
+
+def test_new_files_and_directories_are_indexed(watched):
+    root, index, _ = watched
+    _touch(os.path.join(root, "sub", "c.py"))
+    _touch(os.path.join(root, "new", "deep", "d.py"))
+    assert _wait_for(lambda: index.count(root, "*.py", recursive=True) == 4)
+    assert not index.is_stale(root)
+
+
+def test_deleted_file_is_removed(watched):
+    root, index, _ = watched
+    os.remove(os.path.join(root, "sub", "b.py"))
+    assert _wait_for(lambda: index.count(root, "*.py", recursive=True) == 1)
+
+
+def test_excluded_segments_are_ignored_at_any_depth(watched):
+    root, index, watcher = watched
+    _touch(os.path.join(root, "node_modules", "x", "y.py"))
+    _touch(os.path.join(root, "marker.py"))#事件按顺序处理，看到它说明前面的已处理完
+    assert _wait_for(lambda: index.count(root, "marker.py", recursive=True) == 1)
+    assert index.count(root, "y.py", recursive=True) == 0
+    assert not any("node_modules" in path for path in watcher._path_to_wd)
+    assert watcher.excluded(os.path.join(root, "node_modules", "x", "y.py"))
+    assert not watcher.excluded(root)
+
+
+def test_overflow_refreshes_and_restores_watches(watched):
+    root, index, watcher = watched
+    sub = os.path.join(root, "sub")
+    watcher._remove_watch_tree(sub)#模拟溢出期间丢失的事件与watch
+    _touch(os.path.join(sub, "lost.py"))
+    watcher._dispatch(_EVENT_HEADER.pack(-1, IN_Q_OVERFLOW, 0, 0))
+    assert index.count(root, "lost.py", recursive=True) == 1
+    assert sub in watcher._path_to_wd
+    _touch(os.path.join(sub, "after.py"))
+    assert _wait_for(lambda: index.count(root, "after.py", recursive=True) == 1)
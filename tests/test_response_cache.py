@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from generative_model.model import Generative_Model
+from generative_model.response_cache import MemoryResponseCache, ResponseCache, cache_key, endpoint_id
+from py_model import Message
+
+
+class FakeClient:
+    """只实现chat.completions.create的客户端替身，记录实际发出的请求数"""
+
+    def __init__(self, base_url, api_key, reply):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._reply = reply
+
+    async def _create(self, model, messages, stream=False):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self._reply))])
+
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+def test_response_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseCache()
+
+    class Partial(ResponseCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_cache_key_includes_endpoint_and_credential():
+    a = cache_key("m", MESSAGES, endpoint_id("http://a/v1", "key-1"))
+    assert a == cache_key("m", MESSAGES, endpoint_id("http://a/v1/", "key-1"))
+    assert a != cache_key("m", MESSAGES, endpoint_id("http://b/v1", "key-1"))
+    assert a != cache_key("m", MESSAGES, endpoint_id("http://a/v1", "key-2"))
+    assert "key-1" not in endpoint_id("http://a/v1", "key-1")
+
+
+def test_endpoints_do_not_share_cache_or_inflight_requests():
+    cache = MemoryResponseCache()
+    client_a = FakeClient("http://a/v1", "key", "from a")
+    client_b = FakeClient("http://b/v1", "key", "from b")
+    model_a = Generative_Model("m", cache=cache, client=client_a)
+    model_b = Generative_Model("m", cache=cache, client=client_b)
+
+    async def main():
+        return await asyncio.gather(model_a.generate(MESSAGES), model_a.generate(MESSAGES),
+                                    model_b.generate(MESSAGES))
+
+    assert asyncio.run(main()) == ["from a", "from a", "from b"]
+    assert (client_a.calls, client_b.calls) == (1, 1)#同端点合并，不同端点各发一次
+    assert asyncio.run(model_b.generate(MESSAGES)) == "from b"#缓存命中，不串端点
+    assert client_b.calls == 1
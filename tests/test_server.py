@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from agents.server import AgentServer, InvalidBudget, ServerBusy
+
+
+class FakeAgent:
+    """按query决定行为的agent替身：'slow' 等待release，'fail' 抛ValueError"""
+
+    max_iteration = 5
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def execute(self, query, state):
+        if query == "slow":
+            await self.release.wait()
+        if query == "fail":
+            raise ValueError("agent内部错误")
+        state.answer = query
+        state.stop_reason = "answer"
+
+
+async def _request(port, body):
+    raw = json.dumps(body).encode()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"POST /query HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n" % len(raw) + raw)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, payload = data.decode().partition("\r\n\r\n")
+    return head.splitlines()[0], json.loads(payload)
+
+
+def test_invalid_budget_is_rejected_before_a_session_is_created():
+    async def main():
+        async with AgentServer(agent=FakeAgent(), workers=1) as server:
+            for value in (0, -1, "3", 1.5, True):
+                with pytest.raises(InvalidBudget):
+                    await server.submit("q", session_id="s", max_steps=value)
+            assert server.sessions == {}
+            assert (await server.submit("q", session_id="s", max_steps=1))["answer"] == "q"
+
+    asyncio.run(main())
+
+
+def test_rejected_request_does_not_create_a_session():
+    async def main():
+        agent = FakeAgent()
+        async with AgentServer(agent=agent, workers=1, max_queue=1) as server:
+            running = asyncio.ensure_future(server.submit("slow", session_id="a"))
+            await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(server.submit("slow", session_id="a"))
+            await asyncio.sleep(0.01)
+            with pytest.raises(ServerBusy):
+                await server.submit("q", session_id="b")
+            assert set(server.sessions) == {"a"} and server.rejected == 1
+            agent.release.set()
+            await asyncio.gather(running, queued)
+
+    asyncio.run(main())
+
+
+def test_http_status_codes():
+    async def main():
+        async with AgentServer(agent=FakeAgent(), workers=1) as server:
+            port = (await server.serve(port=0)).sockets[0].getsockname()[1]
+            assert await _request(port, {"query": "q", "max_steps": 0}) == (
+                "HTTP/1.1 400 Bad Request", {"error": "max_steps 应为正整数，实际为 0"})
+            status, payload = await _request(port, {"query": "fail"})
+            assert status == "HTTP/1.1 500 Internal Server Error"#agent自身的ValueError不算请求错误
+            status, payload = await _request(port, {"query": "q", "session": "s"})
+            assert status == "HTTP/1.1 200 OK" and payload["answer"] == "q" and payload["session"] == "s"
+
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+import ast
+import os
+import time
+
+import pytest
+
+from tools.file_index import FileIndex, set_file_index
+from tools.local_seach_tools import count_files
+from tools.tool_cache import ToolResultCache, normalize_args
+from tools.tools import NAME, tool
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    _touch(str(tmp_path / "a.py"))
+    _touch(str(tmp_path / "sub" / "deep" / "b.py"))
+    return str(tmp_path)
+
+
+def _counter(cache):
+    counting = tool(NAME.COUNT_FILES, count_files, cache=cache)
+
+    def total(**kwargs):
+        return ast.literal_eval(counting._call_cached(**kwargs))["total"]
+
+    return total
+
+
+def test_repeated_call_hits_and_normalized_args_share_a_key(tree):
+    cache = ToolResultCache()
+    total = _counter(cache)
+    assert total(path=tree, recursive=True) == 2
+    assert total(path=tree + os.sep, recursive=True, file_pattern="*") == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert normalize_args(count_files, {"path": tree}) == normalize_args(count_files, {"path": tree + "/.", "recursive": False})
+
+
+def test_different_arguments_miss(tree):
+    cache = ToolResultCache()
+    total = _counter(cache)
+    assert total(path=tree, recursive=True) == 2
+    assert total(path=tree, recursive=False) == 1
+    assert total(path=tree, recursive=True, file_pattern="*.txt") == 0
+    assert cache.stats()["hits"] == 0 and cache.stats()["entries"] == 3
+
+
+def test_new_file_in_queried_directory_invalidates(tree):
+    cache = ToolResultCache()
+    total = _counter(cache)
+    assert total(path=tree) == 1
+    _touch(os.path.join(tree, "c.py"))
+    assert total(path=tree) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_stat_dependent_calls_are_not_cached(tree):
+    cache = ToolResultCache()
+    total = _counter(cache)
+    total(path=tree, with_size=True)
+    total(path=tree, group_by="extension")
+    assert cache.stats()["entries"] == 0
+
+
+def test_deep_change_without_index_expires_after_shallow_ttl(tree):
+    cache = ToolResultCache(shallow_ttl=0.2)
+    total = _counter(cache)
+    assert total(path=tree, recursive=True) == 2
+    _touch(os.path.join(tree, "sub", "deep", "c.py"))#二级以下目录的变化不改变签名
+    assert total(path=tree, recursive=True) == 2
+    time.sleep(0.25)
+    assert total(path=tree, recursive=True) == 3
+
+
+def test_deep_change_with_index_invalidates_immediately(tree):
+    file_index = FileIndex(":memory:")
+    file_index.build(tree)
+    set_file_index(file_index)
+    try:
+        cache = ToolResultCache(shallow_ttl=None)
+        total = _counter(cache)
+        assert total(path=tree, recursive=True) == 2
+        _touch(os.path.join(tree, "sub", "deep", "c.py"))
+        assert total(path=tree, recursive=True) == 3
+    finally:
+        set_file_index(None)
+        file_index.close()
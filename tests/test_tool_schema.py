@@ -0,0 +1,25 @@
+from tools.local_seach_tools import count_files, find_files
+from tools.tool_schema import build_schema
+
+
+def _description(func, name: str) -> str:
+    return build_schema(func.__name__, func)["parameters"]["properties"][name]["description"]
+
+
+def test_order_by_description_keeps_option_explanations():
+    description = _description(find_files, "order_by")
+    assert description.startswith("排序方式，默认为 'name'。")#句中的默认值说明不能被截掉
+    for value in ("'name'", "'newest' / 'oldest'", "'largest' / 'smallest'", "'none'"):
+        assert value in description
+    assert "按文件大小" in description
+
+
+def test_trailing_default_sentence_is_stripped():
+    assert _description(find_files, "recursive") == "是否递归搜索子目录。"
+    assert _description(find_files, "path") == "要搜索的目录路径。"#路径格式等非可选值列表项不附加
+
+
+def test_group_by_options_are_listed():
+    description = _description(count_files, "group_by")
+    assert "默认为" not in description
+    assert "'extension' 按扩展名" in description and "'mtime'" in description
@@ -0,0 +1,89 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from tools.walker import PatternMatcher, Walker
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for rel in ("a.py", "b.txt", ".hidden.py", "sub/c.py", "sub/d.md", "sub/deep/e.py", "sub/deep/deeper/f.py",
+                "other/sub/g.py", "node_modules/pkg/h.py", ".git/objects/i.py"):
+        _touch(str(tmp_path / rel))
+    return tmp_path
+
+
+def _rel(root, entries):
+    return sorted(os.path.relpath(entry.path, root).replace(os.sep, "/") for entry in entries)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_excluded_directories_are_pruned(tree, workers):
+    found = _rel(tree, Walker(workers=workers).walk(str(tree), "*.py", recursive=True))
+    assert found == [".hidden.py", "a.py", "other/sub/g.py", "sub/c.py", "sub/deep/deeper/f.py", "sub/deep/e.py"]
+    everything = _rel(tree, Walker(workers=workers, excludes=()).walk(str(tree), "*.py", recursive=True))
+    assert "node_modules/pkg/h.py" in everything and ".git/objects/i.py" in everything
+
+
+def test_excluded_directory_is_never_scanned(tree, monkeypatch):
+    scanned = []
+    original = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scanned.append(str(path)) or original(path))
+    list(Walker(workers=1).walk(str(tree), "*", recursive=True))
+    assert not any("node_modules" in path or ".git" in path for path in scanned)
+
+
+def test_max_depth(tree):
+    walker = Walker(workers=1, max_depth=1)
+    assert _rel(tree, walker.walk(str(tree), "*.py", recursive=True)) == [".hidden.py", "a.py", "sub/c.py"]
+    assert Walker(workers=1, max_depth=0).count(str(tree), "*", recursive=True) == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="需要符号链接")
+@pytest.mark.parametrize("workers", [1, 4])
+def test_symlink_loops_are_visited_once(tree, workers):
+    os.symlink(str(tree / "sub"), str(tree / "sub" / "deep" / "loop"))
+    os.symlink(str(tree), str(tree / "other" / "up"))
+    following = Walker(workers=workers, follow_symlinks=True)
+    assert following.count(str(tree), "*.py", recursive=True) == 6#每个真实目录只进入一次
+    not_following = Walker(workers=workers)
+    assert not_following.count(str(tree), "*.py", recursive=True) == 6
+
+
+@pytest.mark.parametrize("pattern", ["*.py", "*", "?.py", "[ab]*", "sub/*.py", "deep/*.py", "*/*.py", "sub/*/*.py"])
+@pytest.mark.parametrize("recursive", [False, True])
+def test_pattern_matcher_agrees_with_path_glob(tree, pattern, recursive):
+    glob_pattern = "**/" + pattern if recursive else pattern
+    expected = sorted(os.path.relpath(p, tree).replace(os.sep, "/") for p in Path(tree).glob(glob_pattern) if p.is_file())
+    found = _rel(tree, Walker(workers=1, excludes=()).walk(str(tree), pattern, recursive))
+    assert found == expected
+
+
+def test_pattern_matcher_segments():
+    matcher = PatternMatcher("sub/*.py", recursive=False)
+    assert matcher.match("c.py", ("sub",)) and not matcher.match("c.py", ()) and not matcher.match("c.py", ("x", "sub"))
+    assert PatternMatcher("sub/*.py", recursive=True).match("c.py", ("x", "sub"))
+    assert matcher.max_depth() == 1 and PatternMatcher("*.py", recursive=True).max_depth() is None
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_cancel_event_stops_the_walk(tree, workers):
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert list(Walker(workers=workers).walk(str(tree), "*", recursive=True, cancel_event=cancel_event)) == []
+
+    cancel_event = threading.Event()
+    walker = Walker(workers=workers)
+    seen = []
+    for entry in walker.walk(str(tree), "*", recursive=True, cancel_event=cancel_event):
+        seen.append(entry)
+        cancel_event.set()#拿到第一批结果后取消
+    assert 0 < len(seen) < walker.count(str(tree), "*", recursive=True)
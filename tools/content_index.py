@@ -0,0 +1,426 @@
+import fnmatch
+import math
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tools.file_index import get_file_index, lookup_index
+from tools.walker import PatternMatcher, walk_files
+
+
+# 字母/数字（含带重音的拉丁字母、西里尔字母等）按词切分，下划线视为分隔；
+# 中日韩字符按单字切分（多字词通过位置做短语匹配）
+_CJK = "぀-ヿ㐀-䶿一-鿿가-힯"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|(?:(?![{_CJK}])[^\W_])+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+_QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+# 表结构或分词规则变化时加一，旧版本的索引整体丢弃后增量重建
+_SCHEMA_VERSION = 2
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id      INTEGER PRIMARY KEY,
+    path    TEXT NOT NULL UNIQUE,
+    mtime   REAL NOT NULL,
+    size    INTEGER NOT NULL,
+    length  INTEGER NOT NULL,
+    skipped INTEGER NOT NULL DEFAULT 0  -- 1: 二进制/过大/空文件，只记mtime与size，不再重复读取
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term      TEXT NOT NULL,
+    doc_id    INTEGER NOT NULL,
+    tf        INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+"""
+
+BINARY_SNIFF_BYTES = 8192
+DEFAULT_CACHE_DIR = "~/.cache/local_file_search" #可用环境变量 LFS_CACHE_DIR 覆盖
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def is_binary(head: bytes) -> bool:
+    """前几KB里出现NUL字节即视为二进制文件"""
+    return b"\0" in head
+
+
+def read_text(path: str, max_bytes: int) -> Optional[str]:
+    """
+    通过mmap读取文本文件，二进制文件、空文件或超过max_bytes的文件返回None
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > max_bytes:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if is_binary(mm[:BINARY_SNIFF_BYTES]):
+                    return None
+                return mm[:].decode("utf-8", errors="ignore")
+    except (OSError, ValueError):
+        return None
+
+
+class ContentIndex:
+    """
+    文件内容倒排索引
+    功能：
+    - 英文按词、中日韩按字切分，保存带位置的倒排表（支持短语匹配）
+    - BM25排序
+    - 通过mmap读文件，按mtime/size增量更新，未变化的文件不会重读（不入索引的文件也记下mtime，同样不重读）
+    - 同一范围在max_staleness秒内只检查一次；全局FileIndex覆盖该路径时从索引取候选文件（只刷新mtime变化的目录）
+    """
+
+    def __init__(self, db_path: str = "content_index.db", max_file_size: int = 10 * 1024 * 1024,
+                 k1: float = 1.2, b: float = 0.75, max_staleness: float = 10.0):
+        """
+        Args:
+            db_path: 索引文件路径，':memory:' 表示仅在内存中
+            max_file_size: 超过该字节数的文件不入索引
+            k1: BM25词频饱和参数
+            b: BM25文档长度归一化参数
+            max_staleness: 检查结果的缓存秒数，期间再次update同一范围直接返回，0表示每次都检查
+        """
+        self.db_path = db_path
+        self.max_file_size = max_file_size
+        self.max_staleness = max_staleness
+        self._fresh_until: Dict[Tuple[str, str, bool], float] = {}
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self._conn.executescript("DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS docs;")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------ 建立/更新
+
+    def update(self, path: str = ".", file_pattern: str = "*", recursive: bool = True,
+               force: bool = False) -> Dict[str, int]:
+        """
+        增量索引path下匹配的文件：新增/变化的文件重建倒排，已删除的文件移出索引
+        @param force: 忽略max_staleness，立即检查
+        @return: 更新统计，fresh为1表示在有效期内、未做检查
+        """
+        root = Path(path).expanduser().resolve()
+        if not root.exists():
+            raise FileNotFoundError(f"路径不存在: {path}")
+        stats = {"indexed": 0, "unchanged": 0, "skipped": 0, "removed": 0, "fresh": 0}
+        scope = (str(root), file_pattern, recursive)
+        if not force and self._is_fresh(scope):
+            stats["fresh"] = 1
+            return stats
+
+        with self._lock:
+            known = self._known_docs(str(root), recursive)
+        seen = set()
+        for file_path, mtime, size in self._candidates(root, file_pattern, recursive):
+            seen.add(file_path)
+            old = known.get(file_path)
+            if old is not None and old[1] == mtime and old[2] == size:
+                stats["unchanged"] += 1
+                continue
+            if self.add_file(file_path, mtime, size):
+                stats["indexed"] += 1
+            else:
+                stats["skipped"] += 1
+
+        matcher = PatternMatcher(file_pattern, recursive)#只清理本次遍历范围内、符合模式却没有出现的文件
+        with self._lock, self._conn:
+            for doc_path, (doc_id, _, _) in known.items():
+                if doc_path in seen:
+                    continue
+                rel_dirs = Path(os.path.relpath(os.path.dirname(doc_path), root)).parts
+                if rel_dirs == (".",):
+                    rel_dirs = ()
+                if matcher.match(os.path.basename(doc_path), rel_dirs):
+                    self._remove_doc(doc_id)
+                    stats["removed"] += 1
+            if self.max_staleness > 0:
+                self._fresh_until[scope] = time.monotonic() + self.max_staleness
+        return stats
+
+    def _is_fresh(self, scope: Tuple[str, str, bool]) -> bool:
+        """本范围或包含它的递归全量范围在有效期内检查过"""
+        now = time.monotonic()
+        root = scope[0]
+        with self._lock:#add_file/remove_file可能在其他线程里clear
+            fresh = list(self._fresh_until.items())
+        for (fresh_root, pattern, recursive), until in fresh:
+            if until <= now:
+                continue
+            if (fresh_root, pattern, recursive) == scope:
+                return True
+            if pattern == "*" and recursive and (root == fresh_root or root.startswith(fresh_root.rstrip(os.sep) + os.sep)):
+                return True
+        return False
+
+    @staticmethod
+    def _candidates(root: Path, file_pattern: str, recursive: bool) -> Iterator[Tuple[str, float, int]]:
+        """
+        (路径, mtime, size)：全局FileIndex覆盖该路径时直接查索引（过期时只重扫mtime变化的目录），否则遍历并stat
+        与FileIndex相同，原地改写内容而目录mtime不变时，只有运行inotify watcher才能及时发现
+        """
+        index = lookup_index(root, file_pattern, recursive)
+        if index is not None:
+            yield from index.query(str(root), file_pattern, recursive, columns="path, mtime, size")
+            return
+        for entry in walk_files(root, file_pattern, recursive):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            yield entry.path, st.st_mtime, st.st_size
+
+    def _known_docs(self, root: str, recursive: bool) -> Dict[str, Tuple[int, float, int]]:
+        clause, params = self._scope_filter(root, recursive)
+        rows = self._conn.execute(f"SELECT path, id, mtime, size FROM docs WHERE {clause}", params).fetchall()
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    @staticmethod
+    def _scope_filter(root: str, recursive: bool) -> Tuple[str, tuple]:
+        """docs表中root下文档的条件，非递归时只要直接子文件"""
+        prefix = root.rstrip(os.sep) + os.sep
+        clause = "path >= ? AND path < ?"
+        params: tuple = (prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+        if not recursive:
+            clause += " AND instr(substr(path, ?), ?) = 0"
+            params += (len(prefix) + 1, os.sep)
+        return clause, params
+
+    def add_file(self, path: str, mtime: Optional[float] = None, size: Optional[int] = None) -> bool:
+        """
+        (重新)索引单个文件
+        @return: 是否已入索引（二进制、过大或不可读的文件返回False，并记为skipped，mtime/size不变时不再读取）
+        """
+        if mtime is None or size is None:
+            st = os.stat(path)
+            mtime, size = st.st_mtime, st.st_size
+        text = read_text(path, self.max_file_size)
+
+        positions: Dict[str, array] = defaultdict(lambda: array("I"))
+        length = 0
+        if text is not None:
+            for pos, token in enumerate(tokenize(text)):
+                positions[token].append(pos)
+                length = pos + 1
+
+        with self._lock, self._conn:
+            self._fresh_until.clear()
+            row = self._conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._remove_doc(row[0])
+            doc_id = self._conn.execute(
+                "INSERT INTO docs (path, mtime, size, length, skipped) VALUES (?,?,?,?,?)",
+                (path, mtime, size, length, int(text is None)),
+            ).lastrowid
+            if text is None:
+                return False
+            self._conn.executemany(
+                "INSERT INTO postings VALUES (?,?,?,?)",
+                ((term, doc_id, len(pos), pos.tobytes()) for term, pos in positions.items()),
+            )
+        return True
+
+    def remove_file(self, path: str):
+        with self._lock, self._conn:
+            self._fresh_until.clear()
+            row = self._conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                self._remove_doc(row[0])
+
+    def _remove_doc(self, doc_id: int):
+        self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    # ------------------------------------------------------------------ 查询
+
+    @staticmethod
+    def parse_query(query: str) -> List[List[str]]:
+        """
+        把查询拆成若干短语，每个短语是一组需要连续出现的词
+        - 引号内的内容作为短语
+        - 连续的中文字符作为短语（如 发票 -> ['发', '票']）
+        - 其他词各自独立
+        """
+        phrases: List[List[str]] = []
+        for quoted, word in _QUERY_RE.findall(query):
+            if quoted:
+                tokens = tokenize(quoted)
+                if tokens:
+                    phrases.append(tokens)
+                continue
+            run: List[str] = []
+            for token in tokenize(word):
+                if _CJK_RE.fullmatch(token):
+                    run.append(token)
+                    continue
+                if run:
+                    phrases.append(run)
+                    run = []
+                phrases.append([token])
+            if run:
+                phrases.append(run)
+        return phrases
+
+    def _postings(self, term: str, doc_filter: Optional[Tuple[str, tuple]]) -> Dict[int, array]:
+        sql = "SELECT doc_id, positions FROM postings WHERE term = ?"
+        params: tuple = (term,)
+        if doc_filter is not None:
+            sql += f" AND doc_id IN (SELECT id FROM docs WHERE {doc_filter[0]})"
+            params += doc_filter[1]
+        result = {}
+        for doc_id, blob in self._conn.execute(sql, params):
+            positions = array("I")
+            positions.frombytes(blob)
+            result[doc_id] = positions
+        return result
+
+    @staticmethod
+    def _phrase_hits(postings: List[Dict[int, array]]) -> Dict[int, int]:
+        """返回 {doc_id: 短语出现次数}，利用位置信息判断相邻"""
+        if len(postings) == 1:
+            return {doc_id: len(pos) for doc_id, pos in postings[0].items()}
+        docs = set(postings[0])
+        for p in postings[1:]:
+            docs &= set(p)
+        hits = {}
+        for doc_id in docs:
+            starts = set(postings[0][doc_id])
+            for offset, p in enumerate(postings[1:], 1):
+                starts &= {pos - offset for pos in p[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                hits[doc_id] = len(starts)
+        return hits
+
+    def search(self, query: str, top_k: int = 10, path: Optional[str] = None,
+               file_pattern: str = "*", recursive: bool = True) -> List[Dict[str, object]]:
+        """
+        BM25检索，文档数与平均长度只按检索范围内的文档统计
+        @param query: 查询，引号内为短语
+        @param top_k: 返回条数
+        @param path: 只在该目录下检索
+        @param file_pattern: 只返回文件名匹配该模式的文件
+        @param recursive: 是否包含path的子目录
+        @return: [{'path', 'score'}]，按分数降序
+        """
+        phrases = self.parse_query(query)
+        if not phrases:
+            return []
+
+        doc_filter = None
+        if path is not None:
+            doc_filter = self._scope_filter(str(Path(path).expanduser().resolve()), recursive)
+
+        with self._lock:
+            clause, params = doc_filter if doc_filter is not None else ("1", ())
+            n_docs, avg_len = self._conn.execute(
+                f"SELECT COUNT(*), AVG(length) FROM docs WHERE skipped = 0 AND {clause}", params).fetchone()
+            if not n_docs:
+                return []
+            avg_len = avg_len or 1.0
+            scores: Dict[int, float] = defaultdict(float)
+            for phrase in phrases:
+                hits = self._phrase_hits([self._postings(term, doc_filter) for term in phrase])
+                if not hits:
+                    continue
+                df = len(hits)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * len(phrase)
+                lengths = self._doc_lengths(list(hits))
+                for doc_id, tf in hits.items():
+                    norm = self.k1 * (1 - self.b + self.b * lengths[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+            if file_pattern != "*":
+                paths = self._doc_paths([doc_id for doc_id, _ in ranked])
+                ranked = [kv for kv in ranked if fnmatch.fnmatch(os.path.basename(paths[kv[0]]), file_pattern)]
+            ranked = ranked[:top_k]
+            paths = self._doc_paths([doc_id for doc_id, _ in ranked])
+        return [{"path": paths[doc_id], "score": round(score, 4)} for doc_id, score in ranked]
+
+    def _doc_lengths(self, doc_ids: List[int]) -> Dict[int, int]:
+        return dict(self._select_docs("id, length", doc_ids))
+
+    def _doc_paths(self, doc_ids: List[int]) -> Dict[int, str]:
+        return dict(self._select_docs("id, path", doc_ids))
+
+    def _select_docs(self, columns: str, doc_ids: List[int]) -> Iterator[tuple]:
+        for start in range(0, len(doc_ids), 500):#SQLite参数个数有上限，分批查询
+            chunk = doc_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            yield from self._conn.execute(f"SELECT {columns} FROM docs WHERE id IN ({marks})", chunk)
+
+
+def snippet(path: str, query: str, width: int = 80, max_bytes: int = 10 * 1024 * 1024) -> str:
+    """返回文件中第一个查询词附近的一段文本，用于结果展示"""
+    text = read_text(path, max_bytes)
+    if not text:
+        return ""
+    lowered = text.lower()
+    hit = -1
+    for phrase in ContentIndex.parse_query(query):
+        needle = "".join(phrase) if _CJK_RE.fullmatch(phrase[0]) else phrase[0]
+        hit = lowered.find(needle)
+        if hit >= 0:
+            break
+    start = max(0, hit - width // 2) if hit >= 0 else 0
+    return " ".join(text[start:start + width].split())
+
+
+_default_content_index: Optional[ContentIndex] = None
+
+
+def set_content_index(index: Optional[ContentIndex]):
+    """设置search_content使用的全局内容索引"""
+    global _default_content_index
+    _default_content_index = index
+
+
+def default_db_path() -> str:
+    """
+    全局内容索引的位置：与全局FileIndex的数据库放在同一目录，
+    没有（或是内存索引）时放在 LFS_CACHE_DIR（默认 ~/.cache/local_file_search）下
+    """
+    file_index = get_file_index()
+    if file_index is not None and file_index.db_path != ":memory:":
+        cache_dir = Path(file_index.db_path).expanduser().resolve().parent
+    else:
+        cache_dir = Path(os.environ.get("LFS_CACHE_DIR") or DEFAULT_CACHE_DIR).expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return str(cache_dir / "content_index.db")
+
+
+def get_content_index() -> ContentIndex:
+    """获取全局内容索引，未设置时在default_db_path()创建"""
+    global _default_content_index
+    if _default_content_index is None:
+        _default_content_index = ContentIndex(default_db_path())
+    return _default_content_index
+
+
+if __name__ == "__main__":
+    content_index = ContentIndex(":memory:")
+    print(content_index.update(".", "*.py"))
+    print(content_index.search("find files"))
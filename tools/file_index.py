@@ -0,0 +1,462 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tools.walker import DEFAULT_EXCLUDES, Walker
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path   TEXT PRIMARY KEY,
+    name   TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    inode  INTEGER NOT NULL,
+    parent TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_files_parent ON files(parent, name);
+CREATE INDEX IF NOT EXISTS idx_files_name ON files(name);
+
+CREATE TABLE IF NOT EXISTS dirs (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    parent   TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS roots (
+    path     TEXT PRIMARY KEY,
+    built_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _prefix(root: str) -> str:
+    """子路径前缀，'/' 本身已带分隔符"""
+    return root if root.endswith(os.sep) else root + os.sep
+
+
+def _prefix_range(root: str) -> Tuple[str, str]:
+    """root下所有子路径在字典序上的半开区间 [lo, hi)，可以直接走主键索引"""
+    lo = _prefix(root)
+    hi = lo[:-1] + chr(ord(os.sep) + 1)
+    return lo, hi
+
+
+def to_sql_glob(file_pattern: str) -> Optional[str]:
+    """
+    把fnmatch风格的文件名模式转成SQLite GLOB模式。
+    模式里带路径分隔符时（如 'sub/*.py'）无法只靠name列匹配，返回None由调用方回退到实时遍历。
+    """
+    if "/" in file_pattern or os.sep in file_pattern:
+        return None
+    # fnmatch用 [!abc] 取反，SQLite GLOB用 [^abc]
+    return file_pattern.replace("[!", "[^")
+
+
+class FileIndex:
+    """
+    基于SQLite的文件元数据索引
+    功能：
+    - 一次遍历建立 path/name/suffix/size/mtime/inode/parent 索引
+    - 按glob模式（递归或非递归）直接查询索引，不再逐个stat
+    - 通过目录mtime判断索引是否过期，并只重扫mtime变化的目录做增量刷新
+    """
+
+    def __init__(self, db_path: str = "file_index.db", max_staleness: float = 0.0, auto_refresh: bool = True,
+                 excludes: Iterable[str] = DEFAULT_EXCLUDES):
+        """
+        Args:
+            db_path: 索引文件路径，':memory:' 表示仅在内存中
+            max_staleness: 过期检查结果的缓存秒数，0表示每次查询都检查
+            auto_refresh: 查询时发现过期是否先做增量刷新，False则回退到实时遍历
+            excludes: 不入索引的文件/目录名模式，应与遍历引擎保持一致，保证两条路径结果相同
+        """
+        self.is_excluded = Walker(excludes=excludes)._excluded
+        self.db_path = db_path
+        self.max_staleness = max_staleness
+        self.auto_refresh = auto_refresh
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._fresh_until: Dict[Tuple[str, bool], float] = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------ 建立
+
+    def build(self, root: str) -> int:
+        """
+        全量建立root下的索引（会先清空root下旧记录）
+        @param root: 要索引的目录
+        @return: 索引的文件数
+        """
+        root_path = str(Path(root).expanduser().resolve())
+        if not os.path.isdir(root_path):
+            raise FileNotFoundError(f"路径不存在: {root}")
+
+        with self._lock, self._conn:
+            self._delete_subtree(root_path)
+            total = 0
+            for file_rows, dir_rows in self._scan_tree(root_path):
+                self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?)", file_rows)
+                self._conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?,?,?)", dir_rows)
+                total += len(file_rows)
+            self._conn.execute("INSERT OR REPLACE INTO roots VALUES (?,?)", (root_path, time.time()))
+        self._fresh_until.clear()
+        return total
+
+    def _scan_tree(self, root: str, batch: int = 5000) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        """迭代式遍历目录树，按批产出文件行和目录行"""
+        file_rows: List[tuple] = []
+        dir_rows: List[tuple] = []
+        stack = [(root, os.path.dirname(root) if root != os.sep else None)]
+        while stack:
+            current, parent = stack.pop()
+            try:
+                dir_rows.append((current, os.stat(current).st_mtime_ns, parent))
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if self.is_excluded(entry.name):
+                            continue
+                        row = self._entry_row(entry, current)
+                        if row is not None:
+                            file_rows.append(row)
+                        elif entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, current))
+            except (PermissionError, FileNotFoundError, NotADirectoryError):
+                continue
+            if len(file_rows) >= batch:
+                yield file_rows, dir_rows
+                file_rows, dir_rows = [], []
+        yield file_rows, dir_rows
+
+    @staticmethod
+    def _entry_row(entry: os.DirEntry, parent: str) -> Optional[tuple]:
+        """文件条目转为files表的一行，非文件返回None"""
+        try:
+            if not entry.is_file():
+                return None
+            st = entry.stat()
+        except OSError:
+            return None
+        name = entry.name
+        return (entry.path, name, os.path.splitext(name)[1].lower(), st.st_size, st.st_mtime, st.st_ino, parent)
+
+    def _delete_subtree(self, root: str):
+        lo, hi = _prefix_range(root)
+        self._conn.execute("DELETE FROM files WHERE parent = ? OR (path >= ? AND path < ?)", (root, lo, hi))
+        self._conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (root, lo, hi))
+
+    # ------------------------------------------------------------------ 查询
+
+    def covering_root(self, path: str) -> Optional[str]:
+        """返回包含path的已索引根目录，没有则为None"""
+        with self._lock:
+            roots = [row[0] for row in self._conn.execute("SELECT path FROM roots")]
+        for root in roots:
+            if path == root or path.startswith(_prefix(root)):
+                return root
+        return None
+
+    def covers(self, path: str) -> bool:
+        return self.covering_root(path) is not None
+
+    def has_dir(self, path: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone() is not None
+
+    def nearest_indexed_dir(self, path: str) -> Optional[str]:
+        """path本身或其最近的已索引祖先目录（不超出所在的已索引根目录），path未被覆盖时为None"""
+        root = self.covering_root(path)
+        if root is None:
+            return None
+        current = path
+        while not self.has_dir(current):
+            if current == root:
+                return None
+            current = os.path.dirname(current)
+        return current
+
+    def _where(self, path: str, file_pattern: str, recursive: bool) -> Optional[Tuple[str, tuple]]:
+        sql_glob = to_sql_glob(file_pattern)
+        if sql_glob is None:
+            return None
+        if recursive:
+            lo, hi = _prefix_range(path)
+            return "path >= ? AND path < ? AND name GLOB ?", (lo, hi, sql_glob)
+        return "parent = ? AND name GLOB ?", (path, sql_glob)
+
+    def can_answer(self, path: str, file_pattern: str) -> bool:
+        """索引能否回答该查询：路径已被索引且模式不含路径分隔符"""
+        return to_sql_glob(file_pattern) is not None and self.covers(path)
+
+    def query(self, path: str, file_pattern: str = "*", recursive: bool = False,
+              columns: str = "path, name, suffix, size, mtime, inode, parent",
+              order_by: Optional[str] = None, limit: Optional[int] = None, offset: int = 0,
+              extra: Optional[Tuple[str, tuple]] = None) -> List[tuple]:
+        """
+        按glob模式查询索引
+        @param path: 已resolve的绝对路径
+        @param file_pattern: fnmatch风格的文件名模式
+        @param recursive: 是否包含子目录
+        @param columns: 需要返回的列
+        @param order_by: 排序列
+        @param limit: 最多返回条数
+        @param offset: 跳过的条数
+        @param extra: 额外的 (条件, 参数)，如分页游标
+        @return: 行元组列表
+        """
+        where = self._where(path, file_pattern, recursive)
+        if where is None:
+            raise ValueError(f"索引不支持该模式: {file_pattern}")
+        clause, params = where
+        if extra is not None:
+            clause = f"{clause} AND {extra[0]}"
+            params = params + tuple(extra[1])
+        sql = f"SELECT {columns} FROM files WHERE {clause}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + (-1 if limit is None else limit, offset)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self, path: str, file_pattern: str = "*", recursive: bool = False) -> int:
+        where = self._where(path, file_pattern, recursive)
+        if where is None:
+            raise ValueError(f"索引不支持该模式: {file_pattern}")
+        clause, params = where
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM files WHERE {clause}", params).fetchone()[0]
+
+    def aggregate(self, path: str, file_pattern: str = "*", recursive: bool = False,
+                  key_expr: str = "suffix") -> List[Tuple[str, int, int]]:
+        """
+        分组聚合
+        @param key_expr: 分组表达式，如 'suffix'、'parent'
+        @return: [(分组键, 文件数, 总字节数)]
+        """
+        where = self._where(path, file_pattern, recursive)
+        if where is None:
+            raise ValueError(f"索引不支持该模式: {file_pattern}")
+        clause, params = where
+        sql = f"SELECT {key_expr} AS k, COUNT(*), COALESCE(SUM(size), 0) FROM files WHERE {clause} GROUP BY k"
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ------------------------------------------------------------------ 过期检查
+
+    def indexed_dirs(self, root: str, recursive: bool = True) -> List[Tuple[str, int]]:
+        """root（recursive时连同整棵子树）在索引中记录的目录mtime"""
+        with self._lock:
+            if not recursive:
+                return self._conn.execute("SELECT path, mtime_ns FROM dirs WHERE path = ?", (root,)).fetchall()
+            lo, hi = _prefix_range(root)
+            return self._conn.execute(
+                "SELECT path, mtime_ns FROM dirs WHERE path = ? OR (path >= ? AND path < ?) ORDER BY path", (root, lo, hi)
+            ).fetchall()
+
+    def disk_mtimes(self, root: str, recursive: bool = True) -> List[Tuple[str, int, Optional[int]]]:
+        """
+        索引中root子树的每个目录：(路径, 索引记录的mtime_ns, 磁盘上当前的mtime_ns)
+        目录已删除时当前值为None
+        """
+        result = []
+        for dir_path, mtime_ns in self.indexed_dirs(root, recursive):
+            try:
+                result.append((dir_path, mtime_ns, os.stat(dir_path).st_mtime_ns))
+            except OSError:
+                result.append((dir_path, mtime_ns, None))
+        return result
+
+    def stale_dirs(self, root: str, recursive: bool = True) -> List[str]:
+        """
+        对比索引中记录的目录mtime与磁盘上的实际值
+        目录内增删改名都会改变目录mtime，因此只需每个目录stat一次
+        @param recursive: False时只检查root本身（非递归查询只读取root的直接子文件）
+        @return: mtime已变化或已被删除的目录
+        """
+        return [dir_path for dir_path, recorded, current in self.disk_mtimes(root, recursive) if current != recorded]
+
+    def is_stale(self, path: str, recursive: bool = True) -> bool:
+        """
+        查询会读取的目录（recursive时为整棵子树，否则只有path本身）是否已与磁盘不一致
+        path没有目录记录（索引建立后新建的目录）时由lookup_index从祖先目录处理
+        """
+        now = time.monotonic()
+        if self._fresh_until.get((path, recursive), 0.0) > now:
+            return False
+        for dir_path, mtime_ns in self.indexed_dirs(path, recursive):
+            try:
+                if os.stat(dir_path).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        if self.max_staleness > 0:
+            self._fresh_until[(path, recursive)] = now + self.max_staleness
+        return False
+
+    # ------------------------------------------------------------------ 增量刷新
+
+    def refresh(self, root: str, recursive: bool = True) -> Dict[str, int]:
+        """
+        增量刷新：只重扫mtime与索引不一致的目录
+        - 目录已删除：删除其整棵子树
+        - 目录仍存在：重写其直接子文件，新增子目录整棵扫描，消失的子目录整棵删除
+        注意：只改文件内容不会改变目录mtime，此时size/mtime列不会更新（inotify watcher可以覆盖该情况）
+        @param root: 要刷新的目录（已索引根目录或其子目录）
+        @param recursive: False时只检查root本身，其新增的子目录仍会整棵扫描
+        @return: 刷新统计
+        root在索引建立后才创建（没有目录记录）时，改为检查最近的已索引祖先目录，新目录随祖先的重扫整棵入索引
+        """
+        root = str(Path(root).expanduser().resolve())
+        stats = {"rescanned_dirs": 0, "removed_dirs": 0, "added_dirs": 0}
+        if not self.has_dir(root):
+            anchor = self.nearest_indexed_dir(root)
+            if anchor is None:
+                return stats
+            root, recursive = anchor, False
+        with self._lock, self._conn:
+            for dir_path in self.stale_dirs(root, recursive):#按路径排序，父目录先于子目录处理
+                if self._conn.execute("SELECT 1 FROM dirs WHERE path = ?", (dir_path,)).fetchone() is None:
+                    continue#已随父目录一起删除
+                try:
+                    mtime_ns = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    self._delete_subtree(dir_path)
+                    stats["removed_dirs"] += 1
+                    continue
+                added, removed = self._rescan_dir(dir_path, mtime_ns)
+                stats["rescanned_dirs"] += 1
+                stats["added_dirs"] += added
+                stats["removed_dirs"] += removed
+        self._fresh_until.clear()
+        return stats
+
+    def _rescan_dir(self, dir_path: str, mtime_ns: int) -> Tuple[int, int]:
+        """重扫单个目录的直接子项，返回（新增子目录数, 删除子目录数）"""
+        file_rows, subdirs = [], set()
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if self.is_excluded(entry.name):
+                        continue
+                    row = self._entry_row(entry, dir_path)
+                    if row is not None:
+                        file_rows.append(row)
+                    elif entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.path)
+        except OSError:
+            return 0, 0
+
+        self._conn.execute("DELETE FROM files WHERE parent = ?", (dir_path,))
+        self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?)", file_rows)
+        self._conn.execute("UPDATE dirs SET mtime_ns = ? WHERE path = ?", (mtime_ns, dir_path))
+
+        indexed_subdirs = {row[0] for row in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (dir_path,))}
+        for gone in indexed_subdirs - subdirs:
+            self._delete_subtree(gone)
+        for new in subdirs - indexed_subdirs:
+            self._insert_subtree(new)
+        return len(subdirs - indexed_subdirs), len(indexed_subdirs - subdirs)
+
+    def _insert_subtree(self, dir_path: str):
+        for file_rows, dir_rows in self._scan_tree(dir_path):
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?)", file_rows)
+            self._conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?,?,?)", dir_rows)
+
+    # ------------------------------------------------------------------ 单条更新（供inotify watcher使用）
+
+    def upsert_file(self, file_path: str) -> bool:
+        """新增或更新单个文件，不是文件则返回False"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        if not os.path.isfile(file_path):
+            return False
+        name = os.path.basename(file_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?)",
+                (file_path, name, os.path.splitext(name)[1].lower(), st.st_size, st.st_mtime, st.st_ino,
+                 os.path.dirname(file_path)),
+            )
+        return True
+
+    def add_dir(self, dir_path: str):
+        """新增目录（如mkdir或移入），扫描整棵子树"""
+        with self._lock, self._conn:
+            self._delete_subtree(dir_path)
+            self._insert_subtree(dir_path)
+
+    def remove_path(self, path: str):
+        """删除文件或目录子树"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self._delete_subtree(path)
+
+    def touch_dir(self, dir_path: str):
+        """事件已应用后同步目录mtime，避免下次查询被判为过期"""
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE dirs SET mtime_ns = ? WHERE path = ?", (mtime_ns, dir_path))
+        self._fresh_until.clear()
+
+
+_default_index: Optional[FileIndex] = None
+
+
+def set_file_index(index: Optional[FileIndex]):
+    """设置find_files/count_files使用的全局索引，None表示关闭"""
+    global _default_index
+    _default_index = index
+
+
+def get_file_index() -> Optional[FileIndex]:
+    return _default_index
+
+
+def lookup_index(search_path: Path, file_pattern: str, recursive: bool = True) -> Optional[FileIndex]:
+    """
+    返回可以直接回答本次查询的索引
+    - 只检查查询会读取的目录：非递归查询只stat path本身
+    - path在索引建立后才创建时没有目录记录：检查最近的已索引祖先目录，其mtime变化则从那里增量刷新
+    索引过期时若开启auto_refresh先增量刷新，否则返回None
+    没有索引、路径未被索引（如被排除的目录）或模式不支持时返回None，调用方回退到实时遍历
+    """
+    index = _default_index
+    if index is None:
+        return None
+    path = str(search_path)
+    if not index.can_answer(path, file_pattern):
+        return None
+    if not index.has_dir(path):
+        anchor = index.nearest_indexed_dir(path)
+        if anchor is None or not index.auto_refresh or not index.is_stale(anchor, recursive=False):
+            return None
+        index.refresh(path)#从祖先目录增量刷新，新增的子目录整棵扫描，path随之入索引
+        return index if index.has_dir(path) else None
+    if index.is_stale(path, recursive):
+        if not index.auto_refresh:
+            return None
+        index.refresh(path, recursive)
+    return index
+
+
+if __name__ == "__main__":
+    index = FileIndex(":memory:")
+    print(index.build("."))
+    print(index.count(str(Path(".").resolve()), "*.py", recursive=True))
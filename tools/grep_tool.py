@@ -0,0 +1,180 @@
+import atexit
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Set, Tuple
+
+from tools.content_index import BINARY_SNIFF_BYTES, is_binary
+from tools.walker import walk_files
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+MAX_LINE_CHARS = 200
+CHUNK_FILES = 64
+CHUNK_BYTES = 8 * 1024 * 1024
+
+Match = Tuple[str, int, str]  # (文件路径, 行号, 行内容)
+
+
+@lru_cache(maxsize=32)
+def _compile(pattern: str, regex: bool, ignore_case: bool) -> "re.Pattern[bytes]":
+    source = pattern.encode("utf-8")
+    if not regex:
+        source = re.escape(source)
+    flags = re.MULTILINE#按行匹配：^ 与 $ 锚定在每一行的首尾，而不是整个文件
+    if ignore_case:
+        flags |= re.IGNORECASE
+    return re.compile(source, flags)
+
+
+def grep_file(path: str, pattern: str, regex: bool = False, ignore_case: bool = False,
+              max_matches: int = 5) -> List[Match]:
+    """
+    在单个文件中查找，按行返回匹配（同一行只记一次）
+    二进制文件（开头几KB含NUL）与空文件直接跳过
+    """
+    compiled = _compile(pattern, regex, ignore_case)
+    matches: List[Match] = []
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return matches
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if is_binary(mm[:BINARY_SNIFF_BYTES]):
+                    return matches
+                line_no, counted_to, last_line_end = 1, 0, -1
+                for hit in compiled.finditer(mm):
+                    start = hit.start()
+                    if start <= last_line_end:#同一行的后续匹配
+                        continue
+                    line_no += mm[counted_to:start].count(b"\n")
+                    counted_to = start
+                    line_start = mm.rfind(b"\n", 0, start) + 1
+                    line_end = mm.find(b"\n", start)
+                    if line_end < 0:
+                        line_end = len(mm)
+                    last_line_end = line_end
+                    text = mm[line_start:min(line_end, line_start + MAX_LINE_CHARS * 4)]
+                    matches.append((path, line_no, text.decode("utf-8", errors="replace").strip()[:MAX_LINE_CHARS]))
+                    if len(matches) >= max_matches:
+                        break
+    except (OSError, ValueError):
+        pass
+    return matches
+
+
+def _grep_chunk(paths: List[str], pattern: str, regex: bool, ignore_case: bool, max_matches: int) -> List[Match]:
+    """子进程里执行的任务：一批文件（模块级函数，forkserver/spawn子进程按模块名导入）"""
+    results: List[Match] = []
+    for path in paths:
+        results.extend(grep_file(path, pattern, regex, ignore_case, max_matches))
+    return results
+
+
+POOL_WORKERS = os.cpu_count() or 1
+
+_pool: Optional["ProcessPoolExecutor"] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> "ProcessPoolExecutor":
+    """
+    进程池在多次调用间复用，避免每次grep都重新拉起进程
+    池大小固定为 POOL_WORKERS，单次调用的workers只限制它同时提交的批次数；
+    不按调用重建进程池，否则一个线程换了workers会取消其他线程正在进行的grep
+    不用fork启动：进程池在执行器线程里懒创建，此时遍历线程池与日志QueueListener线程都在运行，
+    fork出的子进程可能继承被其他线程持有的锁而死锁；forkserver（不支持时用spawn）从干净的进程启动
+    """
+    global _pool
+    import multiprocessing#第一次grep时才导入
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _chunks(root: Path, file_pattern: str, recursive: bool,
+            cancel_event: Optional[threading.Event] = None) -> Iterator[List[str]]:
+    """按文件数与总字节数把候选文件切成批，平衡进程间通信开销与负载"""
+    chunk: List[str] = []
+    chunk_bytes = 0
+    for entry in walk_files(root, file_pattern, recursive, cancel_event=cancel_event):
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue
+        chunk.append(entry.path)
+        chunk_bytes += size
+        if len(chunk) >= CHUNK_FILES or chunk_bytes >= CHUNK_BYTES:
+            yield chunk
+            chunk, chunk_bytes = [], 0
+    if chunk:
+        yield chunk
+
+
+def grep_iter(pattern: str, path: str = ".", file_pattern: str = "*", recursive: bool = True,
+              regex: bool = False, ignore_case: bool = False, max_matches_per_file: int = 5,
+              workers: Optional[int] = None, cancel_event: Optional[threading.Event] = None) -> Iterator[Match]:
+    """
+    流式grep：候选文件分批提交到进程池，每批完成即产出其匹配
+    cancel_event被置位或消费方停止迭代时，取消尚未开始的批次并返回
+    """
+    root = Path(path).expanduser().resolve()
+    if not root.exists():
+        raise FileNotFoundError(f"路径不存在: {path}")
+    _compile(pattern, regex, ignore_case)#在主进程先校验正则
+    workers = min(workers or POOL_WORKERS, POOL_WORKERS)
+
+    if workers == 1:
+        for chunk in _chunks(root, file_pattern, recursive, cancel_event):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield from _grep_chunk(chunk, pattern, regex, ignore_case, max_matches_per_file)
+        return
+
+    pool = _get_pool()
+    chunks = _chunks(root, file_pattern, recursive, cancel_event)
+    in_flight: Set[Future] = set()
+    exhausted = False
+    try:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            while not exhausted and len(in_flight) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                in_flight.add(pool.submit(_grep_chunk, chunk, pattern, regex, ignore_case, max_matches_per_file))
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:#进程池共享，只取消本次提交且未开始的批次
+        for future in in_flight:
+            future.cancel()
+        chunks.close()
+
+
+if __name__ == "__main__":
+    for match in grep_iter("def ", path=".", file_pattern="*.py"):
+        print(match)
@@ -0,0 +1,217 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from tools.file_index import FileIndex
+
+
+# inotify事件掩码，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def inotify_available() -> bool:
+    return sys.platform.startswith("linux") and ctypes.util.find_library("c") is not None
+
+
+class IndexWatcher:
+    """
+    基于inotify的索引监听器（仅Linux）
+    功能：
+    - 对索引中每个目录添加watch
+    - 文件创建/写入/删除/移动实时写入索引，并同步父目录mtime，查询时无需重扫
+    - 排除规则与索引一致，作用于相对root的每一段路径（如 node_modules/x/y.py 整体忽略）
+    - 事件队列溢出时回退到一次增量刷新，并为刷新中新增的目录补上watch
+    """
+
+    def __init__(self, index: FileIndex, root: str):
+        if not inotify_available():
+            raise OSError("inotify仅在Linux上可用")
+        self.index = index
+        self.root = str(Path(root).expanduser().resolve())
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = -1
+        self._wd_to_path: Dict[int, str] = {}
+        self._path_to_wd: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_r, self._stop_w = -1, -1
+
+    # ------------------------------------------------------------------ 生命周期
+
+    def start(self) -> "IndexWatcher":
+        """开始监听；root尚未被索引时先全量建立"""
+        if not self.index.covers(self.root):
+            self.index.build(self.root)
+        else:
+            self.index.refresh(self.root)
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        for dir_path, _ in self.index.indexed_dirs(self.root):
+            self._add_watch(dir_path)
+
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name=f"index-watcher:{self.root}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        os.write(self._stop_w, b"x")
+        self._thread.join()
+        self._thread = None
+        for fd in (self._fd, self._stop_r, self._stop_w):
+            os.close(fd)
+        self._fd = self._stop_r = self._stop_w = -1
+        self._wd_to_path.clear()
+        self._path_to_wd.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ------------------------------------------------------------------ watch管理
+
+    def _add_watch(self, dir_path: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.EACCES, errno.ENOTDIR):
+                return
+            raise OSError(err, f"inotify_add_watch失败({os.strerror(err)}): {dir_path}")
+        self._wd_to_path[wd] = dir_path
+        self._path_to_wd[dir_path] = wd
+
+    def _add_watch_tree(self, dir_path: str):
+        if self.excluded(dir_path):
+            return
+        for current, dirs, _ in os.walk(dir_path):
+            dirs[:] = [d for d in dirs if not self.index.is_excluded(d)]#与索引相同，排除的目录整棵不watch
+            self._add_watch(current)
+
+    def _sync_watches(self):
+        """增量刷新后，为索引中还没有watch的目录补上watch"""
+        for dir_path, _ in self.index.indexed_dirs(self.root):
+            if dir_path not in self._path_to_wd:
+                self._add_watch(dir_path)
+
+    def excluded(self, path: str) -> bool:
+        """path相对root的任意一段命中索引的排除规则"""
+        rel = os.path.relpath(path, self.root)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return False
+        return any(self.index.is_excluded(part) for part in rel.split(os.sep))
+
+    def _remove_watch_tree(self, dir_path: str):
+        """目录被移走或删除后，旧路径下的watch不再可信"""
+        prefix = dir_path + os.sep
+        for path in [p for p in self._path_to_wd if p == dir_path or p.startswith(prefix)]:
+            wd = self._path_to_wd.pop(path)
+            self._wd_to_path.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _forget(self, wd: int):
+        path = self._wd_to_path.pop(wd, None)
+        if path is not None:
+            self._path_to_wd.pop(path, None)
+
+    # ------------------------------------------------------------------ 事件循环
+
+    def _run(self):
+        while True:
+            ready, _, _ = select.select([self._fd, self._stop_r], [], [])
+            if self._stop_r in ready:
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self._dispatch(data)
+
+    def _dispatch(self, data: bytes):
+        touched = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:#事件丢失，只能按目录mtime重扫
+                self.index.refresh(self.root)
+                self._sync_watches()
+                continue
+            if mask & IN_IGNORED:
+                self._forget(wd)
+                continue
+
+            parent = self._wd_to_path.get(wd)
+            if parent is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue#由父目录的IN_DELETE/IN_MOVED_FROM处理
+
+            path = os.path.join(parent, os.fsdecode(name))
+            self.apply(path, mask)
+            touched.add(parent)
+
+        for parent in touched:
+            self.index.touch_dir(parent)
+
+    def apply(self, path: str, mask: int):
+        """把单个inotify事件写入索引"""
+        if self.excluded(path):
+            return
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self.index.add_dir(path)
+                self._add_watch_tree(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._remove_watch_tree(path)
+                self.index.remove_path(path)
+            return
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            self.index.remove_path(path)
+        elif mask & (IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_ATTRIB | IN_MODIFY):
+            if not self.index.upsert_file(path):
+                self.index.remove_path(path)
+
+
+if __name__ == "__main__":
+    import time
+    from tools.file_index import set_file_index
+
+    file_index = FileIndex(":memory:")
+    set_file_index(file_index)
+    with IndexWatcher(file_index, "."):
+        time.sleep(60)
@@ -0,0 +1,252 @@
+import os
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+RENDER_MAX_FILES = 300 #渲染进prompt的最多文件数，其余只给出数量
+
+
+def format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{int(value)}{unit}" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{size}B"
+
+
+class PathTrie:
+    """
+    目录前缀树：每个目录只保存一段名字和父目录编号，公共前缀只存一次
+    编号0为根目录，add按文件所在目录的绝对路径返回编号
+    """
+
+    __slots__ = ("root", "_parents", "_names", "_children", "_last")
+
+    def __init__(self, root: str):
+        self.root = root.rstrip(os.sep) or os.sep
+        self._parents = array("i", [-1])
+        self._names: List[str] = [""]
+        self._children: Dict[Tuple[int, str], int] = {}
+        self._last: Tuple[Optional[str], int] = (None, 0) #遍历按目录成批产出文件，连续同目录直接命中
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, dir_path: str) -> int:
+        last_path, last_node = self._last
+        if dir_path == last_path:
+            return last_node
+        node = 0
+        if dir_path != self.root:
+            rel = os.path.relpath(dir_path, self.root)
+            for part in rel.split(os.sep):
+                child = self._children.get((node, part))
+                if child is None:
+                    child = len(self._names)
+                    self._children[(node, part)] = child
+                    self._parents.append(node)
+                    self._names.append(part)
+                node = child
+        self._last = (dir_path, node)
+        return node
+
+    def parts(self, node: int) -> Tuple[str, ...]:
+        parts = []
+        while node > 0:
+            parts.append(self._names[node])
+            node = self._parents[node]
+        return tuple(reversed(parts))
+
+    def relpath(self, node: int) -> str:
+        """相对于根目录的路径，根目录为 '.'"""
+        return os.path.join(*self.parts(node)) if node else "."
+
+    def abspath(self, node: int) -> str:
+        return os.path.join(self.root, *self.parts(node))
+
+
+class FileRecord:
+    """FileListing中的单个文件，按需生成；支持 record['name'] 以兼容原来的字典结果"""
+
+    __slots__ = ("name", "dir", "path", "size", "mtime")
+
+    def __init__(self, name: str, dir: str, path: str, size: Optional[int] = None, mtime: Optional[float] = None):
+        self.name = name
+        self.dir = dir
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.path!r})"
+
+
+class FileListing:
+    """
+    列式存储的文件列表
+    - 文件名连续存放在一个UTF-8缓冲区中，用偏移数组定位，不为每个文件创建字典或字符串对象
+    - 所在目录存为PathTrie中的编号
+    - with_stat时另有size/mtime两列
+    迭代顺序与find_files分页模式一致（见sorted）；str()时输出按目录分组的紧凑文本（见render），作为工具observation
+    """
+
+    __slots__ = ("root", "dirs", "with_stat", "order_by", "_dir_ids", "_blob", "_offsets", "_sizes", "_mtimes")
+
+    def __init__(self, root: str, with_stat: bool = False):
+        self.root = str(root)
+        self.dirs = PathTrie(self.root)
+        self.with_stat = with_stat
+        self.order_by = "none" #sorted()之后的排序方式，render据此决定是否按目录归并
+        self._dir_ids = array("I")
+        self._blob = bytearray()
+        self._offsets = array("Q", [0])
+        self._sizes = array("q")
+        self._mtimes = array("d")
+
+    @classmethod
+    def from_entries(cls, root: str, entries: Iterable[os.DirEntry], with_stat: bool = False) -> "FileListing":
+        """由遍历得到的DirEntry构建，stat失败的文件跳过"""
+        listing = cls(root, with_stat)
+        for entry in entries:
+            size = mtime = None
+            if with_stat:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                size, mtime = st.st_size, st.st_mtime
+            listing.append(os.path.dirname(entry.path), entry.name, size, mtime)
+        return listing
+
+    def append(self, dir_path: str, name: str, size: Optional[int] = None, mtime: Optional[float] = None):
+        self._dir_ids.append(self.dirs.add(dir_path))
+        self._blob += name.encode("utf-8", "surrogateescape")
+        self._offsets.append(len(self._blob))
+        if self.with_stat:
+            self._sizes.append(size or 0)
+            self._mtimes.append(mtime or 0.0)
+
+    def __len__(self) -> int:
+        return len(self._dir_ids)
+
+    def name_at(self, index: int) -> str:
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].decode("utf-8", "surrogateescape")
+
+    def __getitem__(self, index: int) -> FileRecord:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        node = self._dir_ids[index]
+        name = self.name_at(index)
+        dir_path = self.dirs.relpath(node)
+        size = mtime = None
+        if self.with_stat:
+            size, mtime = self._sizes[index], self._mtimes[index]
+        return FileRecord(name, dir_path, os.path.normpath(os.path.join(dir_path, name)), size, mtime)
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def reorder(self, order: Iterable[int]) -> "FileListing":
+        """按下标序列生成新的列表（用于排序与切片），目录树共享"""
+        listing = FileListing(self.root, self.with_stat)
+        listing.dirs = self.dirs
+        for index in order:
+            listing._dir_ids.append(self._dir_ids[index])
+            listing._blob += self._blob[self._offsets[index]:self._offsets[index + 1]]
+            listing._offsets.append(len(listing._blob))
+            if self.with_stat:
+                listing._sizes.append(self._sizes[index])
+                listing._mtimes.append(self._mtimes[index])
+        return listing
+
+    def sorted(self, order_by: str = "name", offset: int = 0) -> "FileListing":
+        """
+        排序后跳过前offset个，排序键与find_files分页模式相同，两种模式的第N个文件一致
+        - 'name'：按文件名，同名按绝对路径
+        - 'newest'/'oldest'/'largest'/'smallest'：需要with_stat，相同时按绝对路径（并行遍历的产出顺序不确定）
+        - 'none'：保持原顺序
+        """
+        indices: Iterable[int] = range(len(self))
+        if order_by != "none":
+            dir_paths = {node: self.dirs.abspath(node) for node in set(self._dir_ids)}
+
+            def path_at(i: int) -> str:
+                return os.path.join(dir_paths[self._dir_ids[i]], self.name_at(i))
+
+            if order_by == "name":
+                indices = sorted(indices, key=lambda i: (self.name_at(i), path_at(i)))
+            else:
+                column = {"newest": self._mtimes, "oldest": self._mtimes,
+                          "largest": self._sizes, "smallest": self._sizes}[order_by]
+                sign = -1 if order_by in ("newest", "largest") else 1
+                indices = sorted(indices, key=lambda i: (sign * column[i], path_at(i)))
+        listing = self.reorder(list(indices)[offset:])
+        listing.order_by = order_by
+        return listing
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [{"name": record.name, "path": record.path} for record in self]
+
+    def render(self, max_files: Optional[int] = RENDER_MAX_FILES) -> str:
+        """
+        按目录分组的紧凑文本：同目录文件合并为一行，目录前缀只写一次，重复条目只列一次
+        只列出排序后的前max_files个，其余可按同一排序用limit/cursor分页取得
+        - 按文件名排序时，列出的文件再按目录归并，目录内仍按文件名
+        - 按大小/时间排序时保持该顺序，只合并相邻的同目录文件
+        """
+        total = len(self)
+        dir_count = len(set(self._dir_ids))
+        lines = [f"{self.root} 下共{total}个文件，分布在{dir_count}个目录（路径相对于该目录）"]
+        shown: List[int] = []
+        remaining = 0
+        seen = set()
+        for index in range(total):
+            if max_files is not None and len(shown) >= max_files:
+                remaining = total - index
+                break
+            key = (self._dir_ids[index], self.name_at(index))
+            if key not in seen:
+                seen.add(key)
+                shown.append(index)
+        if self.order_by == "name":#稳定排序，目录内保持文件名顺序
+            dir_keys = {node: self.dirs.parts(node) for node in {self._dir_ids[i] for i in shown}}
+            shown.sort(key=lambda i: dir_keys[self._dir_ids[i]])
+
+        current_dir = None
+        names: List[str] = []
+
+        def flush():
+            if names:
+                lines.append(f"{self.dirs.relpath(current_dir)}/: {', '.join(names)}")
+
+        for index in shown:
+            node = self._dir_ids[index]
+            name = self.name_at(index)
+            if node != current_dir:
+                flush()
+                current_dir, names = node, []
+            if self.with_stat:
+                modified = datetime.fromtimestamp(self._mtimes[index]).strftime("%Y-%m-%d")
+                name = f"{name} ({format_size(self._sizes[index])}, {modified})"
+            names.append(name)
+        flush()
+        if remaining:
+            lines.append(f"…其余{remaining}个文件未列出，可用limit/cursor分页查看或用count_files统计")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.render()
+
+    def __repr__(self) -> str:
+        return f"FileListing({self.root!r}, {len(self)} files)"
@@ -1,8 +1,141 @@
-from typing import List, Dict, Any
+import base64
+import heapq
+import itertools
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Literal, Optional, Tuple, Union
+
+from tools.content_index import get_content_index, snippet
+from tools.file_index import lookup_index
+from tools.grep_tool import grep_iter
+from tools.listing import FileListing
+from tools.predicates import FileQuery, FileQuerySpec
+from tools.walker import count_matching, walk_files
+
+
+_ORDERS: Dict[str, Tuple[str, bool]] = {
+    #order_by: (排序字段, 是否降序)
+    'name': ('name', False),
+    'newest': ('mtime', True),
+    'oldest': ('mtime', False),
+    'largest': ('size', True),
+    'smallest': ('size', False),
+}
+
+#可选值声明为Literal，工具schema据此生成enum
+OrderBy = Literal['name', 'newest', 'oldest', 'largest', 'smallest', 'none']
+GroupBy = Literal['extension', 'directory', 'mtime']
+MtimeBucket = Literal['day', 'week', 'month', 'year']
+
+
+def _encode_cursor(order_by: str, position: Any) -> str:
+    payload = json.dumps([order_by, position], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def _decode_cursor(cursor: str, order_by: str) -> Any:
+    try:
+        cursor_order, position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError(f"无效的cursor: {cursor}")
+    if cursor_order != order_by:
+        raise ValueError(f"cursor属于order_by='{cursor_order}'的查询，与当前order_by='{order_by}'不一致")
+    return position
+
+
+def _sort_key(order_by: str) -> Callable[[Dict[str, Any]], Tuple]:
+    field, descending = _ORDERS[order_by]
+    if descending:
+        return lambda item: (-item[field], item['path'])
+    return lambda item: (item[field], item['path'])
+
+
+def iter_files(path: str = '.', file_pattern: str = '*', recursive: bool = False,
+               with_stat: bool = False, sequential: bool = False,
+               query: Optional[FileQuery] = None,
+               cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    流式遍历匹配的文件，逐个产出 {'name', 'path'}（with_stat时附带 'size'、'mtime'）
+    消费方停止迭代后遍历随即终止；sequential=True时产出顺序可复现
+    有过滤条件query时总是实时遍历，条件在遍历中求值
+    """
+    search_path = Path(path).expanduser().resolve()
+    if not search_path.exists():
+        raise FileNotFoundError(f"路径不存在: {path}")
+
+    index = lookup_index(search_path, file_pattern, recursive) if query is None else None
+    if index is not None:
+        for file_path, name, size, mtime in index.query(str(search_path), file_pattern, recursive,
+                                                        columns="path, name, size, mtime"):
+            item = {'name': name, 'path': file_path}
+            if with_stat:
+                item['size'], item['mtime'] = size, mtime
+            yield item
+        return
+
+    for entry in walk_files(search_path, file_pattern, recursive, sequential, query, cancel_event):#DirEntry自带类型信息，无需再stat
+        item = {'name': entry.name, 'path': entry.path}
+        if with_stat:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            item['size'], item['mtime'] = st.st_size, st.st_mtime
+        yield item
+
+
+def _index_page(index, search_path: Path, file_pattern: str, recursive: bool, order_by: str,
+                limit: int, offset: int, after: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """排序与分页直接下推到SQLite"""
+    if order_by == 'none':#主键顺序即路径顺序，天然可复现
+        rows = index.query(str(search_path), file_pattern, recursive, columns="path, name",
+                           order_by="path", limit=limit, offset=offset)
+        return [{'name': name, 'path': file_path} for file_path, name in rows]
+    field, descending = _ORDERS[order_by]
+    key_expr = f"-{field}" if descending else field
+    extra = None
+    if after is not None:
+        extra = (f"({key_expr}, path) > (?, ?)", tuple(after))
+    rows = index.query(str(search_path), file_pattern, recursive, columns="path, name, size, mtime",
+                       order_by=f"{key_expr}, path", limit=limit, offset=offset, extra=extra)
+    return [{'name': name, 'path': file_path, 'size': size, 'mtime': mtime} for file_path, name, size, mtime in rows]
+
+
+def _walk_page(search_path: Path, file_pattern: str, recursive: bool, order_by: str,
+               limit: int, offset: int, after: Optional[List[Any]],
+               query: Optional[FileQuery] = None,
+               cancel_event: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+    """
+    实时遍历下的分页：
+    - order_by='none'：串行遍历保证顺序可复现，页填满立即停止遍历
+    - 其他：用堆只保留 offset+limit 个候选，内存与匹配总数无关
+    """
+    if order_by == 'none':
+        files = iter_files(str(search_path), file_pattern, recursive, sequential=True, query=query,
+                           cancel_event=cancel_event)
+        try:
+            return list(itertools.islice(files, offset, offset + limit))
+        finally:
+            files.close()
+
+    key = _sort_key(order_by)
+    need_stat = _ORDERS[order_by][0] != 'name'
+    items: Iterable[Dict[str, Any]] = iter_files(str(search_path), file_pattern, recursive, with_stat=need_stat,
+                                                 query=query, cancel_event=cancel_event)
+    if after is not None:
+        after_key = tuple(after)
+        items = (item for item in items if key(item) > after_key)
+    return heapq.nsmallest(offset + limit, items, key=key)[offset:]
 
 
 def find_files(path: str = '.', file_pattern: str = '*',
-               recursive: bool = False) -> List[Dict[str, Any]]:
+               recursive: bool = False, limit: Optional[int] = None, offset: int = 0,
+               cursor: Optional[str] = None, order_by: OrderBy = 'name',
+               where: Optional[FileQuerySpec] = None,
+               cancel_event: Optional[threading.Event] = None) -> Union[FileListing, Dict[str, Any]]:
     """
     在指定路径下查找匹配模式的文件，并返回文件信息列表。
 
@@ -17,10 +150,25 @@ def find_files(path: str = '.', file_pattern: str = '*',
             - '*.txt' 匹配所有文本文件
             - 'data_??.csv' 匹配如 data_01.csv 的文件
         recursive (bool, optional): 是否递归搜索子目录。默认为 False。
+        limit (int, optional): 每页最多返回的文件数。默认为 None（返回全部，不分页）。
+        offset (int, optional): 跳过前 offset 个结果。默认为 0。
+        cursor (str, optional): 上一页返回的 next_cursor，用于继续翻页。
+        order_by (str, optional): 排序方式，默认为 'name'。分页与不分页的排序相同，同名或相同值时按路径。
+            - 'name' 按文件名
+            - 'newest' / 'oldest' 按修改时间（如最新的N个文件）
+            - 'largest' / 'smallest' 按文件大小（如最大的N个文件）
+            - 'none' 不排序，按遍历顺序返回，页填满立即停止遍历（最快）
+        where (dict, optional): 过滤条件（大小、修改时间、包含/排除glob、隐藏文件、深度、文件类别），遍历中求值并剪枝。
+            示例：{'type': ['document'], 'min_size': '10MB', 'modified_after': '7d', 'hidden': False}
 
     Returns:
-        List[Dict[str, Any]]: 文件信息字典列表，每个字典包含：
-            - 'name': 文件名（str）
+        不分页时 FileListing: 列式存储的文件列表，按order_by排序
+            - 迭代得到的每项有 'name'、'path'（相对于path），按大小/时间排序时附带 'size'、'mtime'
+            - str()为按目录分组的紧凑文本，目录前缀只出现一次；只列出前若干个，其余与分页结果的后续页相同
+        分页时（传入limit或cursor）Dict[str, Any]:
+            - 'files': 本页文件列表，每项包含 'name'、'path'（相对于path），按大小/时间排序时附带 'size'/'modified'
+            - 'has_more': 是否还有下一页（bool）
+            - 'next_cursor': 下一页游标（str），没有下一页时为 None
 
 
     Raises:
@@ -32,6 +180,7 @@ def find_files(path: str = '.', file_pattern: str = '*',
          py_files = find_files(file_pattern='*.py')
          for file in py_files:
         ...     print(file['name'], file['path'])
+         print(py_files)  # 按目录分组的紧凑文本
 
          # 示例2：递归查找用户Documents目录下所有.txt文件
          txt_files = find_files(
@@ -40,7 +189,7 @@ def find_files(path: str = '.', file_pattern: str = '*',
         ...     recursive=True
         ... )
          for file in txt_files:
-        ...     print(f"{file['name']} ({file['size']} bytes)")
+        ...     print(file.path)
 
          # 示例3：查找特定目录下无扩展名的文件
         no_ext_files = find_files(
@@ -48,44 +197,143 @@ def find_files(path: str = '.', file_pattern: str = '*',
         ...     file_pattern='*.',
         ...     recursive=False
         ... )
-    """
-    results = []
 
+         # 示例4：递归查找最大的10个.log文件，再用next_cursor翻页
+         page = find_files(path='/var/log', file_pattern='*.log', recursive=True, limit=10, order_by='largest')
+         next_page = find_files(path='/var/log', file_pattern='*.log', recursive=True, limit=10,
+        ...     order_by='largest', cursor=page['next_cursor'])
+
+         # 示例5：本周修改过的10MB以上的PDF，不含隐藏文件
+         find_files(path='~', file_pattern='*.pdf', recursive=True,
+        ...     where={'min_size': '10MB', 'modified_after': '7d', 'hidden': False})
+    """
     try:
+        if order_by not in _ORDERS and order_by != 'none':
+            raise ValueError(f"不支持的order_by: {order_by}，可选 {list(_ORDERS) + ['none']}")
+
         search_path = Path(path).expanduser().resolve()
 
         if not search_path.exists():
             raise FileNotFoundError(f"路径不存在: {path}")
 
-        if recursive:
-            pattern = f"**/{file_pattern}"
-            files = search_path.glob(pattern)
-        else:
-            files = search_path.glob(file_pattern)
-
-        for file_path in files:
-            if file_path.is_file():
-                file_info = {
-                    #'path': str(file_path),
-                    'name': file_path.name,
-                    #'size': file_path.stat().st_size,
-                    #'modified': datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                    #'type': file_path.suffix.lower() if file_path.suffix else 'no_extension'
-                }
-                results.append(file_info)
-
-        return sorted(results, key=lambda x: x['name'])
+        query = FileQuery.from_spec(where)
+        if limit is not None or cursor is not None:
+            return _paged_find(search_path, file_pattern, recursive, limit, offset, cursor, order_by, query,
+                               cancel_event)
+
+        with_stat = order_by not in ('name', 'none')#不分页但按大小/时间排序
+        index = lookup_index(search_path, file_pattern, recursive) if query is None else None
+        if index is not None:#索引命中且未过期，直接查索引
+            listing = FileListing(str(search_path), with_stat)
+            rows = index.query(str(search_path), file_pattern, recursive, columns="parent, name, size, mtime",
+                               order_by="path")
+            for parent, name, size, mtime in rows:
+                listing.append(parent, name, size, mtime)
+            return listing.sorted(order_by, offset)
+
+        entries = walk_files(search_path, file_pattern, recursive, query=query,
+                             cancel_event=cancel_event)#DirEntry自带类型信息，无需再stat
+        listing = FileListing.from_entries(str(search_path), entries, with_stat)
+        return listing.sorted(order_by, offset)
 
     except Exception as e:
         raise Exception(f"文件查找失败: {str(e)}")
 
 
-from pathlib import Path
-from typing import Dict, Any
+def _paged_find(search_path: Path, file_pattern: str, recursive: bool, limit: Optional[int], offset: int,
+                cursor: Optional[str], order_by: str, query: Optional[FileQuery] = None,
+                cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """find_files的分页模式：多取一条用于判断是否还有下一页"""
+    limit = 100 if limit is None else max(0, int(limit))
+    offset = max(0, int(offset))
+    after = None
+    if cursor is not None:
+        position = _decode_cursor(cursor, order_by)
+        if order_by == 'none':
+            offset += position
+        else:
+            after = position
+
+    index = lookup_index(search_path, file_pattern, recursive) if query is None else None
+    if index is not None:
+        page = _index_page(index, search_path, file_pattern, recursive, order_by, limit + 1, offset, after)
+    else:
+        page = _walk_page(search_path, file_pattern, recursive, order_by, limit + 1, offset, after, query,
+                          cancel_event)
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = None
+    if has_more:
+        if order_by == 'none':
+            next_cursor = _encode_cursor(order_by, offset + limit)
+        else:
+            next_cursor = _encode_cursor(order_by, list(_sort_key(order_by)(page[-1])))
+
+    field = _ORDERS.get(order_by, ('name', False))[0]
+    files = []
+    for item in page:
+        file_info = {'name': item['name'], 'path': os.path.relpath(item['path'], search_path)}
+        if field == 'size':
+            file_info['size'] = item['size']
+        elif field == 'mtime':
+            file_info['modified'] = datetime.fromtimestamp(item['mtime']).isoformat(timespec='seconds')
+        files.append(file_info)
+    return {'files': files, 'has_more': has_more, 'next_cursor': next_cursor}
+
+
+_MTIME_BUCKETS: Dict[str, str] = {
+    #mtime_bucket: strftime格式（Python与SQLite通用）
+    'day': '%Y-%m-%d',
+    'week': '%Y-W%W',
+    'month': '%Y-%m',
+    'year': '%Y',
+}
+
+_NO_EXTENSION = '(none)'
+
+
+def _group_key_func(group_by: str, search_path: Path, mtime_bucket: str) -> Callable[[str, str, float], str]:
+    """返回 (文件名, 所在目录, mtime) -> 分组键"""
+    if group_by == 'extension':
+        return lambda name, parent, mtime: os.path.splitext(name)[1].lower() or _NO_EXTENSION
+    if group_by == 'directory':
+        root = str(search_path)
+        return lambda name, parent, mtime: _top_dir(root, parent)
+    fmt = _MTIME_BUCKETS[mtime_bucket]
+    return lambda name, parent, mtime: datetime.fromtimestamp(mtime).strftime(fmt)
+
+
+def _top_dir(root: str, parent: str) -> str:
+    """文件所在的一级子目录（相对于统计路径），直接位于统计路径下的文件记为 '.'"""
+    if parent == root:
+        return '.'
+    return os.path.relpath(parent, root).split(os.sep, 1)[0]
+
+
+def _index_groups(index, search_path: Path, file_pattern: str, recursive: bool, group_by: str,
+                  mtime_bucket: str) -> Dict[str, List[int]]:
+    """分组聚合下推到SQLite"""
+    if group_by == 'extension':
+        key_expr = f"CASE suffix WHEN '' THEN '{_NO_EXTENSION}' ELSE suffix END"
+    elif group_by == 'directory':
+        key_expr = "parent"
+    else:
+        key_expr = f"strftime('{_MTIME_BUCKETS[mtime_bucket]}', mtime, 'unixepoch', 'localtime')"
+    groups: Dict[str, List[int]] = {}
+    for key, count, size in index.aggregate(str(search_path), file_pattern, recursive, key_expr):
+        if group_by == 'directory':
+            key = _top_dir(str(search_path), key)
+        bucket = groups.setdefault(key, [0, 0])
+        bucket[0] += count
+        bucket[1] += size
+    return groups
 
 
 def count_files(path: str = '.', file_pattern: str = '*',
-                recursive: bool = False) -> Dict[str, Any]:
+                recursive: bool = False, group_by: Optional[GroupBy] = None, mtime_bucket: MtimeBucket = 'month',
+                with_size: bool = False, sample_size: int = 5, where: Optional[FileQuerySpec] = None,
+                cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
     """
     统计指定路径下匹配模式的文件数量。
 
@@ -100,13 +348,24 @@ def count_files(path: str = '.', file_pattern: str = '*',
             - '*.txt' 统计所有文本文件
             - 'data_??.csv' 统计如 data_01.csv 的文件
         recursive (bool, optional): 是否递归统计子目录。默认为 False。
+        group_by (str, optional): 一次遍历内分组统计数量与总字节数。默认为 None（不分组）。
+            - 'extension' 按扩展名
+            - 'directory' 按一级子目录（如"每个子文件夹各有多少pdf"）
+            - 'mtime' 按修改时间区间，区间大小见 mtime_bucket
+        mtime_bucket (str, optional): group_by='mtime' 时的区间：'day'、'week'、'month'、'year'。默认为 'month'。
+        with_size (bool, optional): 是否统计总字节数。分组时总会统计。默认为 False。
+        sample_size (int, optional): 示例文件个数，0表示只计数。默认为 5。
+        where (dict, optional): 过滤条件（大小、修改时间、包含/排除glob、隐藏文件、深度、文件类别），遍历中求值并剪枝。
+            示例：{'type': ['image'], 'modified_before': '1y', 'exclude': ['node_modules', 'build']}
 
     Returns:
         Dict[str, Any]: 返回统计结果字典，包含：
             - 'total': 文件总数（int）
             - 'path': 统计的绝对路径（str）
             - 'pattern': 使用的匹配模式（str）
-            - 'sample_files': 示例文件列表（前5个文件，用于验证）
+            - 'sample_files': 示例文件列表（前sample_size个文件的相对路径，用于验证）
+            - 'total_bytes': 总字节数（int，仅分组或with_size时）
+            - 'groups': 分组结果 {分组键: {'count': 数量, 'bytes': 字节数}}，按数量降序（仅分组时）
 
     Raises:
         FileNotFoundError: 当指定路径不存在时
@@ -131,38 +390,183 @@ def count_files(path: str = '.', file_pattern: str = '*',
         ...     file_pattern='*.',
         ...     recursive=False
         ... )
+
+         # 示例4：一次遍历统计Documents下每个子文件夹各有多少pdf及其大小
+         pdf_stats = count_files(path='~/Documents', file_pattern='*.pdf', recursive=True, group_by='directory')
+         print(pdf_stats['groups'])
+
+         # 示例5：一年内没改过的大于100MB的视频，按扩展名统计
+         count_files(path='~', recursive=True, group_by='extension',
+        ...     where={'type': ['video'], 'min_size': '100MB', 'modified_before': '1y'})
     """
     try:
+        if group_by is not None and group_by not in ('extension', 'directory', 'mtime'):
+            raise ValueError(f"不支持的group_by: {group_by}，可选 'extension'、'directory'、'mtime'")
+        if mtime_bucket not in _MTIME_BUCKETS:
+            raise ValueError(f"不支持的mtime_bucket: {mtime_bucket}，可选 {list(_MTIME_BUCKETS)}")
+
         search_path = Path(path).expanduser().resolve()
         if not search_path.exists():
             raise FileNotFoundError(f"路径不存在: {path}")
 
+        query = FileQuery.from_spec(where)
+        sample_size = max(0, int(sample_size))
+        need_size = with_size or group_by is not None
         count = 0
+        total_bytes = 0
         sample_files = []
+        groups: Dict[str, List[int]] = {}
+
+        index = lookup_index(search_path, file_pattern, recursive) if query is None else None
+        if index is not None:#索引命中且未过期，直接查索引
+            if sample_size:
+                rows = index.query(str(search_path), file_pattern, recursive, columns="path", limit=sample_size)
+                sample_files = [os.path.relpath(row[0], search_path) for row in rows]
+            if group_by is not None:
+                groups = _index_groups(index, search_path, file_pattern, recursive, group_by, mtime_bucket)
+                count = sum(bucket[0] for bucket in groups.values())
+                total_bytes = sum(bucket[1] for bucket in groups.values())
+            elif with_size:
+                rows = index.aggregate(str(search_path), file_pattern, recursive, key_expr="''")#单一分组
+                count, total_bytes = (rows[0][1], rows[0][2]) if rows else (0, 0)
+            else:
+                count = index.count(str(search_path), file_pattern, recursive)
+
+        elif not need_size and not sample_size:#只要数量：遍历时不为文件分配任何对象
+            count = count_matching(search_path, file_pattern, recursive, query, cancel_event)
 
-        if recursive:
-            pattern = f"**/{file_pattern}"
-            files = search_path.glob(pattern)
         else:
-            files = search_path.glob(file_pattern)
-
-        for file_path in files:
-            if file_path.is_file():
+            group_key = _group_key_func(group_by, search_path, mtime_bucket) if group_by else None
+            for entry in walk_files(search_path, file_pattern, recursive, query=query, cancel_event=cancel_event):
+                if need_size:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    total_bytes += st.st_size
+                    if group_key is not None:
+                        bucket = groups.setdefault(group_key(entry.name, os.path.dirname(entry.path), st.st_mtime), [0, 0])
+                        bucket[0] += 1
+                        bucket[1] += st.st_size
                 count += 1
-                if len(sample_files) < 5:  # 保留前5个文件作为示例
-                    sample_files.append(str(file_path))
+                if len(sample_files) < sample_size:  # 保留前sample_size个文件作为示例
+                    sample_files.append(os.path.relpath(entry.path, search_path))
 
-        return {
+        result = {
             'total': count,
             'path': str(search_path),
             'pattern': file_pattern,
             'sample_files': sample_files
         }
+        if need_size:
+            result['total_bytes'] = total_bytes
+        if group_by is not None:
+            result['groups'] = {key: {'count': c, 'bytes': b}
+                                for key, (c, b) in sorted(groups.items(), key=lambda kv: (-kv[1][0], kv[0]))}
+        return result
 
     except Exception as e:
         raise Exception(f"文件统计失败: {str(e)}")
 
 
+def search_content(query: str, path: str = '.', file_pattern: str = '*',
+                   recursive: bool = True, top_k: int = 10) -> List[Dict[str, Any]]:
+    """
+    按文件内容全文检索（倒排索引 + BM25排序），返回最相关的文件。
+
+    Args:
+        query (str): 检索内容。多个词之间为"或"关系，按相关度排序；用双引号包住的内容按短语匹配。
+            示例：
+            - 'invoice 2024' 包含invoice或2024的文件，同时包含的排在前面
+            - '"invoice 2024"' 只匹配连续出现 invoice 2024 的文件
+            - '发票' 中文连续字符按短语匹配
+        path (str, optional): 要检索的目录路径。默认为当前目录（'.'）。
+        file_pattern (str, optional): 只检索文件名匹配该模式的文件。默认为 '*'（所有文件）。
+        recursive (bool, optional): 是否包含子目录。默认为 True。
+        top_k (int, optional): 最多返回的文件数。默认为 10。
+
+    Returns:
+        List[Dict[str, Any]]: 按相关度降序的结果，每项包含：
+            - 'path': 文件路径（相对于path）
+            - 'score': BM25相关度分数
+            - 'snippet': 命中位置附近的文本片段
+
+    Raises:
+        FileNotFoundError: 当指定路径不存在时
+        Exception: 其他错误
+
+    Examples:
+         # 示例1：哪些文件提到了 invoice 2024
+         hits = search_content('invoice 2024', path='~/Documents')
+    """
+    try:
+        search_path = Path(path).expanduser().resolve()
+        index = get_content_index()
+        index.update(str(search_path), file_pattern, recursive)#增量：只重读新增或变化的文件，有效期内不重复检查
+        hits = index.search(query, top_k=top_k, path=str(search_path), file_pattern=file_pattern, recursive=recursive)
+        return [{
+            'path': os.path.relpath(hit['path'], search_path),
+            'score': hit['score'],
+            'snippet': snippet(hit['path'], query),
+        } for hit in hits]
+
+    except Exception as e:
+        raise Exception(f"内容检索失败: {str(e)}")
+
+
+def grep_files(pattern: str, path: str = '.', file_pattern: str = '*', recursive: bool = True,
+               regex: bool = False, ignore_case: bool = False, max_matches_per_file: int = 5,
+               max_total_matches: int = 100, cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    在文件内容中查找文本或正则（不建索引，适合一次性的内容查询），返回匹配的行及行号。
+
+    Args:
+        pattern (str): 要查找的文本；regex为True时为正则表达式。
+        path (str, optional): 要搜索的目录路径。默认为当前目录（'.'）。
+        file_pattern (str, optional): 只搜索文件名匹配该模式的文件。默认为 '*'（所有文件）。
+            示例：'*.py' 只搜索Python文件
+        recursive (bool, optional): 是否递归搜索子目录。默认为 True。
+        regex (bool, optional): pattern是否为正则表达式。默认为 False（按字面文本查找）。
+        ignore_case (bool, optional): 是否忽略大小写。默认为 False。
+        max_matches_per_file (int, optional): 每个文件最多返回的匹配行数。默认为 5。
+        max_total_matches (int, optional): 总共最多返回的匹配行数，达到后停止搜索。默认为 100。
+
+    Returns:
+        Dict[str, Any]: 返回结果字典，包含：
+            - 'matches': 匹配列表，每项包含 'path'（相对于path）、'line'（行号）、'text'（行内容）
+            - 'files_matched': 有匹配的文件数（int）
+            - 'truncated': 是否因达到max_total_matches提前停止（bool）
+
+    Raises:
+        FileNotFoundError: 当指定路径不存在时
+        Exception: 其他错误（如正则表达式无效）
+
+    Examples:
+         # 示例1：查找所有提到 TODO 的Python代码行
+         grep_files('TODO', path='~/project', file_pattern='*.py')
+    """
+    try:
+        root = Path(path).expanduser().resolve()
+        matches = []
+        files = set()
+        truncated = False
+        stream = grep_iter(pattern, str(root), file_pattern, recursive, regex, ignore_case,
+                           max(1, int(max_matches_per_file)), cancel_event=cancel_event)
+        try:
+            for file_path, line_no, text in stream:
+                if len(matches) >= max_total_matches:
+                    truncated = True
+                    break
+                matches.append({'path': os.path.relpath(file_path, root), 'line': line_no, 'text': text})
+                files.add(file_path)
+        finally:
+            stream.close()
+        return {'matches': matches, 'files_matched': len(files), 'truncated': truncated}
+
+    except Exception as e:
+        raise Exception(f"内容查找失败: {str(e)}")
+
+
 if __name__=="__main__":
     #files = find_files("~/Documents", file_pattern="*")
     files = count_files("~/Documents", file_pattern="*")
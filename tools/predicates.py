@@ -0,0 +1,202 @@
+import fnmatch
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, TypedDict
+
+
+FileType = Literal['image', 'document', 'code', 'archive', 'audio', 'video', 'text', 'data']
+
+FILE_TYPES: Dict[str, Tuple[str, ...]] = {
+    'image': ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.tif', '.tiff', '.heic', '.ico'),
+    'document': ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf',
+                 '.epub', '.pages', '.numbers', '.key'),
+    'code': ('.py', '.js', '.ts', '.tsx', '.jsx', '.java', '.c', '.h', '.cpp', '.hpp', '.cc', '.go', '.rs',
+             '.rb', '.php', '.sh', '.cs', '.kt', '.swift', '.scala', '.sql', '.html', '.css', '.ipynb'),
+    'archive': ('.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.zst'),
+    'audio': ('.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a'),
+    'video': ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.flv', '.wmv'),
+    'text': ('.txt', '.md', '.rst', '.log', '.tex'),
+    'data': ('.json', '.jsonl', '.csv', '.tsv', '.xml', '.yaml', '.yml', '.toml', '.ini', '.parquet',
+             '.db', '.sqlite'),
+}
+
+_SIZE_UNITS = {'': 1, 'b': 1, 'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2,
+               'g': 1024 ** 3, 'gb': 1024 ** 3, 't': 1024 ** 4, 'tb': 1024 ** 4}
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*$")
+_AGE_UNITS = {'h': 3600, 'd': 86400, 'w': 7 * 86400, 'm': 30 * 86400, 'y': 365 * 86400}
+_AGE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([hdwmy])\s*$", re.I)
+
+
+class FileQuerySpec(TypedDict, total=False):
+    """
+    文件过滤条件，在遍历中逐个求值，exclude/hidden/max_depth命中的目录不会被遍历
+
+    Args:
+        min_size (str): 如 '10MB'、'512KB'，max_size同
+        modified_after (str): 如 '2024-01-01' 或 '7d'（最近7天，单位h/d/w/m/y），modified_before同
+        include (List[str]): 文件名须匹配其中任一glob
+        exclude (List[str]): 排除的文件名/目录名glob，命中的目录整棵跳过
+        hidden (bool): false时排除隐藏文件与目录
+        max_depth (int): 0为只看path本身，min_depth同
+    """
+
+    min_size: str
+    max_size: str
+    modified_after: str
+    modified_before: str
+    include: List[str]
+    exclude: List[str]
+    hidden: bool
+    min_depth: int
+    max_depth: int
+    type: List[FileType]
+
+
+def parse_size(value: Any) -> int:
+    """'10MB' -> 10485760，纯数字按字节"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    match = _SIZE_RE.match(str(value))
+    if not match or match.group(2).lower() not in _SIZE_UNITS:
+        raise ValueError(f"无法解析的文件大小: {value!r}，示例 '10MB'、'512KB'、'2048'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+def parse_time(value: Any, now: Optional[float] = None) -> float:
+    """
+    时间点 -> 时间戳
+    - '7d'、'12h'、'2w'、'3m'、'1y'：距现在的时长（m按30天）
+    - ISO日期/时间，如 '2024-01-01'、'2024-01-01T08:30'
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip()
+    match = _AGE_RE.match(text)
+    if match:
+        now = time.time() if now is None else now
+        return now - float(match.group(1)) * _AGE_UNITS[match.group(2).lower()]
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"无法解析的时间: {value!r}，示例 '2024-01-01'、'7d'")
+
+
+def _compile_globs(patterns: Any, field: str) -> List[Callable[[str], Any]]:
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not isinstance(patterns, (list, tuple)):
+        raise ValueError(f"{field} 应为glob列表，实际为 {patterns!r}")
+    return [re.compile(fnmatch.translate(os.path.normcase(str(p).strip('/')))).match for p in patterns]
+
+
+class FileQuery:
+    """
+    编译后的过滤条件
+    - admit_dir：目录级剪枝，返回False的子目录整棵不遍历
+    - match：文件级判断，只有用到大小/时间条件时才stat
+    """
+
+    __slots__ = ("min_size", "max_size", "modified_after", "modified_before", "hidden", "min_depth", "max_depth",
+                 "suffixes", "_include", "_exclude_names", "_exclude_paths", "needs_stat")
+
+    def __init__(self, min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 modified_after: Optional[float] = None, modified_before: Optional[float] = None,
+                 include: Any = (), exclude: Any = (), hidden: bool = True,
+                 min_depth: Optional[int] = None, max_depth: Optional[int] = None, types: Any = ()):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.hidden = hidden
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        if isinstance(types, str):
+            types = [types]
+        unknown = [t for t in types if t not in FILE_TYPES]
+        if unknown:
+            raise ValueError(f"不支持的文件类别: {unknown}，可选 {list(FILE_TYPES)}")
+        self.suffixes: Tuple[str, ...] = tuple(ext for t in types for ext in FILE_TYPES[t])
+        self._include = _compile_globs(include, "include")
+        exclude = [exclude] if isinstance(exclude, str) else list(exclude)
+        self._exclude_names = _compile_globs([p for p in exclude if '/' not in str(p).strip('/')], "exclude")
+        self._exclude_paths = _compile_globs([p for p in exclude if '/' in str(p).strip('/')], "exclude")
+        self.needs_stat = any(v is not None for v in (min_size, max_size, modified_after, modified_before))
+
+    @classmethod
+    def from_spec(cls, spec: Optional[Dict[str, Any]], now: Optional[float] = None) -> Optional["FileQuery"]:
+        """由FileQuerySpec字典编译，空条件返回None（调用方可继续走索引等快速路径）"""
+        if not spec:
+            return None
+        if not isinstance(spec, dict):
+            raise ValueError(f"where 应为字典，实际为 {spec!r}")
+        unknown = set(spec) - set(FileQuerySpec.__annotations__)
+        if unknown:
+            raise ValueError(f"where中不支持的条件: {sorted(unknown)}，可选 {list(FileQuerySpec.__annotations__)}")
+
+        def optional(key: str, convert: Callable[[Any], Any]) -> Any:
+            value = spec.get(key)
+            return None if value is None or value == '' else convert(value)
+
+        return cls(
+            min_size=optional('min_size', parse_size),
+            max_size=optional('max_size', parse_size),
+            modified_after=optional('modified_after', lambda v: parse_time(v, now)),
+            modified_before=optional('modified_before', lambda v: parse_time(v, now)),
+            include=spec.get('include') or (),
+            exclude=spec.get('exclude') or (),
+            hidden=spec.get('hidden', True) is not False,
+            min_depth=optional('min_depth', int),
+            max_depth=optional('max_depth', int),
+            types=spec.get('type') or (),
+        )
+
+    def _excluded(self, name: str, rel: Tuple[str, ...]) -> bool:
+        name = os.path.normcase(name)
+        if any(match(name) for match in self._exclude_names):
+            return True
+        if self._exclude_paths:
+            rel_path = '/'.join(os.path.normcase(part) for part in rel + (name,))
+            return any(match(rel_path) for match in self._exclude_paths)
+        return False
+
+    def admit_dir(self, name: str, rel: Tuple[str, ...]) -> bool:
+        """
+        @param name: 子目录名
+        @param rel: 子目录所在目录相对于根目录的各段
+        """
+        if not self.hidden and name.startswith('.'):
+            return False
+        return not self._excluded(name, rel)
+
+    def match(self, entry: os.DirEntry, rel: Tuple[str, ...]) -> bool:
+        """
+        @param entry: 已通过file_pattern的文件条目
+        @param rel: 文件所在目录相对于根目录的各段，其长度即深度
+        """
+        name = entry.name
+        if not self.hidden and name.startswith('.'):
+            return False
+        if self.min_depth is not None and len(rel) < self.min_depth:
+            return False
+        if self._excluded(name, rel):
+            return False
+        if self._include and not any(match(os.path.normcase(name)) for match in self._include):
+            return False
+        if self.suffixes and not name.lower().endswith(self.suffixes):
+            return False
+        if self.needs_stat:
+            try:
+                st = entry.stat()
+            except OSError:
+                return False
+            if self.min_size is not None and st.st_size < self.min_size:
+                return False
+            if self.max_size is not None and st.st_size > self.max_size:
+                return False
+            if self.modified_after is not None and st.st_mtime < self.modified_after:
+                return False
+            if self.modified_before is not None and st.st_mtime > self.modified_before:
+                return False
+        return True
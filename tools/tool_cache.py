@@ -0,0 +1,192 @@
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+_IGNORED_ARGS = ("cancel_event",)
+_STAT_ORDERS = ("newest", "oldest", "largest", "smallest")
+_STAT_CONDITIONS = ("min_size", "max_size", "modified_after", "modified_before")
+_SHALLOW = "shallow"#签名只覆盖到一级子目录的标记，见mtime_signature
+
+
+def normalize_args(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """
+    把调用参数归一化：补全默认值、path解析为绝对路径
+    find_files(path='.') 与 find_files(path='./', recursive=False) 得到同一个key
+    """
+    try:
+        bound = inspect.signature(func).bind(**kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except (TypeError, ValueError):#参数不匹配时交给工具自己报错，不做归一化
+        arguments = dict(kwargs)
+    for name in _IGNORED_ARGS:
+        arguments.pop(name, None)
+    if isinstance(arguments.get("path"), str):
+        arguments["path"] = str(Path(arguments["path"]).expanduser().resolve())
+    return tuple(sorted((name, _freeze(value)) for name, value in arguments.items()))
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def mtime_signature(path: Optional[str], recursive: bool = False) -> Optional[tuple]:
+    """
+    目录的mtime签名：目录增删改名会改变签名
+    - 非递归：目录本身的 (inode, mtime_ns)
+    - 递归且全局索引覆盖该路径：索引中整棵子树每个目录的当前mtime（与FileIndex.stale_dirs同一次stat）
+    - 递归但没有索引：再加上一级子目录的mtime，并以 "shallow" 开头标记，
+      更深层的变化发现不了，缓存对这类签名使用更短的shallow_ttl
+    只改文件内容不会改变目录mtime，依赖文件大小/时间/内容的结果不应使用该签名（见stat_dependent）
+    """
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ("missing",)
+    signature = [(st.st_ino, st.st_mtime_ns)]
+    if recursive and os.path.isdir(path):
+        from tools.file_index import get_file_index
+
+        index = get_file_index()
+        if index is not None and index.covers(path):
+            signature.extend((dir_path, current) for dir_path, _, current in index.disk_mtimes(path))
+            return tuple(signature)
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        signature.append((entry.name, entry.stat(follow_symlinks=False).st_mtime_ns))
+        except OSError:
+            pass
+        signature.sort(key=repr)
+        return (_SHALLOW, *signature)
+    return tuple(signature)
+
+
+def stat_dependent(arguments: Dict[str, Any]) -> bool:
+    """
+    结果是否取决于文件大小/修改时间（总字节数、分组统计、按大小/时间排序或过滤）
+    这些值变化时目录mtime不变，mtime签名无法发现，这类调用不缓存
+    """
+    if arguments.get("with_size") or arguments.get("group_by") is not None:
+        return True
+    if arguments.get("order_by") in _STAT_ORDERS:
+        return True
+    where = arguments.get("where")
+    return isinstance(where, tuple) and any(name in _STAT_CONDITIONS for name, _ in where)
+
+
+class ToolResultCache:
+    """
+    工具结果缓存
+    功能：
+    - key为工具名 + 归一化参数（解析后的path、pattern、recursive等）
+    - LRU淘汰，按条数与总字节数限制大小，支持TTL
+    - 查询路径的mtime签名变化时条目失效；签名只覆盖一级子目录（递归且无索引）时条目只保留shallow_ttl秒
+    - 结果取决于文件大小/时间的调用不缓存（见stat_dependent）；读文件内容的工具应整体不缓存
+    - 统计命中/未命中
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 8 * 1024 * 1024, ttl: Optional[float] = 300.0,
+                 shallow_ttl: Optional[float] = 5.0):
+        """
+        Args:
+            max_entries: 最多缓存条数
+            max_bytes: 缓存结果的总字节数上限（按结果字符串长度计）
+            ttl: 条目存活秒数，None表示不过期
+            shallow_ttl: 递归调用没有全局索引时（深层目录的变化不改变签名）条目的存活秒数，不超过ttl
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.shallow_ttl = shallow_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[tuple], float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(tool_name: str, func: Callable[..., Any],
+                 kwargs: Dict[str, Any]) -> Tuple[Optional[Hashable], Optional[tuple]]:
+        """返回 (缓存key, 当前mtime签名)，本次调用不可缓存时key为None"""
+        args = normalize_args(func, kwargs)
+        arg_map = dict(args)
+        if stat_dependent(arg_map):
+            return None, None
+        path = arg_map.get("path") if isinstance(arg_map.get("path"), str) else None
+        return (tool_name, args), mtime_signature(path, bool(arg_map.get("recursive")))
+
+    def get(self, key: Hashable, signature: Optional[tuple]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            cached_signature, stored_at, value = entry
+            ttl = self._ttl(cached_signature)
+            if cached_signature != signature or (ttl is not None and time.monotonic() - stored_at > ttl):
+                self._pop(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _ttl(self, signature: Optional[tuple]) -> Optional[float]:
+        if not signature or signature[0] != _SHALLOW or self.shallow_ttl is None:
+            return self.ttl
+        return self.shallow_ttl if self.ttl is None else min(self.ttl, self.shallow_ttl)
+
+    def put(self, key: Hashable, signature: Optional[tuple], value: str):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (signature, time.monotonic(), value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop(self, key: Hashable):
+        _, _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
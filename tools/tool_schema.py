@@ -0,0 +1,241 @@
+import inspect
+import re
+import typing
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, is_typeddict
+
+
+HIDDEN_PARAMS = ("cancel_event",)#由框架注入，不暴露给模型
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean",
+               list: "array", tuple: "array", dict: "object"}
+_GOOGLE_PARAM_RE = re.compile(r"^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*(.*)$")
+_AT_PARAM_RE = re.compile(r"^\s*@param\s+(\w+)\s*:\s*(.*)$")
+_DEFAULT_NOTE_RE = re.compile(r"(?:^|(?<=。))\s*默认为[^。]*。\s*$")#末尾单独成句的默认值说明，已体现在schema的default中
+_OPTION_RE = re.compile(r"^\s*-\s*(.+)$")
+_SECTION_RE = re.compile(r"^\s*(Args|Arguments|Parameters|Returns|Raises|Examples?|Yields)\s*:\s*$")
+
+
+def parse_docstring(doc: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    取docstring的第一行作为摘要，以及每个参数说明的第一行
+    支持 Args: 段落（name (type): 说明）与 @param name: 说明 两种写法，示例等其余内容丢弃
+    """
+    summary, params, _ = _parse_docstring(doc)
+    return summary, params
+
+
+def _parse_docstring(doc: Optional[str]) -> Tuple[str, Dict[str, str], Dict[str, List[str]]]:
+    """parse_docstring，另外返回每个参数续行中的列表项（如各可选值的含义）"""
+    if not doc:
+        return "", {}, {}
+    lines = inspect.cleandoc(doc).splitlines()
+    summary = next((line.strip() for line in lines if line.strip()), "")
+    params: Dict[str, str] = {}
+    options: Dict[str, List[str]] = {}
+    section = None
+    param_indent = None
+    current = None
+    for line in lines:
+        match = _AT_PARAM_RE.match(line)
+        if match:
+            params[match.group(1)] = match.group(2).strip()
+            continue
+        match = _SECTION_RE.match(line)
+        if match:
+            section = match.group(1)
+            param_indent = None
+            continue
+        if section not in ("Args", "Arguments", "Parameters") or not line.strip():
+            continue
+        indent = len(line) - len(line.lstrip())
+        if param_indent is None:
+            param_indent = indent
+        if indent == param_indent:#续行缩进更深，只取每个参数的第一行
+            match = _GOOGLE_PARAM_RE.match(line)
+            current = match.group(1) if match else None
+            if match:
+                params[current] = match.group(2).strip()
+        elif current is not None:
+            match = _OPTION_RE.match(line)
+            if match:
+                options.setdefault(current, []).append(match.group(1).strip())
+    if summary.startswith("@"):
+        summary = ""
+    return summary, params, options
+
+
+def _describe(description: str, options: List[str], prop: Dict[str, Any]) -> str:
+    """
+    参数说明：去掉末尾的默认值说明；取值为enum时附上说明各可选值含义的列表项
+    列表项以引号括起的可选值开头才保留，路径格式、示例之类的列表项不进入schema
+    """
+    description = _DEFAULT_NOTE_RE.sub("", description).strip()
+    values = prop.get("enum") or prop.get("items", {}).get("enum") or []
+    quoted = tuple(f"'{value}'" for value in values)
+    explained = [option for option in options if quoted and option.startswith(quoted)]
+    if explained:
+        description = f"{description}{'；'.join(explained)}"
+    return description
+
+
+def _strip_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def annotation_schema(annotation: Any) -> Dict[str, Any]:
+    """类型注解 -> JSON schema片段，无法表示的类型返回空dict（不约束）"""
+    annotation = _strip_optional(annotation)
+    if annotation is inspect.Parameter.empty or annotation is Any:
+        return {}
+    origin = get_origin(annotation)
+    if origin is Literal:
+        values = list(get_args(annotation))
+        schema: Dict[str, Any] = {"enum": values}
+        types = {_JSON_TYPES.get(type(value)) for value in values}
+        if len(types) == 1 and None not in types:
+            schema["type"] = types.pop()
+        return schema
+    if origin in (list, tuple, List):
+        schema = {"type": "array"}
+        args = get_args(annotation)
+        if args and args[0] is not Ellipsis:
+            items = annotation_schema(args[0])
+            if items:
+                schema["items"] = items
+        return schema
+    if origin in (dict, Dict):
+        return {"type": "object"}
+    if is_typeddict(annotation):#键的说明取自TypedDict的docstring（Args段落）
+        _, descriptions, options = _parse_docstring(annotation.__doc__)
+        properties: Dict[str, Any] = {}
+        for key, hint in typing.get_type_hints(annotation).items():
+            prop = annotation_schema(hint)
+            description = _describe(descriptions.get(key, ""), options.get(key, []), prop)
+            if description:
+                prop["description"] = description
+            properties[key] = prop
+        return {"type": "object", "properties": properties}
+    if annotation in _JSON_TYPES:
+        return {"type": _JSON_TYPES[annotation]}
+    return {}
+
+
+def build_schema(name: str, func: Callable[..., Any]) -> Dict[str, Any]:
+    """根据函数签名、类型注解与docstring生成紧凑的function定义（JSON schema）"""
+    summary, descriptions, options = _parse_docstring(func.__doc__)
+    try:
+        hints = typing.get_type_hints(func)
+    except Exception:#注解无法解析时退回原始注解
+        hints = {}
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for param in inspect.signature(func).parameters.values():
+        if param.name in HIDDEN_PARAMS or param.name.startswith("_"):
+            continue
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        prop = annotation_schema(hints.get(param.name, param.annotation))
+        description = _describe(descriptions.get(param.name, ""), options.get(param.name, []), prop)
+        if description:
+            prop["description"] = description
+        if param.default is param.empty:
+            required.append(param.name)
+        elif param.default is not None:
+            prop["default"] = param.default
+        properties[param.name] = prop
+    schema: Dict[str, Any] = {"name": name}
+    if summary:
+        schema["description"] = summary
+    schema["parameters"] = {"type": "object", "properties": properties, "required": required}
+    return schema
+
+
+def _validate_properties(properties: Dict[str, Any], args: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    errors: List[str] = []
+    cleaned: Dict[str, Any] = {}
+    for name, value in args.items():
+        if name not in properties:
+            errors.append(f"未知参数 '{name}'，可用参数为 {list(properties)}")
+            continue
+        value, error = _coerce(value, properties[name])
+        if error:
+            errors.append(f"参数 '{name}' {error}")
+        cleaned[name] = value
+    return cleaned, errors
+
+
+_TRUE = ("true", "yes", "1")
+_FALSE = ("false", "no", "0")
+
+
+def _coerce(value: Any, prop: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+    """按schema做有限的类型转换（模型常把数字/布尔写成字符串），返回 (值, 错误)"""
+    expected = prop.get("type")
+    if value is None or expected is None:
+        pass
+    elif expected == "boolean":
+        if isinstance(value, str) and value.strip().lower() in _TRUE + _FALSE:
+            value = value.strip().lower() in _TRUE
+        elif not isinstance(value, bool):
+            return value, f"应为布尔值，实际为 {value!r}"
+    elif expected == "integer":
+        if isinstance(value, str) and re.fullmatch(r"\s*-?\d+\s*", value):
+            value = int(value)
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif isinstance(value, bool) or not isinstance(value, int):
+            return value, f"应为整数，实际为 {value!r}"
+    elif expected == "number":
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                return value, f"应为数字，实际为 {value!r}"
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            return value, f"应为数字，实际为 {value!r}"
+    elif expected == "string":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        elif not isinstance(value, str):
+            return value, f"应为字符串，实际为 {value!r}"
+    elif expected == "array":
+        if isinstance(value, str) and "items" in prop:#模型常把单个值写成字符串
+            value = [value]
+        if not isinstance(value, (list, tuple)):
+            return value, f"应为列表，实际为 {value!r}"
+        if "items" in prop:
+            items = []
+            for item in value:
+                item, error = _coerce(item, prop["items"])
+                if error:
+                    return value, f"中的元素{error}"
+                items.append(item)
+            value = items
+    elif expected == "object":
+        if not isinstance(value, dict):
+            return value, f"应为字典，实际为 {value!r}"
+        if "properties" in prop:
+            nested, errors = _validate_properties(prop["properties"], value)
+            if errors:
+                return value, "；".join(errors)
+            value = nested
+    if "enum" in prop and value is not None and value not in prop["enum"]:
+        return value, f"可选值为 {prop['enum']}，实际为 {value!r}"
+    return value, None
+
+
+def validate_args(schema: Dict[str, Any], args: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    调用前按schema校验参数
+    @return: (转换后的参数, 错误列表)，错误列表为空表示可以调用
+    """
+    parameters = schema.get("parameters", {})
+    cleaned, errors = _validate_properties(parameters.get("properties", {}), args)
+    for name in parameters.get("required", []):
+        if name not in args:
+            errors.append(f"缺少必填参数 '{name}'")
+    return cleaned, errors
@@ -1,13 +1,26 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import sys
+import threading
+from concurrent.futures import Executor
 from enum import Enum, auto
-from tkinter import EXCEPTION
-from typing import Callable, Union, Any
+from typing import Callable, Dict, List, Tuple, Any, Optional
 
-Observation = Union[str,EXCEPTION]
+from config.tracing import annotate, read_io_counters, span
+from tools.tool_cache import ToolResultCache
+from tools.tool_schema import build_schema, validate_args
+
+Observation = str#工具异常也转成字符串返回给模型
 
 class NAME(Enum):
 
     COUNT_FILES = auto()
     FIND_FILES = auto()
+    SEARCH_CONTENT = auto()
+    GREP_FILES = auto()
     FIRE = auto()
     ICE = auto()
 
@@ -30,22 +43,151 @@ def ice_skill(skill:str)->str:
     """
     return "冰系魔法伤害23456，对草系特工"
 
+_default_executor: Optional[Executor] = None
+
+
+def _is_process_pool(executor: Optional[Executor]) -> bool:
+    """进程池模块（连同multiprocessing）只在创建过进程池后才已导入，未导入时executor不可能是进程池"""
+    process = sys.modules.get("concurrent.futures.process")
+    return process is not None and isinstance(executor, process.ProcessPoolExecutor)
+
+
+def set_tool_executor(executor: Optional[Executor]):
+    """设置同步工具默认使用的执行器，None表示使用事件循环默认的线程池"""
+    global _default_executor
+    _default_executor = executor
+
+
 class tool:
 
-    def __init__(self,name:NAME,func: Callable[..., Any]):
+    def __init__(self,name:NAME,func: Callable[..., Any],timeout:Optional[float]=None,executor:Optional[Executor]=None,
+                 cache:Optional[ToolResultCache]=None):
+        """
+        @param name: 工具名
+        @param func: 同步函数或 async def 函数
+        @param timeout: 单次调用超时秒数，None不限制
+        @param executor: 同步函数使用的执行器（线程池/进程池），None使用全局默认
+        @param cache: 结果缓存，相同参数且目录未变化时直接返回上次结果
+        """
         self.name=name
         self.func=func
+        self.timeout=timeout
+        self.executor=executor
+        self.cache=cache
+        self.is_async=inspect.iscoroutinefunction(func)
+        self.accepts_cancel_event="cancel_event" in inspect.signature(func).parameters#可协作取消的工具
+        self.schema=build_schema(str(name),func)#由签名、类型注解与docstring首行生成，代替整段docstring
+
+    def _lookup(self,kwargs:dict):
+        """返回 (缓存key, mtime签名, 命中的结果)"""
+        if self.cache is None:
+            return None,None,None
+        key,signature=self.cache.make_key(self.name.name,self.func,kwargs)
+        if key is None:#结果取决于文件大小/时间，本次不缓存
+            return None,None,None
+        cached=self.cache.get(key,signature)
+        annotate(cache_hit=cached is not None)
+        return key,signature,cached
+
+    def _call_cached(self,**kwargs)->str:
+        """同步工具在执行器中运行的入口：查缓存 -> 执行 -> 写缓存（只缓存成功的结果）"""
+        key,signature,cached=self._lookup(kwargs)
+        if cached is not None:
+            return cached
+        result=str(self.func(**kwargs))
+        cancel_event=kwargs.get("cancel_event")
+        if key is not None and not (cancel_event is not None and cancel_event.is_set()):#超时被取消时结果不完整，不缓存
+            self.cache.put(key,signature,result)
+        return result
 
     def tool_use(self,**kwargs)->Observation:
 
+        with span("tool.use",tool=str(self.name)) as current:
+            if not current.recording:
+                return self._tool_use(**kwargs)
+            io_before=read_io_counters()
+            result=self._tool_use(**kwargs)
+            self._trace_result(current,result,io_before)
+            return result
+
+    async def atool_use(self,**kwargs)->Observation:
+        """
+        不阻塞事件循环的工具调用
+        - async def 工具直接await
+        - 同步工具放到执行器中运行
+        - 超时或被取消时，支持cancel_event参数的工具会收到取消信号并尽快停止
+        """
+        with span("tool.use",tool=str(self.name)) as current:
+            if not current.recording:
+                return await self._atool_use(**kwargs)
+            io_before=read_io_counters()
+            result=await self._atool_use(**kwargs)
+            self._trace_result(current,result,io_before)
+            return result
+
+    @staticmethod
+    def _trace_result(current,result:Observation,io_before:Dict[str,int]):
+        """记录结果大小与I/O计数差值（/proc/self/io为进程级，并发执行时包含其他工具的I/O）"""
+        io_after=read_io_counters()
+        current.set(result_chars=len(str(result)),
+                    **{f"io_{name}":io_after[name]-io_before[name] for name in ("syscr","rchar","read_bytes")
+                       if name in io_after and name in io_before})
+
+    def _tool_use(self,**kwargs)->Observation:
+
         try:
-            return str(self.func(**kwargs))
+            if self.is_async:
+                return str(asyncio.run(self._atool_use(**kwargs)))
+            return self._call_cached(**kwargs)
+
+        except Exception as e:
+            return  str(e)
 
+    async def _atool_use(self,**kwargs)->Observation:
+        executor=self.executor or _default_executor
+        cancel_event=None
+        try:
+            if self.is_async:
+                key,signature,cached=self._lookup(kwargs)
+                if cached is not None:
+                    return cached
+                result=str(await asyncio.wait_for(self.func(**kwargs),self.timeout))
+                if key is not None:
+                    self.cache.put(key,signature,result)
+                return result
+
+            if self.accepts_cancel_event and not _is_process_pool(executor):
+                cancel_event=threading.Event()
+                kwargs["cancel_event"]=cancel_event
+            loop=asyncio.get_running_loop()
+            if _is_process_pool(executor):#缓存在本进程内，子进程里只执行函数本身
+                key,signature,cached=self._lookup(kwargs)
+                if cached is not None:
+                    return cached
+                result=str(await asyncio.wait_for(loop.run_in_executor(executor,functools.partial(self.func,**kwargs)),self.timeout))
+                if key is not None:
+                    self.cache.put(key,signature,result)
+                return result
+            context=contextvars.copy_context()#执行器线程里仍能把缓存命中记到当前span上
+            call=loop.run_in_executor(executor,functools.partial(context.run,self._call_cached,**kwargs))#查缓存的stat也不占用事件循环
+            return await asyncio.wait_for(call,self.timeout)
+
+        except asyncio.TimeoutError:
+            return f"工具{self.name.name.lower()}执行超时（超过{self.timeout}秒），请缩小搜索范围后重试"
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             return  str(e)
+        finally:
+            if cancel_event is not None:
+                cancel_event.set()#正常结束时置位无副作用，超时/取消时通知工具停止
+
+    def validate(self,kwargs:Dict[str,Any])->Tuple[Dict[str,Any],List[str]]:
+        """调用前按schema校验并转换参数，返回 (参数, 错误列表)"""
+        return validate_args(self.schema,kwargs)
 
     def get_tool_info(self):
-        return f"tool_name:{self.name.name.lower()}|tool_description:{self.func.__doc__}"
+        return json.dumps(self.schema,ensure_ascii=False,separators=(",",":"))
 
 if __name__=="__main__":
     pass